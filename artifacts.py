@@ -0,0 +1,179 @@
+"""Screenshots and failure artifacts, written off the test thread.
+
+The test thread only fetches the raw base64 screenshot (and, on failure, the DOM and
+console log) from the browser and queues it. A background worker decodes, compresses
+and writes the files to a unique per-test path under artifacts/<run>/, skips frames
+that are byte-identical to one already written for the same test and stops writing
+once the size budget of the run is used up.
+"""
+import atexit
+import base64
+import gzip
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
+import time
+from pathlib import Path
+
+from selenium.common.exceptions import WebDriverException
+
+import config
+import reporting
+
+_CONSOLE_HOOK_JS = """
+if (!window.__seleniumConsole) {
+  window.__seleniumConsole = [];
+  ['log', 'info', 'warn', 'error', 'debug'].forEach(function (level) {
+    var original = console[level];
+    console[level] = function () {
+      window.__seleniumConsole.push({level: level, time: Date.now(),
+        message: Array.prototype.map.call(arguments, String).join(' ')});
+      return original.apply(console, arguments);
+    };
+  });
+  window.addEventListener('error', function (event) {
+    window.__seleniumConsole.push({level: 'error', time: Date.now(), message: String(event.message)});
+  });
+}
+"""
+
+
+class ArtifactWriter:
+    def __init__(self, root, budget_bytes):
+        self.root = Path(root)
+        self.budget_bytes = budget_bytes
+        self.written_bytes = 0
+        self.written = []
+        self.skipped_duplicates = 0
+        self.dropped = []
+        self._sequence = {}
+        self._seen = {}
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._work, daemon=True, name="artifact-writer")
+        self._thread.start()
+
+    def submit(self, test_id, name, kind, payload):
+        """Queue an artifact; `kind` is "png" (base64 string), "html" or "json" (text)."""
+        self._queue.put((test_id, name, kind, payload))
+
+    def flush(self):
+        """Wait until everything queued so far is written."""
+        self._queue.join()
+
+    def close(self):
+        """Write everything still queued and stop the worker."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            try:
+                self._write(*item)
+            except Exception as e:
+                # A bad payload or a failing report must not stop the writer: flush() waits for it
+                self.dropped.append((item[0], item[1], f"{type(e).__name__}: {e}"))
+            finally:
+                self._queue.task_done()
+
+    def _write(self, test_id, name, kind, payload):
+        digest = hashlib.sha1(payload.encode() if isinstance(payload, str) else payload).digest()
+        seen = self._seen.setdefault(test_id, set())
+        if digest in seen:
+            self.skipped_duplicates += 1
+            return
+        seen.add(digest)
+
+        if kind == "png":
+            data, suffix = base64.b64decode(payload), ".png"
+        else:
+            # Text compresses well; screenshots are PNG-compressed already
+            data, suffix = gzip.compress(payload.encode("utf-8"), compresslevel=6), f".{kind}.gz"
+
+        if self.written_bytes + len(data) > self.budget_bytes:
+            self.dropped.append((test_id, name, "over budget"))
+            return
+
+        sequence = self._sequence[test_id] = self._sequence.get(test_id, 0) + 1
+        path = self.root / _safe(test_id) / f"{sequence:03d}-{_safe(name)}{suffix}"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        self.written_bytes += len(data)
+        self.written.append(path)
+        reporting.reporter.artifact(test_id, path)
+
+
+def _safe(name):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def writer():
+    """The writer of this process; files go to <ARTIFACTS_DIR>/<timestamp>-<pid>/."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            run = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+            _writer = ArtifactWriter(config.ARTIFACTS_DIR / run, config.ARTIFACT_BUDGET_MB * 1024 * 1024)
+            atexit.register(_writer.close)
+        return _writer
+
+
+def flush():
+    """Wait for the queued artifacts; returns the paths written by this process so far."""
+    with _writer_lock:
+        current = _writer
+    if current is None:
+        return []
+    current.flush()
+    return list(current.written)
+
+
+def screenshot(driver, test_id, name="screenshot"):
+    """Queue a screenshot; the test thread only pays for fetching the base64 string."""
+    writer().submit(test_id, name, "png", driver.get_screenshot_as_base64())
+
+
+def install_console_hook(driver):
+    """Record console output of the current page so a failure can include it.
+
+    retries.navigate calls this after every page load; output logged while the page was
+    loading is not recorded. Does nothing if the console artifact is switched off.
+    """
+    if not config.ARTIFACTS_CONSOLE_ON_FAILURE:
+        return
+    try:
+        driver.execute_script(_CONSOLE_HOOK_JS)
+    except WebDriverException:
+        # A missing console log must not fail the navigation
+        pass
+
+
+def capture_failure(driver, test_id):
+    """Screenshot plus, if enabled in config, DOM and console log of a failed test."""
+    try:
+        screenshot(driver, test_id, "failure")
+        if config.ARTIFACTS_DOM_ON_FAILURE:
+            writer().submit(test_id, "dom", "html", driver.page_source)
+        if config.ARTIFACTS_CONSOLE_ON_FAILURE:
+            writer().submit(test_id, "console", "json", json.dumps(_console_log(driver), indent=1))
+    except WebDriverException as e:
+        # The browser may be the reason the test failed
+        print(f"Could not capture failure artifacts for {test_id}: {e.msg}")
+
+
+def _console_log(driver):
+    try:
+        return driver.get_log("browser")
+    except (WebDriverException, AttributeError):
+        # geckodriver has no log endpoint; fall back to what the console hook recorded
+        return driver.execute_script("return window.__seleniumConsole || [];")
@@ -0,0 +1,245 @@
+"""Benchmarks for suite throughput and browser command latency.
+
+Runs against the local fixture server so the numbers do not depend on the live site:
+
+- cold_start / warm_start: new Firefox session vs. reusing a pooled one
+- find_element_{id,css,xpath}: one lookup of the same field by each strategy
+- form_fill: test_fill_form flows per second on text-box.php
+- click_to_result: Click Me click until the result message shows up
+- upload_<size> / download_<size>: transfer throughput per file size
+
+    python benchmarks.py                    # run and compare with bench_baseline.json
+    python benchmarks.py --save-baseline    # run and store the results as the new baseline
+
+Exits with status 1 when a metric regressed by more than --threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from selenium.webdriver.common.by import By
+
+import latency
+from browser_factory import start_firefox
+from browser_pool import BrowserPool
+from download_watcher import DownloadWatcher
+from fixture_server import UPLOAD_JS, FixtureServer
+from latency import LatencyHistory
+from waits import CLICK_RESULT, wait_for_navigation, wait_for_page_ready, wait_for_result
+
+BASELINE_FILE = Path(__file__).with_name("bench_baseline.json")
+RESULTS_FILE = Path(__file__).with_name("bench_results.json")
+DEFAULT_SIZES = [1024, 1024 * 1024, 16 * 1024 * 1024]
+
+
+def _time(function):
+    started = time.perf_counter()
+    function()
+    return time.perf_counter() - started
+
+
+def _metric(samples, unit, better, scale=None):
+    """Median of the samples; for throughput metrics `scale / sample` is reported."""
+    values = [scale / sample for sample in samples] if scale else samples
+    return {"value": statistics.median(values), "unit": unit, "better": better,
+            "samples": [round(value, 6) for value in values]}
+
+
+class Benchmarks:
+    def __init__(self, repeat, sizes):
+        self.repeat = repeat
+        self.sizes = sizes
+        self.server = FixtureServer().start()
+        self.work_dir = Path(tempfile.mkdtemp(prefix="selenium_bench_"))
+        # The waits record into a throw-away history: benchmark timings must not change
+        # the timeouts of the test suite (the shared history is saved at exit)
+        self._suite_history, latency.history = latency.history, LatencyHistory(self.work_dir / "latency.json")
+        self.driver = start_firefox(download_dir=self.work_dir)
+
+    def close(self):
+        latency.history = self._suite_history
+        self.driver.quit()
+        self.server.stop()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def url(self, page):
+        return f"{self.server.base_url}/{page}"
+
+    def cold_start(self):
+        return _metric([_time(lambda: start_firefox().quit()) for _ in range(self.repeat)], "s", "lower")
+
+    def warm_start(self):
+        pool = BrowserPool(size=1)
+        pool.release(pool.acquire())
+        samples = []
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            driver = pool.acquire()
+            samples.append(time.perf_counter() - started)
+            driver.get(self.url("buttons.php"))
+            pool.release(driver)
+        pool.shutdown()
+        return _metric(samples, "s", "lower")
+
+    def find_element(self, by, value):
+        self.driver.get(self.url("text-box.php"))
+        wait_for_page_ready(self.driver)
+        samples = [_time(lambda: self.driver.find_element(by, value)) for _ in range(self.repeat * 10)]
+        return _metric(samples, "s", "lower")
+
+    def form_fill(self):
+        driver = self.driver
+
+        def fill():
+            driver.get(self.url("text-box.php"))
+            for field_id, value in [("fullname", "Test User"), ("email", "test@example.com"),
+                                    ("address", "Test Address 123"), ("password", "TestPass123")]:
+                field = driver.find_element(By.ID, field_id)
+                field.clear()
+                field.send_keys(value)
+            wait_for_navigation(driver, driver.find_element(By.XPATH, "//input[@value='Submit']").click)
+
+        return _metric([_time(fill) for _ in range(self.repeat)], "forms/s", "higher", scale=1)
+
+    def click_to_result(self):
+        samples = []
+        for _ in range(self.repeat):
+            self.driver.get(self.url("buttons.php"))
+            button = self.driver.find_element(By.XPATH, "//button[normalize-space()='Click Me']")
+            started = time.perf_counter()
+            button.click()
+            wait_for_result(self.driver, CLICK_RESULT)
+            samples.append(time.perf_counter() - started)
+        return _metric(samples, "s", "lower")
+
+    def upload(self, size):
+        path = self.work_dir / f"upload-{size}.bin"
+        with open(path, "wb") as f:
+            f.truncate(size)
+        self.driver.get(self.url("upload-download.php"))
+        self.driver.set_script_timeout(300)
+        samples = []
+        for _ in range(self.repeat):
+            upload_input = self.driver.find_element(By.ID, "uploadFile")
+            self.driver.execute_script("arguments[0].value = '';", upload_input)
+            started = time.perf_counter()
+            upload_input.send_keys(str(path))
+            reply = self.driver.execute_async_script(UPLOAD_JS, upload_input, self.url("upload"))
+            samples.append(time.perf_counter() - started)
+            if reply.get("received") != size:
+                raise RuntimeError(f"Upload of {size} bytes failed: {reply}")
+        path.unlink()
+        return _metric(samples, "MB/s", "higher", scale=size / 1e6)
+
+    def download(self, size):
+        self.driver.get(self.url("upload-download.php"))
+        samples = []
+        with DownloadWatcher(self.work_dir, timeout=300) as downloads:
+            for _ in range(self.repeat):
+                pending = downloads.expect()
+                started = time.perf_counter()
+                self.driver.execute_script(
+                    "var link = document.createElement('a'); link.href = arguments[0];"
+                    "link.download = ''; document.body.appendChild(link); link.click(); link.remove();",
+                    self.url(f"generated/{size}.bin"))
+                downloaded = pending.result()
+                samples.append(time.perf_counter() - started)
+                if downloaded.size != size:
+                    raise RuntimeError(f"Downloaded {downloaded.size} of {size} bytes")
+                downloaded.path.unlink()
+        return _metric(samples, "MB/s", "higher", scale=size / 1e6)
+
+    def run(self, only=None):
+        cases = {
+            "cold_start": self.cold_start,
+            "warm_start": self.warm_start,
+            "find_element_id": lambda: self.find_element(By.ID, "fullname"),
+            "find_element_css": lambda: self.find_element(By.CSS_SELECTOR, "#fullname"),
+            "find_element_xpath": lambda: self.find_element(By.XPATH, "//input[@id='fullname']"),
+            "form_fill": self.form_fill,
+            "click_to_result": self.click_to_result,
+        }
+        for size in self.sizes:
+            cases[f"upload_{size}"] = lambda size=size: self.upload(size)
+            cases[f"download_{size}"] = lambda size=size: self.download(size)
+
+        results = {}
+        for name, case in cases.items():
+            if only and not any(name.startswith(prefix) for prefix in only):
+                continue
+            results[name] = case()
+            print(f"{name:24} {_format(results[name])}")
+        return results
+
+
+def compare(results, baseline, threshold):
+    """Return (name, baseline value, new value, change) for every regressed metric."""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline or not baseline[name]["value"]:
+            continue
+        old, new = baseline[name]["value"], result["value"]
+        change = (new - old) / old
+        if result["better"] == "higher":
+            change = -change
+        if change > threshold:
+            regressions.append((name, old, new, change))
+    return regressions
+
+
+def _format(metric):
+    return f"{metric['value']:12.4f} {metric['unit']}"
+
+
+def _environment():
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "cpus": os.cpu_count(), "timestamp": time.time()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark browser startup, command latency and throughput")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="upload/download sizes in bytes")
+    parser.add_argument("--only", nargs="+", help="run only metrics starting with these names")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative change that counts as a regression (default 0.2 = 20%%)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    benchmarks = Benchmarks(args.repeat, args.sizes)
+    try:
+        results = benchmarks.run(args.only)
+    finally:
+        benchmarks.close()
+
+    document = {"environment": _environment(), "metrics": results}
+    RESULTS_FILE.write_text(json.dumps(document, indent=2))
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(document, indent=2))
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    try:
+        baseline = json.loads(args.baseline.read_text())["metrics"]
+    except OSError:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline first")
+        return 0
+    regressions = compare(results, baseline, args.threshold)
+    for name, old, new, change in regressions:
+        print(f"REGRESSION {name}: {old:.4f} -> {new:.4f} ({change:+.0%} worse)")
+    if not regressions:
+        print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,353 @@
+"""Asynchronous WebDriver BiDi client.
+
+Classic WebDriver is one blocking HTTP request per command, so waiting for the page
+means asking it again and again. A session started with `start_firefox(bidi=True)`
+also has a WebSocket (its `webSocketUrl` capability) on which the browser pushes
+events. `BiDiSession.connect(driver)` attaches to it from an asyncio event loop and
+subscribes to page loads, console log entries, network responses and script messages.
+Waits register for an event before they trigger it and finish when it arrives:
+`wait_for_text` installs a MutationObserver that reports through a `script.message`
+channel instead of being polled.
+
+Commands are matched to their responses by id, so any number of them can be in flight.
+Each `BrowsingContext` (a window of the session) keeps its own log entries and network
+responses, and several contexts can be driven concurrently:
+
+    session = await BiDiSession.connect(driver)
+    first, second = await session.new_context(), await session.new_context()
+    await asyncio.gather(first.navigate(url_a), second.navigate(url_b))
+
+Needs the `websockets` package.
+"""
+import asyncio
+import itertools
+import json
+import time
+from urllib.parse import urlsplit
+
+from selenium.common.exceptions import (JavascriptException, NoSuchElementException,
+                                        TimeoutException, WebDriverException)
+
+import latency
+from latency import locator_key, site_key
+from waits import _LOCATE_JS, DEFAULT_TIMEOUT
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+DOM_EVENTS = ("browsingContext.domContentLoaded", "browsingContext.load", "script.message")
+LOG_EVENTS = ("log.entryAdded",)
+NETWORK_EVENTS = ("network.responseCompleted", "network.fetchError")
+COMMAND_TIMEOUT = 60
+NAVIGATION_TIMEOUT = 30
+
+_channels = itertools.count(1)
+
+_TEXT_WAIT_JS = "function (by, value, text, timeoutMs, report) {" + _LOCATE_JS + """
+  function check() {
+    var current = textOf(locate(by, value));
+    if (current.indexOf(text) === -1) return false;
+    report(current);
+    return true;
+  }
+  if (check()) return;
+  var observer = new MutationObserver(function () { if (check()) observer.disconnect(); });
+  observer.observe(document.documentElement,
+                   {childList: true, subtree: true, characterData: true, attributes: true});
+  // Nobody listens after the timeout
+  setTimeout(function () { observer.disconnect(); }, timeoutMs);
+}
+"""
+
+
+class BiDiError(WebDriverException):
+    """An error response to a BiDi command."""
+
+    def __init__(self, error, message, stacktrace=None):
+        super().__init__(f"{error}: {message}", stacktrace=stacktrace)
+        self.error = error
+
+
+class BiDiSession:
+    def __init__(self, url):
+        self.url = url
+        self.contexts = {}
+        self.log_entries = []
+        self._socket = None
+        self._reader = None
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._listeners = {}
+
+    @classmethod
+    async def connect(cls, driver, events=DOM_EVENTS + LOG_EVENTS + NETWORK_EVENTS):
+        """Attach to the BiDi socket of a classic session and subscribe to `events`."""
+        if websockets is None:
+            raise WebDriverException("The BiDi client needs the websockets package (pip install websockets)")
+        url = driver.capabilities.get("webSocketUrl")
+        if not isinstance(url, str):
+            raise WebDriverException("The session has no BiDi socket; start it with start_firefox(bidi=True)")
+        session = cls(url)
+        # Screenshots and large DOM strings exceed the default 1 MiB message limit
+        session._socket = await websockets.connect(url, max_size=None)
+        session._reader = asyncio.create_task(session._read())
+        session.on("log.entryAdded", session._add_log_entry)
+        session.on("network.responseCompleted", session._add_response)
+        session.on("network.fetchError", session._add_response)
+        await session.subscribe(events)
+        return session
+
+    async def command(self, method, params=None, timeout=COMMAND_TIMEOUT):
+        command_id = next(self._ids)
+        response = asyncio.get_running_loop().create_future()
+        self._pending[command_id] = response
+        try:
+            await self._socket.send(json.dumps({"id": command_id, "method": method, "params": params or {}}))
+            return await asyncio.wait_for(response, timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutException(f"No response to {method} within {timeout}s") from None
+        finally:
+            self._pending.pop(command_id, None)
+
+    async def subscribe(self, events, contexts=None):
+        params = {"events": list(events)}
+        if contexts:
+            params["contexts"] = list(contexts)
+        await self.command("session.subscribe", params)
+
+    def on(self, event, callback):
+        """Call `callback(params)` for every `event`; returns a function that removes it."""
+        listeners = self._listeners.setdefault(event, [])
+        listeners.append(callback)
+
+        def remove():
+            if callback in listeners:
+                listeners.remove(callback)
+
+        return remove
+
+    def expect(self, event, predicate=None):
+        """A future for the next `event` matching `predicate`.
+
+        Register it before triggering the event, then await it with wait_for_event.
+        """
+        future = asyncio.get_running_loop().create_future()
+
+        def listener(params):
+            if not future.done() and (predicate is None or predicate(params)):
+                future.set_result(params)
+
+        remove = self.on(event, listener)
+        future.add_done_callback(lambda _: remove())
+        return future
+
+    async def wait_for_event(self, event, predicate=None, timeout=DEFAULT_TIMEOUT, expected=None):
+        """Wait for an event; `expected` is a future from expect() registered earlier."""
+        expected = expected or self.expect(event, predicate)
+        try:
+            return await asyncio.wait_for(expected, timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutException(f"No {event} event within {timeout}s") from None
+
+    async def new_context(self, kind="window"):
+        """Open a browsing context. Windows by default: background tabs get throttled timers."""
+        result = await self.command("browsingContext.create", {"type": kind})
+        context = BrowsingContext(self, result["context"])
+        self.contexts[context.id] = context
+        return context
+
+    async def close(self):
+        for context in list(self.contexts.values()):
+            try:
+                await context.close()
+            except WebDriverException:
+                pass
+        if self._socket is not None:
+            await self._socket.close()
+        if self._reader is not None:
+            await self._reader
+
+    async def _read(self):
+        try:
+            async for raw in self._socket:
+                message = json.loads(raw)
+                if message.get("type") == "event":
+                    self._dispatch(message["method"], message.get("params", {}))
+                    continue
+                response = self._pending.get(message.get("id"))
+                if response is None or response.done():
+                    continue
+                if message.get("type") == "error":
+                    response.set_exception(BiDiError(message.get("error"), message.get("message"),
+                                                     message.get("stacktrace")))
+                else:
+                    response.set_result(message.get("result", {}))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            for response in self._pending.values():
+                if not response.done():
+                    response.set_exception(WebDriverException("The BiDi connection was closed"))
+
+    def _dispatch(self, event, params):
+        for callback in list(self._listeners.get(event, ())):
+            callback(params)
+
+    def _add_log_entry(self, params):
+        self.log_entries.append(params)
+        context = self.contexts.get(params.get("source", {}).get("context"))
+        if context is not None:
+            context.log_entries.append(params)
+
+    def _add_response(self, params):
+        context = self.contexts.get(params.get("context"))
+        if context is None:
+            return
+        entry = {"url": params.get("request", {}).get("url")}
+        if "response" in params:
+            entry["status"] = params["response"].get("status")
+        else:
+            entry["error"] = params.get("errorText")
+        context.responses.append(entry)
+
+
+class BrowsingContext:
+    def __init__(self, session, context_id):
+        self.session = session
+        self.id = context_id
+        self.url = "about:blank"
+        self.log_entries = []
+        self.responses = []
+
+    async def navigate(self, url, wait="complete"):
+        key = site_key(f"navigate:{urlsplit(url).path}", url)
+        timeout = latency.history.timeout_for(key, default=NAVIGATION_TIMEOUT)
+        started = time.perf_counter()
+        try:
+            await self.session.command("browsingContext.navigate",
+                                       {"context": self.id, "url": url, "wait": wait}, timeout)
+        except TimeoutException:
+            latency.history.record(key, timeout)
+            raise
+        latency.history.record(key, time.perf_counter() - started)
+        self.url = url
+
+    async def call(self, function, *args, await_promise=True):
+        """Call a JavaScript function declaration in the page and return its result."""
+        result = await self.session.command("script.callFunction", {
+            "functionDeclaration": function,
+            "arguments": [serialize(arg) for arg in args],
+            "target": {"context": self.id},
+            "awaitPromise": await_promise,
+        })
+        if result.get("type") == "exception":
+            raise JavascriptException(result["exceptionDetails"].get("text"))
+        return deserialize(result["result"])
+
+    async def evaluate(self, expression):
+        return await self.call(f"function () {{ return ({expression}); }}")
+
+    async def find(self, locator):
+        """The element at `locator` as a remote reference for call() and the input actions."""
+        element = await self.call("function (by, value) {" + _LOCATE_JS + " return locate(by, value); }",
+                                  *locator)
+        if element is None:
+            raise NoSuchElementException(f"Unable to locate {locator}")
+        return element
+
+    async def text(self, locator):
+        return await self.call("function (by, value) {" + _LOCATE_JS + " return textOf(locate(by, value)); }",
+                               *locator)
+
+    async def click(self, locator):
+        await self._pointer_clicks(locator, 1)
+
+    async def double_click(self, locator):
+        await self._pointer_clicks(locator, 2)
+
+    async def wait_for_text(self, locator, text, timeout=None):
+        """Wait until the element's visible text contains `text` and return the full text.
+
+        The page reports the text through a script.message channel the moment a mutation
+        makes it match.
+        """
+        key = site_key(f"wait_for_text:{locator_key(locator)}", self.url)
+        timeout = latency.history.timeout_for(key, timeout, DEFAULT_TIMEOUT)
+        channel = f"wait-for-text-{next(_channels)}"
+        expected = self.session.expect(
+            "script.message", lambda params: params.get("channel") == channel)
+        started = time.perf_counter()
+        await self.session.command("script.callFunction", {
+            "functionDeclaration": _TEXT_WAIT_JS,
+            "arguments": [serialize(locator[0]), serialize(locator[1]), serialize(text),
+                          serialize(int(timeout * 1000)),
+                          {"type": "channel", "value": {"channel": channel}}],
+            "target": {"context": self.id},
+            "awaitPromise": False,
+        })
+        try:
+            message = await self.session.wait_for_event("script.message", timeout=timeout, expected=expected)
+        except TimeoutException:
+            latency.history.record(key, timeout)
+            last_text = await self.text(locator)
+            raise TimeoutException(f"Text {text!r} did not appear in {locator} within {timeout}s "
+                                   f"(last text: {last_text!r})") from None
+        latency.history.record(key, time.perf_counter() - started)
+        return deserialize(message["data"])
+
+    async def close(self):
+        self.session.contexts.pop(self.id, None)
+        await self.session.command("browsingContext.close", {"context": self.id})
+
+    async def _pointer_clicks(self, locator, clicks):
+        element = await self.find(locator)
+        actions = [{"type": "pointerMove", "x": 0, "y": 0,
+                    "origin": {"type": "element", "element": {"sharedId": element["sharedId"]}}}]
+        for _ in range(clicks):
+            actions += [{"type": "pointerDown", "button": 0}, {"type": "pointerUp", "button": 0}]
+        await self.session.command("input.performActions", {
+            "context": self.id,
+            "actions": [{"type": "pointer", "id": "mouse", "parameters": {"pointerType": "mouse"},
+                         "actions": actions}],
+        })
+
+
+def serialize(value):
+    """A Python value as a BiDi local value; a remote reference (from find) is passed through."""
+    if isinstance(value, dict) and "sharedId" in value:
+        return {"sharedId": value["sharedId"]}
+    if value is None:
+        return {"type": "null"}
+    if isinstance(value, bool):
+        return {"type": "boolean", "value": value}
+    if isinstance(value, (int, float)):
+        return {"type": "number", "value": value}
+    if isinstance(value, str):
+        return {"type": "string", "value": value}
+    if isinstance(value, (list, tuple)):
+        return {"type": "array", "value": [serialize(item) for item in value]}
+    if isinstance(value, dict):
+        return {"type": "object", "value": [[str(k), serialize(v)] for k, v in value.items()]}
+    raise TypeError(f"Cannot pass {type(value).__name__} to the page")
+
+
+_SPECIAL_NUMBERS = {"NaN": float("nan"), "-0": -0.0, "Infinity": float("inf"), "-Infinity": float("-inf")}
+
+
+def deserialize(value):
+    """A BiDi remote value as a Python value; nodes and other references stay as they are."""
+    kind = value.get("type")
+    if kind in ("undefined", "null"):
+        return None
+    if kind in ("string", "boolean"):
+        return value["value"]
+    if kind == "number":
+        return _SPECIAL_NUMBERS.get(value["value"], value["value"])
+    if kind == "array":
+        return [deserialize(item) for item in value.get("value", ())]
+    if kind == "object":
+        return {key if isinstance(key, str) else deserialize(key): deserialize(item)
+                for key, item in value.get("value", ())}
+    return value
@@ -0,0 +1,80 @@
+import asyncio
+import unittest
+
+import bidi
+import config
+from browser_factory import start_firefox
+from lifecycle import manager
+from pages import ButtonsPage, RadioButtonPage
+from reporting import TestRunner, check
+
+
+@unittest.skipIf(bidi.websockets is None, "the BiDi client needs the websockets package")
+class TestBiDiScenarios(unittest.IsolatedAsyncioTestCase):
+    """The radio-button and buttons scenarios on the asyncio BiDi client, one at a time
+    and side by side in two windows of the same browser."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.driver = start_firefox(bidi=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        manager.quit(cls.driver)
+
+    async def asyncSetUp(self):
+        self.session = await bidi.BiDiSession.connect(self.driver)
+        manager.begin_test(self.driver, self.id())
+
+    async def asyncTearDown(self):
+        manager.end_test(self.driver)
+        await self.session.close()
+
+    async def test_radio_buttons(self):
+        await self._radio_scenario(await self.session.new_context())
+
+    async def test_buttons(self):
+        await self._buttons_scenario(await self.session.new_context())
+
+    async def test_scenarios_concurrently(self):
+        radio, buttons = await asyncio.gather(self.session.new_context(), self.session.new_context())
+        await asyncio.gather(self._radio_scenario(radio), self._buttons_scenario(buttons))
+        check("Both scenarios passed side by side")
+
+    async def _radio_scenario(self, context):
+        await context.navigate(config.page_url(RadioButtonPage.path))
+
+        # Test 1: Choosing Yes radio button
+        await context.click(RadioButtonPage.yes.locator)
+        resulting_text = await context.wait_for_text(RadioButtonPage.result.locator, "Yes")
+        assert "You have checked Yes" in resulting_text
+        check(f"Radio test 1 passed: {resulting_text}")
+
+        # Test 2. Choosing Impressive radio button
+        await context.click(RadioButtonPage.impressive.locator)
+        resulting_text_2 = await context.wait_for_text(RadioButtonPage.impressive_result.locator, "Impressive")
+        assert "You have checked Impressive" in resulting_text_2
+        check(f"Radio test 2 passed: {resulting_text_2}")
+
+        # Test 3. The No radio button is disabled and stays unchecked
+        await context.click(RadioButtonPage.no.locator)
+        assert await context.call("function (el) { return el.checked; }",
+                                  await context.find(RadioButtonPage.no.locator)) is False
+        check("Radio test 3 passed: No stays unchecked")
+
+    async def _buttons_scenario(self, context):
+        await context.navigate(config.page_url(ButtonsPage.path))
+
+        await context.click(ButtonsPage.click_me.locator)
+        click_text = await context.wait_for_text(ButtonsPage.click_result.locator, "dynamic click")
+        assert "You have done a dynamic click" in click_text, f"Unexpected message: {click_text}"
+        check(f"Click message: {click_text}")
+
+        await context.double_click(ButtonsPage.double_click_me.locator)
+        double_click_text = await context.wait_for_text(ButtonsPage.double_click_result.locator, "Double clicked")
+        assert "You have Double clicked" in double_click_text, f"Unexpected message: {double_click_text}"
+        check(f"Double-click message: {double_click_text}")
+
+
+if __name__ == "__main__":
+    unittest.main(testRunner=TestRunner)
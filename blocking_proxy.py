@@ -0,0 +1,418 @@
+"""Local proxy that drops third-party requests and caches first-party static assets.
+
+With SELENIUM_PROXY=1 every Firefox started by browser_factory goes through a proxy on
+a background thread of the test process:
+
+* Hosts on the deny list (ads, analytics, web fonts; extend it with
+  SELENIUM_PROXY_DENY) get an instant empty response: 204 for http, 403 for an https
+  CONNECT, so the browser gives up on them without touching the network. With
+  SELENIUM_PROXY_ALLOW set, every host that is neither first-party nor on that list is
+  blocked instead.
+* Static first-party assets (css, js, images, fonts) fetched over plain http are kept
+  in a disk cache (SELENIUM_PROXY_CACHE_DIR) and served from it in later sessions and
+  runs. https traffic is tunnelled unchanged: without decrypting it there is nothing to
+  cache, only hosts to block.
+* Requests, blocked requests, cache hits and bytes are counted per practice page (the
+  page last opened through config.page_url) and written to proxy_report.json at exit.
+
+    python blocking_proxy.py --port 8888    # standalone, prints the stats on Ctrl-C
+"""
+import argparse
+import atexit
+import fnmatch
+import hashlib
+import http.client
+import json
+import os
+import selectors
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import config
+
+REPORT_FILE = Path(__file__).with_name("proxy_report.json")
+
+DEFAULT_DENY = [
+    "*.doubleclick.net", "*.googlesyndication.com", "*.googleadservices.com",
+    "*.google-analytics.com", "*.googletagmanager.com", "*.googletagservices.com",
+    "*.adservice.google.com", "fonts.googleapis.com", "fonts.gstatic.com",
+    "*.facebook.net", "*.facebook.com", "*.hotjar.com", "*.amazon-adsystem.com",
+    "*.criteo.com", "*.criteo.net", "*.taboola.com", "*.outbrain.com",
+    "*.scorecardresearch.com", "*.quantserve.com", "*.pubmatic.com",
+    "*.rubiconproject.com", "*.adnxs.com", "*.moatads.com", "*.clarity.ms",
+]
+STATIC_SUFFIXES = (".css", ".js", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".ico",
+                   ".woff", ".woff2", ".ttf", ".otf")
+MAX_CACHED_BODY = 5 * 1024 * 1024
+HOP_BY_HOP = {"connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+              "proxy-connection", "te", "trailer", "transfer-encoding", "upgrade"}
+COPY_CHUNK = 64 * 1024
+UPSTREAM_TIMEOUT = 30
+
+
+def _matches(host, patterns):
+    for pattern in patterns:
+        # "*.example.com" covers example.com itself too
+        if fnmatch.fnmatch(host, pattern) or (pattern.startswith("*.") and host == pattern[2:]):
+            return True
+    return False
+
+
+class HostPolicy:
+    def __init__(self, first_party=(), allow=(), deny=DEFAULT_DENY):
+        self.first_party = {"127.0.0.1", "localhost", *first_party}
+        self.allow = list(allow)
+        self.deny = list(deny)
+
+    def is_first_party(self, host):
+        return host in self.first_party
+
+    def blocks(self, host):
+        if self.is_first_party(host):
+            return False
+        if self.allow:
+            return not _matches(host, self.allow)
+        return _matches(host, self.deny)
+
+
+class AssetCache:
+    """Static responses on disk: <sha1 of url>.body plus .json with status and headers."""
+
+    def __init__(self, directory, ttl):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode()).hexdigest()
+        return self.directory / f"{key}.json", self.directory / f"{key}.body"
+
+    def get(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text())
+            if time.time() - meta["stored"] > self.ttl:
+                return None
+            return meta["status"], meta["headers"], body_path.read_bytes()
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, url, status, headers, body):
+        meta_path, body_path = self._paths(url)
+        try:
+            # Body first, so a reader never sees metadata without its body
+            partial = body_path.with_name(f"{body_path.name}.{os.getpid()}.tmp")
+            partial.write_bytes(body)
+            os.replace(partial, body_path)
+            meta_path.write_text(json.dumps({"url": url, "status": status, "headers": headers,
+                                             "stored": time.time()}))
+        except OSError:
+            pass
+
+
+class ProxyStats:
+    FIELDS = ("requests", "blocked", "cache_hits", "bytes_from_cache", "bytes_upstream")
+
+    def __init__(self):
+        self.page = "(no page)"
+        self.pages = {}
+        self._lock = threading.Lock()
+
+    def add(self, requests=1, **counts):
+        with self._lock:
+            page = self.pages.setdefault(self.page, dict.fromkeys(self.FIELDS, 0))
+            page["requests"] += requests
+            for name, value in counts.items():
+                page[name] += value
+
+    def report(self):
+        """Per page: counts plus what was saved (blocked requests and cache hits)."""
+        with self._lock:
+            return {page: dict(counts, requests_saved=counts["blocked"] + counts["cache_hits"],
+                               bytes_saved=counts["bytes_from_cache"])
+                    for page, counts in self.pages.items()}
+
+    def format_report(self):
+        lines = []
+        for page, counts in sorted(self.report().items()):
+            lines.append(f"{page:24} {counts['requests']:5} requests  {counts['blocked']:4} blocked  "
+                         f"{counts['cache_hits']:4} from cache  "
+                         f"{counts['bytes_saved'] / 1024:9.1f} KB saved  "
+                         f"{counts['bytes_upstream'] / 1024:9.1f} KB fetched")
+        return "\n".join(lines)
+
+
+class ProxyRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    policy = None
+    cache = None
+    stats = None
+
+    def do_CONNECT(self):
+        host, _, port = self.path.rpartition(":")
+        if self.policy.blocks(host):
+            self.stats.add(blocked=1)
+            self._send_empty(403)
+            return
+        try:
+            upstream = socket.create_connection((host, int(port)), timeout=UPSTREAM_TIMEOUT)
+        except (OSError, ValueError):
+            self.send_error(502)
+            return
+        self.send_response(200, "Connection Established")
+        self.end_headers()
+        self.close_connection = True
+        with upstream:
+            received = _tunnel(self.connection, upstream)
+        self.stats.add(bytes_upstream=received)
+
+    def do_GET(self):
+        self._forward()
+
+    def do_HEAD(self):
+        self._forward()
+
+    def do_POST(self):
+        self._forward()
+
+    def do_PUT(self):
+        self._forward()
+
+    def do_DELETE(self):
+        self._forward()
+
+    def do_OPTIONS(self):
+        self._forward()
+
+    def _forward(self):
+        url = urlsplit(self.path)
+        host = url.hostname
+        if not host:
+            self.send_error(400, "Proxy requests need an absolute URL")
+            return
+        if self.policy.blocks(host):
+            self.stats.add(blocked=1)
+            # The request body (if any) is not read, so this connection cannot be reused
+            self.close_connection = True
+            self._send_empty(204)
+            return
+
+        cacheable = (self.command == "GET" and self.policy.is_first_party(host)
+                     and url.path.lower().endswith(STATIC_SUFFIXES))
+        if cacheable:
+            cached = self.cache.get(self.path)
+            if cached is not None:
+                status, headers, data = cached
+                self.stats.add(cache_hits=1, bytes_from_cache=len(data))
+                self._send(status, headers, data)
+                return
+
+        target = url.path or "/"
+        if url.query:
+            target += "?" + url.query
+        headers = {name: value for name, value in self.headers.items()
+                   if name.lower() not in HOP_BY_HOP}
+        upstream = http.client.HTTPConnection(host, url.port or 80, timeout=UPSTREAM_TIMEOUT)
+        try:
+            upstream.putrequest(self.command, target, skip_host=True, skip_accept_encoding=True)
+            for name, value in headers.items():
+                upstream.putheader(name, value)
+            upstream.endheaders()
+            # Relay the request body in chunks; uploads can be gigabytes
+            remaining = int(self.headers.get("Content-Length", 0))
+            while remaining:
+                chunk = self.rfile.read(min(remaining, COPY_CHUNK))
+                if not chunk:
+                    break
+                upstream.send(chunk)
+                remaining -= len(chunk)
+            response = upstream.getresponse()
+            response_headers = [(name, value) for name, value in response.getheaders()
+                                if name.lower() not in HOP_BY_HOP and name.lower() != "content-length"]
+            cache_control = (response.getheader("Cache-Control") or "").lower()
+            if (cacheable and response.status == 200 and "no-store" not in cache_control
+                    and "private" not in cache_control):
+                data = response.read(MAX_CACHED_BODY + 1)
+                if len(data) <= MAX_CACHED_BODY:
+                    self.cache.put(self.path, response.status, response_headers, data)
+                    self.stats.add(bytes_upstream=len(data))
+                    self._send(response.status, response_headers, data)
+                    return
+                self._stream(response, response_headers, data)
+            else:
+                self._stream(response, response_headers)
+        except OSError:
+            self.send_error(502)
+        finally:
+            upstream.close()
+
+    def _stream(self, response, headers, head=b""):
+        """Relay a response of unknown size; the client connection ends with it."""
+        # Counted before the client sees the response, so the stats never lag behind it;
+        # the rest of the body is added as it is relayed
+        self.stats.add(bytes_upstream=len(head))
+        self.send_response(response.status, response.reason)
+        for name, value in headers:
+            self.send_header(name, value)
+        length = response.getheader("Content-Length")
+        if length is not None and self.command != "HEAD":
+            self.send_header("Content-Length", length)
+        else:
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        self.wfile.write(head)
+        if self.command != "HEAD":
+            while chunk := response.read(COPY_CHUNK):
+                self.stats.add(requests=0, bytes_upstream=len(chunk))
+                self.wfile.write(chunk)
+
+    def _send(self, status, headers, data):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def _send_empty(self, status):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _tunnel(client, upstream):
+    """Copy bytes both ways until one side closes; return the bytes sent to the client."""
+    received = 0
+    peers = {client: upstream, upstream: client}
+    with selectors.DefaultSelector() as selector:
+        for sock in peers:
+            sock.setblocking(True)
+            selector.register(sock, selectors.EVENT_READ)
+        while True:
+            events = selector.select(timeout=UPSTREAM_TIMEOUT)
+            if not events:
+                return received
+            for key, _ in events:
+                try:
+                    data = key.fileobj.recv(COPY_CHUNK)
+                    if data:
+                        peers[key.fileobj].sendall(data)
+                except OSError:
+                    data = b""
+                if not data:
+                    return received
+                if key.fileobj is upstream:
+                    received += len(data)
+
+
+class BlockingProxy:
+    """Runs the proxy on a background thread."""
+
+    def __init__(self, host="127.0.0.1", port=0, policy=None, cache_dir=None,
+                 cache_ttl=None):
+        self.stats = ProxyStats()
+        handler = type("Handler", (ProxyRequestHandler,), {
+            "policy": policy or HostPolicy(),
+            "cache": AssetCache(cache_dir or config.PROXY_CACHE_DIR,
+                                config.PROXY_CACHE_TTL if cache_ttl is None else cache_ttl),
+            "stats": self.stats,
+        })
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self):
+        return self.httpd.server_address[:2]
+
+    def firefox_prefs(self):
+        """Preferences that send all of Firefox's traffic, localhost included, through us."""
+        host, port = self.address
+        return {
+            "network.proxy.type": 1,
+            "network.proxy.http": host,
+            "network.proxy.http_port": port,
+            "network.proxy.ssl": host,
+            "network.proxy.ssl_port": port,
+            "network.proxy.no_proxies_on": "",
+            "network.proxy.allow_hijacking_localhost": True,
+        }
+
+    def set_page(self, page):
+        """Count the following requests towards `page`."""
+        self.stats.page = page
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True,
+                                        name="blocking-proxy")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def default_policy():
+    first_party = []
+    if config.BASE_URL != "local":
+        first_party.append(urlsplit(config.BASE_URL).hostname)
+    return HostPolicy(first_party, config.PROXY_ALLOW, DEFAULT_DENY + config.PROXY_DENY)
+
+
+_proxy = None
+_proxy_lock = threading.Lock()
+
+
+def ensure_started():
+    """Start the in-process proxy once and return it."""
+    global _proxy
+    with _proxy_lock:
+        if _proxy is None:
+            _proxy = BlockingProxy(policy=default_policy()).start()
+            atexit.register(_report_at_exit)
+        return _proxy
+
+
+def _report_at_exit():
+    report = _proxy.stats.report()
+    if not report:
+        return
+    path = REPORT_FILE
+    if config.WORKER is not None:
+        # Parallel runner workers each write their own report
+        path = path.with_name(f"{path.stem}-worker-{config.WORKER}{path.suffix}")
+    path.write_text(json.dumps(report, indent=2, sort_keys=True))
+    print(f"\nBlocking proxy ({path}):\n{_proxy.stats.format_report()}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the blocking proxy standalone")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8888)
+    args = parser.parse_args(argv)
+
+    proxy = BlockingProxy(args.host, args.port, default_policy())
+    print(f"Proxy listening on {args.host}:{args.port}")
+    try:
+        proxy.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        proxy.httpd.server_close()
+        print(proxy.stats.format_report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""Start Firefox sessions quickly.
+
+All preferences (downloads, telemetry, updates, first-run pages) are written once into a
+profile template, and Firefox is started once against it so that it creates its
+databases, caches and prefs.js there. Every session starts from a copy of that populated
+profile, passed to Firefox with `-profile` so Selenium does not have to zip and upload a
+profile and Firefox does not have to create one. Sessions are headless by default and
+can use the `eager` page-load strategy. Each startup is timed and appended to
+startup_times.jsonl; `python browser_factory.py` summarises cold and warm startups.
+
+Other modules act on every new session through `after_start` hooks.
+"""
+import atexit
+import hashlib
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.firefox.options import Options
+from selenium.webdriver.firefox.service import Service
+
+import blocking_proxy
+import config
+import lifecycle
+import reporting
+import result_cache
+import tracing
+
+STARTUP_TIMES_FILE = Path(__file__).with_name("startup_times.jsonl")
+
+# Firefox holds these while it runs; a copy with them looks like a profile in use
+_PROFILE_LOCKS = ("lock", ".parentlock", "parent.lock")
+_TEMPLATE_READY = ".template-ready"
+
+SAVE_TO_DISK_TYPES = "application/octet-stream,text/plain,image/jpeg,application/pdf"
+
+BASE_PREFS = {
+    # Downloads go straight to the download dir without a dialog
+    "browser.download.folderList": 2,
+    "browser.download.useDownloadDir": True,
+    "browser.download.manager.showWhenStarting": False,
+    "browser.download.alwaysOpenPanel": False,
+    "browser.helperApps.neverAsk.saveToDisk": SAVE_TO_DISK_TYPES,
+    # Telemetry and health reports
+    "toolkit.telemetry.enabled": False,
+    "toolkit.telemetry.unified": False,
+    "toolkit.telemetry.archive.enabled": False,
+    "datareporting.healthreport.uploadEnabled": False,
+    "datareporting.policy.dataSubmissionEnabled": False,
+    # Application and add-on updates
+    "app.update.auto": False,
+    "app.update.enabled": False,
+    "app.update.disabledForTesting": True,
+    "extensions.update.enabled": False,
+    # First-run pages and background traffic
+    "browser.shell.checkDefaultBrowser": False,
+    "browser.startup.homepage_override.mstone": "ignore",
+    "browser.aboutwelcome.enabled": False,
+    "startup.homepage_welcome_url": "about:blank",
+    "network.captive-portal-service.enabled": False,
+    "network.connectivity-service.enabled": False,
+    "browser.safebrowsing.malware.enabled": False,
+    "browser.safebrowsing.phishing.enabled": False,
+}
+
+
+def profile_prefs(download_dir=None):
+    prefs = dict(BASE_PREFS)
+    prefs["browser.download.dir"] = str(download_dir or config.DOWNLOAD_DIR)
+    return prefs
+
+
+def _user_js(prefs):
+    return "".join(f"user_pref({json.dumps(name)}, {json.dumps(value)});\n"
+                   for name, value in sorted(prefs.items()))
+
+
+def profile_template(prefs):
+    """Return the template directory for these prefs, building it on first use.
+
+    Templates live in the temp dir keyed by a hash of their prefs, so parallel workers
+    and later runs share them. Building one starts and quits a headless Firefox on it.
+    """
+    user_js = _user_js(prefs)
+    key = hashlib.sha1(user_js.encode()).hexdigest()[:16]
+    template = Path(tempfile.gettempdir()) / f"selenium-template-{key}"
+    if (template / _TEMPLATE_READY).exists():
+        return template
+
+    staging = Path(tempfile.mkdtemp(prefix="selenium-profile-staging-"))
+    (staging / "user.js").write_text(user_js)
+    try:
+        _populate_profile(staging)
+    except WebDriverException as e:
+        # Not marked ready, so the next session tries again; this one still gets the prefs
+        print(f"Could not populate the profile template: {e.msg}")
+        atexit.register(shutil.rmtree, staging, True)
+        return staging
+    (staging / _TEMPLATE_READY).touch()
+    try:
+        os.rename(staging, template)
+    except OSError:
+        # Another process built the same template first
+        shutil.rmtree(staging, ignore_errors=True)
+    return template
+
+
+def _populate_profile(directory):
+    options = Options()
+    options.add_argument("-headless")
+    options.add_argument("-profile")
+    options.add_argument(str(directory))
+    webdriver.Firefox(service=Service(), options=options).quit()
+    for name in _PROFILE_LOCKS:
+        (directory / name).unlink(missing_ok=True)
+
+
+def clone_profile(template):
+    clone = tempfile.mkdtemp(prefix="selenium-profile-")
+    shutil.copytree(template, clone, dirs_exist_ok=True,
+                    ignore=shutil.ignore_patterns(_TEMPLATE_READY, *_PROFILE_LOCKS))
+    atexit.register(shutil.rmtree, clone, True)
+    return clone
+
+
+def firefox_options(download_dir=None, headless=None, page_load_strategy=None, bidi=False):
+    headless = config.HEADLESS if headless is None else headless
+    options = Options()
+    if headless:
+        options.add_argument("-headless")
+    options.page_load_strategy = page_load_strategy or config.PAGE_LOAD_STRATEGY
+    options.add_argument("-profile")
+    options.add_argument(clone_profile(profile_template(profile_prefs(download_dir))))
+    if config.PROXY:
+        # The proxy port changes per run, so it stays out of the shared profile template
+        for name, value in blocking_proxy.ensure_started().firefox_prefs().items():
+            options.set_preference(name, value)
+    if bidi:
+        # The session's capabilities then carry the URL of its BiDi socket
+        options.set_capability("webSocketUrl", True)
+    return options
+
+
+_started = 0
+_started_lock = threading.Lock()
+_after_start_hooks = []
+
+
+def after_start(hook):
+    """Call hook(driver, started, seconds) for every session start_firefox starts.
+
+    `started` is the time.perf_counter() at which the startup began and `seconds` how
+    long it took. Hooks run in registration order; usable as a decorator.
+    """
+    _after_start_hooks.append(hook)
+    return hook
+
+
+@after_start
+def _trace_startup(driver, started, seconds):
+    if tracing.enabled():
+        tracing.tracer.record("startup", "newSession", started, seconds)
+        tracing.tracer.trace_driver(driver)
+
+
+@after_start
+def _count_commands(driver, started, seconds):
+    reporting.count_commands(driver)
+
+
+@after_start
+def _note_browser_version(driver, started, seconds):
+    result_cache.note_browser_version(driver.capabilities.get("browserVersion"))
+
+
+@after_start
+def _track_processes(driver, started, seconds):
+    lifecycle.manager.register(driver)
+
+
+def start_firefox(download_dir=None, headless=None, page_load_strategy=None, lazy=False, bidi=False):
+    """Start a Firefox session from the profile template.
+
+    With lazy=True the browser boots on a background thread and a LazyDriver is returned
+    right away; the first call on it waits for the boot to finish. With bidi=True the
+    session also opens a WebDriver BiDi socket (see bidi.py).
+    """
+    if lazy:
+        return LazyDriver(lambda: start_firefox(download_dir, headless, page_load_strategy, bidi=bidi))
+
+    global _started
+    started = time.perf_counter()
+    options = firefox_options(download_dir, headless, page_load_strategy, bidi)
+    profile_seconds = time.perf_counter() - started
+    driver = webdriver.Firefox(service=Service(), options=options)
+    total_seconds = time.perf_counter() - started
+
+    with _started_lock:
+        kind = "cold" if _started == 0 else "warm"
+        _started += 1
+    for hook in _after_start_hooks:
+        hook(driver, started, total_seconds)
+    _record_startup({
+        "kind": kind,
+        "seconds": round(total_seconds, 3),
+        "profile_seconds": round(profile_seconds, 3),
+        "headless": "-headless" in options.arguments,
+        "page_load_strategy": options.page_load_strategy,
+        "pid": os.getpid(),
+        "timestamp": time.time(),
+    })
+    return driver
+
+
+def _record_startup(record):
+    try:
+        with open(STARTUP_TIMES_FILE, "a") as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError:
+        pass
+
+
+_boot_executor = ThreadPoolExecutor(thread_name_prefix="firefox-boot")
+
+
+class LazyDriver:
+    """Stands in for a WebDriver that is still booting in the background."""
+
+    def __init__(self, start):
+        self._boot = _boot_executor.submit(start)
+
+    @property
+    def wrapped(self):
+        return self._boot.result()
+
+    def __getattr__(self, name):
+        return getattr(self.wrapped, name)
+
+
+def startup_summary(path=STARTUP_TIMES_FILE):
+    """Median/min/max startup time per kind (cold, warm) from the recorded startups."""
+    by_kind = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                record = json.loads(line)
+                by_kind.setdefault(record["kind"], []).append(record["seconds"])
+    except OSError:
+        return {}
+    return {kind: {"count": len(times), "median": statistics.median(times),
+                   "min": min(times), "max": max(times)}
+            for kind, times in by_kind.items()}
+
+
+if __name__ == "__main__":
+    summary = startup_summary()
+    if not summary:
+        print(f"No startups recorded in {STARTUP_TIMES_FILE}")
+        sys.exit(1)
+    for kind, stats in sorted(summary.items()):
+        print(f"{kind:5} startups: {stats['count']:4}  median {stats['median']:.2f}s  "
+              f"min {stats['min']:.2f}s  max {stats['max']:.2f}s")
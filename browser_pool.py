@@ -0,0 +1,190 @@
+import atexit
+import os
+import queue
+import threading
+import unittest
+
+from selenium.common.exceptions import NoAlertPresentException, WebDriverException
+
+import artifacts
+import lifecycle
+from browser_factory import start_firefox
+from latency import AdaptiveWait
+from tracing import tracer
+
+
+class BrowserPool:
+    """Hands out warm WebDriver sessions and takes them back after each test."""
+
+    def __init__(self, factory=start_firefox, size=1):
+        self.factory = factory
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._sessions = set()
+        self._checked_out = set()
+
+    def acquire(self, timeout=None):
+        """Return a healthy driver, starting a new one if the pool is not full yet."""
+        while True:
+            driver = self._take_idle_or_create(timeout)
+            if self._is_healthy(driver):
+                with self._lock:
+                    self._checked_out.add(id(driver))
+                return driver
+            self._discard(driver)
+
+    def release(self, driver, broken=False):
+        """Reset the driver and put it back, or replace it if it went bad."""
+        with self._lock:
+            if id(driver) not in self._checked_out:
+                # Already released (e.g. a test called tearDown() by hand)
+                return
+            self._checked_out.discard(id(driver))
+
+        recycle_reason = lifecycle.manager.should_recycle(driver)
+        if recycle_reason:
+            self._forget(driver)
+            lifecycle.manager.recycle(driver, recycle_reason)
+            return
+        if broken or not self._reset(driver):
+            self._discard(driver)
+            return
+        self._idle.put(driver)
+
+    def shutdown(self):
+        """Quit every session the pool has started."""
+        with self._lock:
+            sessions = list(self._sessions)
+            self._sessions.clear()
+            self._checked_out.clear()
+        while not self._idle.empty():
+            self._idle.get_nowait()
+        for driver in sessions:
+            if not hasattr(driver, "quit"):
+                # Slot reserved by a browser that is still starting
+                continue
+            lifecycle.manager.quit(driver)
+
+    def _take_idle_or_create(self, timeout):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = len(self._sessions) < self.size
+            if can_create:
+                # Reserve the slot before the (slow) browser start
+                placeholder = object()
+                self._sessions.add(placeholder)
+
+        if not can_create:
+            return self._idle.get(timeout=timeout)
+
+        try:
+            driver = self.factory()
+        finally:
+            with self._lock:
+                self._sessions.discard(placeholder)
+        with self._lock:
+            self._sessions.add(driver)
+        return driver
+
+    @staticmethod
+    def _is_healthy(driver):
+        try:
+            driver.current_window_handle
+            return True
+        except WebDriverException:
+            return False
+
+    @staticmethod
+    def _reset(driver):
+        """Bring the session back to a blank state. Returns False if that failed."""
+        try:
+            try:
+                driver.switch_to.alert.dismiss()
+            except NoAlertPresentException:
+                pass
+
+            # Close every window except the first one
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+
+            # Cookies and storage belong to the current origin, so clear them before leaving it
+            driver.delete_all_cookies()
+            try:
+                driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+            except WebDriverException:
+                # about:blank and similar pages have no storage
+                pass
+
+            driver.get("about:blank")
+            return True
+        except WebDriverException:
+            return False
+
+    def _forget(self, driver):
+        with self._lock:
+            self._sessions.discard(driver)
+            self._checked_out.discard(id(driver))
+
+    def _discard(self, driver):
+        self._forget(driver)
+        lifecycle.manager.quit(driver)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the pool shared by all test modules in this process."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool(size=int(os.environ.get("BROWSER_POOL_SIZE", "1")))
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def test_failed(test):
+    """True if the running test has failed or errored so far; meant for tearDown.
+
+    `test._outcome.success` cannot tell: since Python 3.11 it is reset for every part of
+    the test (setUp, the test method, tearDown), so it is always true in tearDown.
+    """
+    result = test._outcome.result
+    problems = getattr(result, "errors", []) + getattr(result, "failures", [])
+    # A failing subTest block is reported with the _SubTest, not the test
+    return any(getattr(failed, "test_case", failed) is test for failed, _ in problems)
+
+
+class PooledBrowserTestCase(unittest.TestCase):
+    """Test case that borrows its driver from the shared pool."""
+
+    driver = None
+
+    def setUp(self):
+        """Borrow a warm WebDriver before each test."""
+        tracer.begin_test(self.id())
+        if self.driver is not None:
+            # setUp() called twice in one test: give the first browser back instead of leaking it
+            get_pool().release(self.driver)
+        self.driver = get_pool().acquire()
+        self.wait = AdaptiveWait(self.driver)
+        lifecycle.manager.begin_test(self.driver, self.id())
+
+    def tearDown(self):
+        """Return the browser to the pool after each test."""
+        if self.driver is not None:
+            if test_failed(self):
+                artifacts.capture_failure(self.driver, self.id())
+            lifecycle.manager.end_test(self.driver)
+            get_pool().release(self.driver)
+            self.driver = None
+        tracer.end_test()
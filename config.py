@@ -0,0 +1,93 @@
+"""Settings shared by the test modules, overridable through environment variables."""
+import os
+import tempfile
+from pathlib import Path
+
+
+def _flag(name, default=False):
+    return os.environ.get(name, "1" if default else "0").lower() in ("1", "true", "yes", "on")
+
+
+def _list(name):
+    return [item.strip() for item in os.environ.get(name, "").split(",") if item.strip()]
+
+
+# Run Firefox without a window; SELENIUM_HEADLESS=0 shows the browser for debugging
+HEADLESS = _flag("SELENIUM_HEADLESS", default=True)
+
+# "normal" waits for the load event on driver.get(), "eager" only for DOMContentLoaded
+PAGE_LOAD_STRATEGY = os.environ.get("SELENIUM_PAGE_LOAD_STRATEGY", "normal")
+
+# Where Firefox saves downloads and where the upload fixtures are written
+DOWNLOAD_DIR = Path(os.environ.get("SELENIUM_DOWNLOAD_DIR",
+                                   Path.home() / "Downloads" / "selenium_tests"))
+
+# Prefix of the WebDriver command trace files; empty disables tracing (see tracing.py)
+TRACE = os.environ.get("SELENIUM_TRACE", "")
+
+# Index of the parallel runner worker this process is, None outside the runner
+WORKER = os.environ.get("SELENIUM_WORKER_INDEX")
+
+# Screenshots and failure artifacts (see artifacts.py)
+ARTIFACTS_DIR = Path(os.environ.get("SELENIUM_ARTIFACTS_DIR", Path(__file__).with_name("artifacts")))
+ARTIFACT_BUDGET_MB = float(os.environ.get("SELENIUM_ARTIFACT_BUDGET_MB", "50"))
+ARTIFACTS_DOM_ON_FAILURE = _flag("SELENIUM_ARTIFACTS_DOM", default=True)
+ARTIFACTS_CONSOLE_ON_FAILURE = _flag("SELENIUM_ARTIFACTS_CONSOLE", default=True)
+
+# Base URL of the practice pages. "local" serves the bundled copies from an in-process
+# fixture server (see fixture_server.py), which lets the suite run offline.
+BASE_URL = os.environ.get("PRACTICE_BASE_URL", "https://www.tutorialspoint.com/selenium/practice")
+
+# Route every browser through the local blocking proxy (see blocking_proxy.py). The lists
+# are comma-separated host patterns like "*.example.com"; DENY extends the built-in list,
+# a non-empty ALLOW blocks every third-party host not on it.
+PROXY = _flag("SELENIUM_PROXY")
+PROXY_DENY = _list("SELENIUM_PROXY_DENY")
+PROXY_ALLOW = _list("SELENIUM_PROXY_ALLOW")
+PROXY_CACHE_DIR = Path(os.environ.get("SELENIUM_PROXY_CACHE_DIR",
+                                      Path(tempfile.gettempdir()) / "selenium-proxy-cache"))
+PROXY_CACHE_TTL = float(os.environ.get("SELENIUM_PROXY_CACHE_TTL", 24 * 3600))
+
+# Wait timeouts from the latency history (see latency.py): p99 * margin, clamped
+ADAPTIVE_TIMEOUTS = _flag("SELENIUM_ADAPTIVE_TIMEOUTS", default=True)
+TIMEOUT_MARGIN = float(os.environ.get("SELENIUM_TIMEOUT_MARGIN", "3"))
+TIMEOUT_MIN = float(os.environ.get("SELENIUM_TIMEOUT_MIN", "1"))
+TIMEOUT_MAX = float(os.environ.get("SELENIUM_TIMEOUT_MAX", "30"))
+LATENCY_HISTORY = Path(os.environ.get("SELENIUM_LATENCY_HISTORY",
+                                      Path(__file__).with_name(".latency_history.json")))
+
+# Browser lifecycle (see lifecycle.py): replace a browser after this many tests or once
+# its process tree uses more memory; 0 disables either limit
+RECYCLE_AFTER_TESTS = int(os.environ.get("SELENIUM_RECYCLE_AFTER", "50"))
+MEMORY_LIMIT_MB = float(os.environ.get("SELENIUM_MEMORY_LIMIT_MB", "1500"))
+LIFECYCLE_SAMPLE_INTERVAL = float(os.environ.get("SELENIUM_LIFECYCLE_SAMPLE_INTERVAL", "0.5"))
+
+# Streaming JSONL events and JUnit XML (see reporting.py); REPORT_ECHO also prints the
+# passed checks to stdout, where they interleave with the test runner's output
+REPORT_DIR = Path(os.environ.get("SELENIUM_REPORT_DIR", Path(__file__).with_name("reports")))
+REPORT_ECHO = _flag("SELENIUM_REPORT_ECHO")
+
+# Passing tests are reused while their code, pages and browser are unchanged (see
+# result_cache.py); SELENIUM_FORCE_RUN=1 runs everything
+RESULT_CACHE = Path(os.environ.get("SELENIUM_RESULT_CACHE", Path(__file__).with_name(".result_cache.json")))
+FORCE_RUN = _flag("SELENIUM_FORCE_RUN")
+
+# Records for the data-driven text-box test (.jsonl or .csv)
+TEXT_BOX_DATA = Path(os.environ.get("TEXT_BOX_DATA",
+                                    Path(__file__).with_name("fixtures") / "text_box_records.jsonl"))
+
+# Sizes for large_file_tests.py, e.g. "256M,1G,4G"
+LARGE_FILE_SIZES = os.environ.get("LARGE_FILE_SIZES", "256M")
+
+
+def page_url(page):
+    """Full URL of a practice page, e.g. page_url("buttons.php")."""
+    base_url = BASE_URL
+    if base_url == "local":
+        import fixture_server
+        base_url = fixture_server.ensure_started()
+    if PROXY:
+        import blocking_proxy
+        blocking_proxy.ensure_started().set_page(page)
+    return f"{base_url.rstrip('/')}/{page}"
+
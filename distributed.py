@@ -0,0 +1,653 @@
+"""Spread the test modules over several hosts: one coordinator, any number of workers.
+
+The coordinator splits the tests into work units (up to --unit-size tests of one class,
+so setUpClass runs once per unit; the longest expected units first) and serves them
+over TCP, one JSON object per line. Workers connect, pull a unit at a time, run it with
+their own headless Firefox and stream back a record per test as soon as it finishes,
+plus every artifact it wrote (stored under artifacts/distributed/<worker>/).
+
+* Work stealing: when the queue is empty, an idle worker takes the second half of the
+  tests the slowest unit has not started yet. The owner is told to skip them; if it
+  started one anyway, the first result wins.
+* Dead workers: a worker whose connection drops, that sends no heartbeat for
+  --heartbeat-timeout seconds, or whose unit neither starts nor finishes a test for
+  --test-timeout seconds (a hung browser does not stop the heartbeat) is dropped. Its unfinished tests go back to the front of
+  the queue, except the test it was running: that one may be what killed the worker
+  and goes to the back in a unit of its own. After MAX_ATTEMPTS lost runs a test is
+  reported as an error. Tests a finished unit sent no result for are requeued the same way.
+
+    python distributed.py coordinator --bind 0.0.0.0 --port 7500
+    python distributed.py worker --connect coordinator-host:7500      # on every host
+    python distributed.py local -n 3     # coordinator plus 3 worker processes on localhost
+
+The merged report goes to distributed_report.json; test durations are shared with
+parallel_runner.py.
+"""
+import argparse
+import base64
+import collections
+import io
+import itertools
+import json
+import os
+import re
+import socket
+import socketserver
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import unittest
+from pathlib import Path
+
+from parallel_runner import (DEFAULT_DURATION, DURATIONS_FILE, TEST_MODULES, _count, _flatten,
+                             _print_summary, _RecordingResult, discover, load_durations,
+                             save_durations, split_cached)
+
+REPORT_FILE = Path(__file__).with_name("distributed_report.json")
+ARTIFACTS_ROOT = Path(__file__).with_name("artifacts") / "distributed"
+DEFAULT_PORT = 7500
+UNIT_SIZE = 4
+MAX_ATTEMPTS = 3
+HEARTBEAT_INTERVAL = 2.0
+HEARTBEAT_TIMEOUT = 30.0
+# Longest a unit may go without starting or finishing a test, setUpClass included
+TEST_TIMEOUT = 600.0
+# How long an idle worker waits before asking again while other units are running
+WAIT_INTERVAL = 0.5
+ARTIFACT_CHUNK = 256 * 1024
+_UNSAFE_NAME = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def make_units(test_ids, durations, unit_size=UNIT_SIZE):
+    """Split the tests into units of up to `unit_size` tests of one class, longest first."""
+    known = [durations[test_id] for test_id in test_ids if test_id in durations]
+    fallback = statistics.median(known) if known else DEFAULT_DURATION
+    by_class = collections.OrderedDict()
+    for test_id in test_ids:
+        by_class.setdefault(test_id.rpartition(".")[0], []).append(test_id)
+    units = []
+    for tests in by_class.values():
+        for start in range(0, len(tests), unit_size):
+            chunk = tests[start:start + unit_size]
+            units.append((sum(durations.get(test_id, fallback) for test_id in chunk), chunk))
+    units.sort(key=lambda unit: unit[0], reverse=True)
+    return [tests for _, tests in units]
+
+
+def _send(sock, lock, message):
+    data = (json.dumps(message) + "\n").encode("utf-8")
+    with lock:
+        sock.sendall(data)
+
+
+class _Unit:
+    def __init__(self, unit_id, tests, attempt=1):
+        self.id = unit_id
+        self.tests = list(tests)
+        self.attempt = attempt
+        self.worker = None
+        self.not_started = list(tests)
+        self.running = None
+        self.started = None
+        self.progress = None
+
+
+class _WorkerConnection:
+    def __init__(self, name, index, sock):
+        self.name = name
+        self.index = index
+        self.sock = sock
+        self.lock = threading.Lock()
+        self.last_seen = time.monotonic()
+        self.units = set()
+        self.lost = False
+
+    def send(self, message):
+        try:
+            _send(self.sock, self.lock, message)
+        except OSError:
+            pass
+
+
+class Coordinator:
+    """Hands out work units, steals from stragglers and requeues the units of lost workers."""
+
+    def __init__(self, units, host="127.0.0.1", port=DEFAULT_PORT, artifacts_root=ARTIFACTS_ROOT,
+                 heartbeat_timeout=HEARTBEAT_TIMEOUT, test_timeout=TEST_TIMEOUT):
+        self.artifacts_root = Path(artifacts_root)
+        self.heartbeat_timeout = heartbeat_timeout
+        self.test_timeout = test_timeout
+        self.records = {}
+        self.stats = {"units": len(units), "stolen": 0, "requeued": 0, "workers_lost": 0}
+        self.lost_workers = []
+        self.artifacts = []
+        self._ids = itertools.count(1)
+        self._pending = collections.deque(_Unit(next(self._ids), tests) for tests in units)
+        self._inflight = {}
+        self._workers = {}
+        self._worker_indexes = itertools.count()
+        self._done = threading.Condition()
+
+        coordinator = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                coordinator._serve(self.connection, self.rfile)
+
+        self.server = socketserver.ThreadingTCPServer((host, port), Handler, bind_and_activate=False)
+        self.server.daemon_threads = True
+        self.server.allow_reuse_address = True
+        self.server.server_bind()
+        self.server.server_activate()
+        self.address = self.server.server_address
+        self._threads = []
+
+    def start(self):
+        for target in (self.server.serve_forever, self._watch_workers):
+            thread = threading.Thread(target=target, daemon=True, name="coordinator")
+            thread.start()
+            self._threads.append(thread)
+        print(f"Coordinator listening on {self.address[0]}:{self.address[1]} "
+              f"with {len(self._pending)} units")
+        return self
+
+    def finished(self):
+        with self._done:
+            return not self._pending and not self._inflight
+
+    def wait(self, timeout=None):
+        with self._done:
+            return self._done.wait_for(lambda: not self._pending and not self._inflight, timeout)
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _serve(self, sock, rfile):
+        worker = None
+        try:
+            for line in rfile:
+                message = json.loads(line)
+                if worker is None:
+                    if message.get("type") != "hello":
+                        return
+                    worker = self._register(message, sock)
+                    continue
+                worker.last_seen = time.monotonic()
+                self._handle(worker, message)
+        except (OSError, ValueError):
+            pass
+        finally:
+            if worker is not None:
+                self._lose(worker, "connection closed")
+
+    def _register(self, message, sock):
+        index = next(self._worker_indexes)
+        # Both come from the peer and end up in a path (see _store_artifact)
+        name = f"{_safe_name(message.get('host'), 'worker')}-{_safe_name(message.get('pid'), str(index))}"
+        worker = _WorkerConnection(name, index, sock)
+        with self._done:
+            self._workers[name] = worker
+        print(f"Worker {name} connected")
+        worker.send({"type": "welcome", "index": index, "name": name})
+        return worker
+
+    def _handle(self, worker, message):
+        kind = message.get("type")
+        if kind == "request":
+            worker.send(self._next_unit(worker))
+        elif kind == "start":
+            with self._done:
+                unit = self._inflight.get(message["unit"])
+                if unit is not None:
+                    if message["test"] in unit.not_started:
+                        unit.not_started.remove(message["test"])
+                    unit.running = message["test"]
+                    unit.progress = time.monotonic()
+        elif kind == "result":
+            record = message["record"]
+            record["worker"] = worker.name
+            with self._done:
+                # A stolen test that its first owner started anyway: the first result wins
+                self.records.setdefault(record["id"], record)
+                unit = self._inflight.get(message["unit"])
+                if unit is not None:
+                    unit.progress = time.monotonic()
+                    if unit.running == record["id"]:
+                        unit.running = None
+        elif kind == "unit_done":
+            with self._done:
+                unit = self._inflight.pop(message["unit"], None)
+                worker.units.discard(message["unit"])
+                missing = [test_id for test_id in unit.tests if test_id not in self.records] if unit else []
+                if missing:
+                    self._requeue_missing(unit, missing, worker)
+                self._done.notify_all()
+            if missing:
+                print(f"Worker {worker.name} finished unit {unit.id} without a result for "
+                      f"{len(missing)} tests")
+        elif kind == "artifact":
+            self._store_artifact(worker, message)
+
+    def _next_unit(self, worker):
+        with self._done:
+            if self._pending:
+                unit = self._pending.popleft()
+            else:
+                unit = self._steal(worker)
+                if unit is None:
+                    return {"type": "wait"} if self._inflight else {"type": "done"}
+            unit.worker = worker.name
+            unit.started = unit.progress = time.monotonic()
+            self._inflight[unit.id] = unit
+            worker.units.add(unit.id)
+        return {"type": "unit", "unit": unit.id, "tests": unit.tests, "attempt": unit.attempt}
+
+    def _steal(self, thief):
+        """A new unit with the back half of the straggler's tests that have not started."""
+        candidates = [unit for unit in self._inflight.values()
+                      if unit.worker != thief.name
+                      and (len(unit.not_started) > 1 or (unit.not_started and unit.running))]
+        if not candidates:
+            return None
+        victim = max(candidates, key=lambda unit: (len(unit.not_started), -unit.started))
+        count = max(1, len(victim.not_started) // 2)
+        stolen = victim.not_started[-count:]
+        del victim.not_started[-count:]
+        victim.tests = [test_id for test_id in victim.tests if test_id not in stolen]
+        self.stats["stolen"] += len(stolen)
+        owner = self._workers.get(victim.worker)
+        if owner is not None:
+            owner.send({"type": "revoke", "unit": victim.id, "tests": stolen})
+        print(f"Worker {thief.name} steals {len(stolen)} tests from {victim.worker}")
+        return _Unit(next(self._ids), stolen, victim.attempt)
+
+    def _lose(self, worker, reason):
+        with self._done:
+            if worker.lost:
+                return
+            worker.lost = True
+            self._workers.pop(worker.name, None)
+            units = [self._inflight.pop(unit_id) for unit_id in worker.units if unit_id in self._inflight]
+            worker.units.clear()
+            if units:
+                self.stats["workers_lost"] += 1
+                self.lost_workers.append(worker.name)
+            for unit in units:
+                remaining = [test_id for test_id in unit.tests if test_id not in self.records]
+                suspects = [unit.running] if unit.running in remaining else []
+                others = [test_id for test_id in remaining if test_id not in suspects]
+                if unit.attempt >= MAX_ATTEMPTS:
+                    self._give_up(remaining, f"Lost {MAX_ATTEMPTS} workers running this test ({reason})",
+                                  worker.name)
+                    continue
+                if others:
+                    self._pending.appendleft(_Unit(next(self._ids), others, unit.attempt + 1))
+                if suspects:
+                    self._pending.append(_Unit(next(self._ids), suspects, unit.attempt + 1))
+                self.stats["requeued"] += len(remaining)
+            self._done.notify_all()
+        if units:
+            print(f"Lost worker {worker.name} ({reason}); requeued its unfinished tests")
+        try:
+            worker.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def _requeue_missing(self, unit, missing, worker):
+        """Tests of a finished unit that sent no result (stolen ones are no longer in unit.tests)."""
+        if unit.attempt >= MAX_ATTEMPTS:
+            self._give_up(missing, f"No result after {MAX_ATTEMPTS} attempts", worker.name)
+            return
+        self._pending.append(_Unit(next(self._ids), missing, unit.attempt + 1))
+        self.stats["requeued"] += len(missing)
+
+    def abandon(self, reason):
+        """Report every test not run yet as an error, e.g. when no worker is left."""
+        with self._done:
+            units = list(self._pending) + list(self._inflight.values())
+            self._pending.clear()
+            self._inflight.clear()
+            for unit in units:
+                self._give_up([test_id for test_id in unit.tests if test_id not in self.records],
+                              reason, unit.worker or "-")
+            self._done.notify_all()
+
+    def _give_up(self, test_ids, reason, worker_name):
+        for test_id in test_ids:
+            self.records[test_id] = {"id": test_id, "outcome": "error", "duration": 0.0, "output": "",
+                                     "details": reason, "worker": worker_name}
+
+    def _watch_workers(self):
+        """Drop workers that went silent, and workers that still talk but make no progress."""
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            now = time.monotonic()
+            with self._done:
+                silent = [worker for worker in self._workers.values()
+                          if now - worker.last_seen > self.heartbeat_timeout]
+                # The heartbeat thread keeps going while a test hangs in the browser
+                stuck = {unit.worker for unit in self._inflight.values()
+                         if now - unit.progress > self.test_timeout}
+                stuck = [self._workers[name] for name in stuck if name in self._workers]
+            for worker in silent:
+                self._lose(worker, f"no heartbeat for {self.heartbeat_timeout:.0f}s")
+            for worker in stuck:
+                self._lose(worker, f"no test started or finished for {self.test_timeout:.0f}s")
+
+    def _store_artifact(self, worker, message):
+        root = self.artifacts_root.resolve()
+        parts = [_safe_name(part, "_") for part in re.split(r"[\\/]+", str(message.get("path", ""))) if part]
+        path = (root / worker.name).joinpath(*parts).resolve()
+        # Sanitized parts cannot climb out; resolve() also catches a symlink that points out
+        if not parts or not path.is_relative_to(root / worker.name):
+            print(f"Worker {worker.name} sent an artifact outside its directory: {message.get('path')!r}")
+            return
+        try:
+            offset = int(message["offset"])
+            if offset < 0:
+                raise ValueError(f"negative offset {offset}")
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "r+b" if offset else "wb") as f:
+                f.seek(offset)
+                f.write(base64.b64decode(message["data"]))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Could not store artifact {message.get('path')!r} of worker {worker.name}: {e}")
+            return
+        if message.get("last"):
+            self.artifacts.append(str(path))
+
+
+def _safe_name(value, fallback):
+    """`value` as a single path component: no separators, no leading dots, never empty."""
+    name = _UNSAFE_NAME.sub("_", str(value) if value is not None else "").lstrip(".")
+    return name or fallback
+
+
+class _UnitSuite(unittest.TestSuite):
+    """The tests of a unit; tests revoked by the coordinator while it runs are left out."""
+
+    _cleanup = False
+
+    def __init__(self, tests, revoked):
+        super().__init__(tests)
+        self.revoked = revoked
+
+    def __iter__(self):
+        return (test for test in super().__iter__() if test.id() not in self.revoked)
+
+
+class _StreamingResult(_RecordingResult):
+    """Sends every finished test to the coordinator right away."""
+
+    def __init__(self, worker, unit_id, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.worker = worker
+        self.unit_id = unit_id
+        self.sent = set()
+
+    def startTest(self, test):
+        self.worker.send({"type": "start", "unit": self.unit_id, "test": test.id()})
+        super().startTest(test)
+
+    def stopTest(self, test):
+        super().stopTest(test)
+        self.send_record(test.id())
+
+    def send_record(self, test_id):
+        self.sent.add(test_id)
+        self.worker.send({"type": "result", "unit": self.unit_id, "record": self.records[test_id]})
+        self.worker.send_artifacts()
+
+
+class Worker:
+    """Pulls units from a coordinator and runs them in this process."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        # Tests revoked from each running unit, by unit id
+        self.revoked = {}
+        self._sock = None
+        self._lock = threading.Lock()
+        self._replies = collections.deque()
+        self._reply_ready = threading.Condition()
+        self._closed = False
+        self._artifacts_sent = 0
+
+    def send(self, message):
+        _send(self._sock, self._lock, message)
+
+    def run(self):
+        self._sock = socket.create_connection((self.host, self.port))
+        self.send({"type": "hello", "host": socket.gethostname(), "pid": os.getpid()})
+        threading.Thread(target=self._read, daemon=True, name="worker-reader").start()
+        welcome = self._reply()
+        if welcome is None:
+            return 1
+        self._configure(welcome["index"])
+        threading.Thread(target=self._heartbeat, daemon=True, name="worker-heartbeat").start()
+        print(f"Connected to {self.host}:{self.port} as {welcome['name']}")
+
+        # Imported only now: reporting reads config, which must see the environment above
+        from reporting import ReportingTestResult
+        resultclass = type("_WorkerResult", (_StreamingResult, ReportingTestResult), {})
+        while True:
+            self.send({"type": "request"})
+            reply = self._reply()
+            if reply is None or reply["type"] == "done":
+                break
+            if reply["type"] == "wait":
+                time.sleep(WAIT_INTERVAL)
+                continue
+            self._run_unit(reply["unit"], reply["tests"], resultclass)
+        self._sock.close()
+        return 0
+
+    def _configure(self, index):
+        os.environ["SELENIUM_HEADLESS"] = "1"
+        os.environ["SELENIUM_WORKER_INDEX"] = str(index)
+        # Never the inherited directory itself: local workers would all download into it
+        inherited = os.environ.get("SELENIUM_DOWNLOAD_DIR")
+        os.environ["SELENIUM_DOWNLOAD_DIR"] = (str(Path(inherited) / f"worker-{index}") if inherited
+                                               else tempfile.mkdtemp(prefix=f"selenium_worker_{index}_"))
+
+    def _run_unit(self, unit_id, test_ids, resultclass):
+        result = None
+        try:
+            suite = _UnitSuite(_flatten(unittest.defaultTestLoader.loadTestsFromNames(test_ids)),
+                               self.revoked.setdefault(unit_id, set()))
+            runner = unittest.TextTestRunner(
+                stream=io.StringIO(), buffer=True,
+                resultclass=lambda *args: resultclass(self, unit_id, *args))
+            result = runner.run(suite)
+            # Errors in setUpClass and friends never reach stopTest
+            for test_id in set(result.records) - result.sent:
+                result.send_record(test_id)
+        except Exception:
+            details = traceback.format_exc()
+            for test_id in test_ids:
+                if result is None or test_id not in result.sent:
+                    self.send({"type": "result", "unit": unit_id,
+                               "record": {"id": test_id, "outcome": "error", "duration": 0.0,
+                                          "output": "", "details": details}})
+        # A test revoked here may come back later in another unit
+        self.revoked.pop(unit_id, None)
+        self.send({"type": "unit_done", "unit": unit_id})
+
+    def send_artifacts(self):
+        import artifacts
+        import config
+        written = artifacts.flush()
+        for path in written[self._artifacts_sent:]:
+            try:
+                relative = Path(path).relative_to(config.ARTIFACTS_DIR)
+                with open(path, "rb") as f:
+                    offset = 0
+                    while True:
+                        data = f.read(ARTIFACT_CHUNK)
+                        last = len(data) < ARTIFACT_CHUNK
+                        self.send({"type": "artifact", "path": str(relative), "offset": offset,
+                                   "data": base64.b64encode(data).decode("ascii"), "last": last})
+                        offset += len(data)
+                        if last:
+                            break
+            except (OSError, ValueError):
+                continue
+        self._artifacts_sent = len(written)
+
+    def _read(self):
+        try:
+            for line in self._sock.makefile("r", encoding="utf-8"):
+                message = json.loads(line)
+                if message.get("type") == "unit":
+                    # Registered before the unit starts, so no revoke for it can get lost
+                    self.revoked.setdefault(message["unit"], set())
+                elif message.get("type") == "revoke":
+                    # Applied right away: the unit checks before each test
+                    revoked = self.revoked.get(message["unit"])
+                    if revoked is not None:
+                        revoked.update(message["tests"])
+                    continue
+                with self._reply_ready:
+                    self._replies.append(message)
+                    self._reply_ready.notify()
+        except (OSError, ValueError):
+            pass
+        with self._reply_ready:
+            self._closed = True
+            self._reply_ready.notify()
+
+    def _reply(self):
+        with self._reply_ready:
+            self._reply_ready.wait_for(lambda: self._replies or self._closed)
+            return self._replies.popleft() if self._replies else None
+
+    def _heartbeat(self):
+        while not self._closed:
+            time.sleep(HEARTBEAT_INTERVAL)
+            try:
+                self.send({"type": "heartbeat"})
+            except OSError:
+                return
+
+
+def run_coordinator(modules, host, port, unit_size=UNIT_SIZE, workers=0,
+                    durations_file=DURATIONS_FILE, report_file=REPORT_FILE,
+                    heartbeat_timeout=HEARTBEAT_TIMEOUT, test_timeout=TEST_TIMEOUT):
+    """Serve the tests of `modules`; with workers > 0 also start that many local workers."""
+    test_ids = discover(modules)
+    to_run, cached = split_cached(modules)
+    durations = load_durations(durations_file)
+    coordinator = Coordinator(make_units(to_run, durations, unit_size), host, port,
+                              heartbeat_timeout=heartbeat_timeout, test_timeout=test_timeout).start()
+    print(f"Running {len(to_run)} tests ({len(cached)} cached)")
+
+    started = time.perf_counter()
+    processes = []
+    try:
+        address = f"{coordinator.address[0]}:{coordinator.address[1]}"
+        # Each lost worker is replaced, up to one replacement per allowed attempt
+        replacements = workers * MAX_ATTEMPTS
+        processes = [_start_local_worker(address) for _ in range(workers)]
+        while not coordinator.wait(timeout=0.5):
+            for index, process in enumerate(processes):
+                if process.poll() is not None and replacements > 0 and not coordinator.finished():
+                    replacements -= 1
+                    processes[index] = _start_local_worker(address)
+            if processes and all(process.poll() is not None for process in processes):
+                coordinator.abandon("All local workers exited")
+        wall_time = time.perf_counter() - started
+    finally:
+        for process in processes:
+            if any(name.endswith(f"-{process.pid}") for name in coordinator.lost_workers):
+                # Dropped while hanging: it will not ask for more work
+                process.kill()
+            try:
+                process.wait(timeout=60)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        coordinator.stop()
+
+    records = cached + list(coordinator.records.values())
+    order = {test_id: index for index, test_id in enumerate(test_ids)}
+    records.sort(key=lambda record: order.get(record["id"], len(order)))
+    for record in records:
+        if record["outcome"] in ("passed", "failed"):
+            durations[record["id"]] = round(record["duration"], 3)
+    save_durations(durations, durations_file)
+
+    report = {
+        "wall_time": round(wall_time, 3),
+        "test_time": round(sum(record["duration"] for record in records), 3),
+        "time_saved": round(sum(record.get("saved", 0.0) for record in records), 3),
+        "workers": sorted({record["worker"] for record in records if record["worker"] != "-"}),
+        "units": coordinator.stats["units"],
+        "stolen": coordinator.stats["stolen"],
+        "requeued": coordinator.stats["requeued"],
+        "workers_lost": coordinator.stats["workers_lost"],
+        "artifacts": coordinator.artifacts,
+        "counts": _count(records),
+        "tests": records,
+    }
+    Path(report_file).write_text(json.dumps(report, indent=2))
+    _print_summary(report)
+    print(f"{report['stolen']} tests stolen from stragglers, {report['requeued']} requeued "
+          f"after {report['workers_lost']} lost workers")
+    return report
+
+
+def _start_local_worker(address):
+    return subprocess.Popen([sys.executable, str(Path(__file__).resolve()), "worker", "--connect", address],
+                            cwd=Path(__file__).parent)
+
+
+def _address(value):
+    host, _, port = value.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("coordinator", "local"):
+        command = commands.add_parser(name)
+        command.add_argument("modules", nargs="*", default=TEST_MODULES, help="test modules to run")
+        command.add_argument("--unit-size", type=int, default=UNIT_SIZE, help="tests per work unit")
+        command.add_argument("--durations", type=Path, default=DURATIONS_FILE,
+                             help="JSON file with test durations from previous runs")
+        command.add_argument("--report", type=Path, default=REPORT_FILE, help="merged JSON report")
+        command.add_argument("--heartbeat-timeout", type=float, default=HEARTBEAT_TIMEOUT)
+        command.add_argument("--test-timeout", type=float, default=TEST_TIMEOUT,
+                             help="drop a worker whose unit starts or finishes no test for this long")
+        command.add_argument("--force", action="store_true", help="run every test, ignoring cached passes")
+        if name == "coordinator":
+            command.add_argument("--bind", default="0.0.0.0")
+            command.add_argument("--port", type=int, default=DEFAULT_PORT)
+        else:
+            command.add_argument("-n", "--workers", type=int, default=os.cpu_count() or 1)
+    worker = commands.add_parser("worker")
+    worker.add_argument("--connect", type=_address, required=True, metavar="HOST:PORT")
+    args = parser.parse_args(argv)
+
+    if args.command == "worker":
+        return Worker(*args.connect).run()
+    if args.force:
+        # Read by config in this process; workers only get the tests to run
+        os.environ["SELENIUM_FORCE_RUN"] = "1"
+    if args.command == "local":
+        host, port, workers = "127.0.0.1", 0, args.workers
+    else:
+        host, port, workers = args.bind, args.port, 0
+    report = run_coordinator(args.modules, host, port, args.unit_size, workers, args.durations,
+                             args.report, args.heartbeat_timeout, args.test_timeout)
+    failed = report["counts"].get("failed", 0) + report["counts"].get("error", 0)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
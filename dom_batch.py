@@ -0,0 +1,91 @@
+"""Read text, attributes and state of many elements in one WebDriver round-trip.
+
+`btn.text` or `element.is_selected()` is one HTTP request per element; `query_all` runs a
+single execute_script that locates the elements and returns everything at once.
+"""
+from typing import NamedTuple
+
+from selenium.webdriver.common.by import By
+
+
+class ElementInfo(NamedTuple):
+    tag: str
+    text: str
+    attributes: dict
+    value: str
+    visible: bool
+    enabled: bool
+    selected: bool
+
+
+_DESCRIBE_JS = """
+function isVisible(el) {
+  if (el.type === 'hidden') return false;
+  var style = window.getComputedStyle(el);
+  if (style.visibility === 'hidden' || style.visibility === 'collapse' || style.opacity === '0') {
+    return false;
+  }
+  return el.getClientRects().length > 0;
+}
+function describe(el) {
+  var attributes = {};
+  for (var i = 0; i < el.attributes.length; i++) {
+    attributes[el.attributes[i].name] = el.attributes[i].value;
+  }
+  var visible = isVisible(el);
+  return [
+    el.tagName.toLowerCase(),
+    // Like WebElement.text: hidden elements have no visible text
+    visible ? (el.innerText || '').trim() : '',
+    attributes,
+    el.value === undefined || el.value === null ? null : String(el.value),
+    visible,
+    !el.disabled,
+    !!(el.checked || el.selected)
+  ];
+}
+"""
+
+_QUERY_JS = _DESCRIBE_JS + """
+var by = arguments[0], value = arguments[1], elements;
+if (by === 'xpath') {
+  var snapshot = document.evaluate(value, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+  elements = [];
+  for (var i = 0; i < snapshot.snapshotLength; i++) elements.push(snapshot.snapshotItem(i));
+} else {
+  var selector = {
+    'id': '[id="' + CSS.escape(value) + '"]',
+    'name': '[name="' + CSS.escape(value) + '"]',
+    'class name': '.' + CSS.escape(value)
+  }[by] || value;  // css selector, tag name
+  elements = Array.prototype.slice.call(document.querySelectorAll(selector));
+}
+return elements.map(describe);
+"""
+
+_DESCRIBE_ELEMENTS_JS = _DESCRIBE_JS + """
+return Array.prototype.map.call(arguments[0], describe);
+"""
+
+_SCRIPT_STRATEGIES = (By.ID, By.NAME, By.CLASS_NAME, By.CSS_SELECTOR, By.TAG_NAME, By.XPATH)
+
+
+def query_all(driver, locator):
+    """Return an ElementInfo for every element matching `locator`, in document order."""
+    by, value = locator
+    if by not in _SCRIPT_STRATEGIES:
+        # Link text and friends have no DOM equivalent; locate normally, read in one go
+        return describe(driver, driver.find_elements(by, value))
+    return [ElementInfo(*row) for row in driver.execute_script(_QUERY_JS, by, value)]
+
+
+def describe(driver, elements):
+    """Return an ElementInfo for each of the already located WebElements."""
+    if not elements:
+        return []
+    return [ElementInfo(*row) for row in driver.execute_script(_DESCRIBE_ELEMENTS_JS, list(elements))]
+
+
+def texts(driver, locator):
+    """Visible text of every element matching `locator`."""
+    return [element.text for element in query_all(driver, locator)]
@@ -0,0 +1,305 @@
+"""Capture the DOM once, then run many assertions on it locally.
+
+`snapshot(driver)` serializes the document in one execute_script call, including the
+computed visibility and form state (value, checked/selected, disabled) of every element.
+The result is parsed into a tree indexed by id, tag and class, so look-ups and
+CSS/XPath queries run in-process without further WebDriver round-trips. A snapshot does
+not follow the page: take a new one after each interaction.
+
+Supported selectors: CSS with tag, #id, .class, [attr], [attr=value], descendant and
+child (>) combinators and comma groups; XPath as far as xml.etree.ElementTree supports
+it (//tag, [@attr='value'], [n], ...).
+"""
+import json
+import re
+import xml.etree.ElementTree as ElementTree
+
+_SERIALIZE_JS = """
+function serialize(el, parentVisible) {
+  var style = window.getComputedStyle(el);
+  var visible = parentVisible && style.display !== 'none' && style.visibility !== 'hidden'
+                && style.visibility !== 'collapse' && el.type !== 'hidden';
+  var attributes = {};
+  for (var i = 0; i < el.attributes.length; i++) {
+    attributes[el.attributes[i].name] = el.attributes[i].value;
+  }
+  var children = [];
+  for (var node = el.firstChild; node; node = node.nextSibling) {
+    if (node.nodeType === Node.TEXT_NODE) {
+      // Whitespace between inline elements still separates their words
+      children.push(node.data.trim() ? node.data : ' ');
+    } else if (node.nodeType === Node.ELEMENT_NODE && ['SCRIPT', 'STYLE', 'NOSCRIPT'].indexOf(node.tagName) === -1) {
+      children.push(serialize(node, visible));
+    }
+  }
+  var state = null;
+  if ('value' in el && ['INPUT', 'TEXTAREA', 'SELECT', 'OPTION', 'BUTTON'].indexOf(el.tagName) !== -1) {
+    state = [String(el.value), !!(el.checked || el.selected), !!el.disabled];
+  }
+  return [el.tagName.toLowerCase(), attributes, visible, children, state, style.display];
+}
+return JSON.stringify([document.title, document.location.href, serialize(document.documentElement, true)]);
+"""
+
+_INLINE_DISPLAYS = ("inline", "inline-block", "contents", "none")
+
+
+class Node:
+    __slots__ = ("tag", "attributes", "visible", "children", "parent", "value", "selected",
+                 "disabled", "display")
+
+    def __init__(self, tag, attributes, visible, state, display, parent):
+        self.tag = tag
+        self.attributes = attributes
+        self.visible = visible
+        self.display = display
+        self.parent = parent
+        self.children = []
+        self.value, self.selected, self.disabled = state if state else (None, False, False)
+
+    @property
+    def id(self):
+        return self.attributes.get("id")
+
+    @property
+    def classes(self):
+        return self.attributes.get("class", "").split()
+
+    @property
+    def enabled(self):
+        return not self.disabled
+
+    def get_attribute(self, name):
+        return self.attributes.get(name)
+
+    @property
+    def elements(self):
+        return [child for child in self.children if isinstance(child, Node)]
+
+    def iter(self):
+        """This node and all element descendants, in document order."""
+        yield self
+        for child in self.elements:
+            yield from child.iter()
+
+    @property
+    def text_content(self):
+        """All text, visible or not (like DOM textContent, whitespace collapsed)."""
+        return _collapse("".join(self._text(visible_only=False)))
+
+    @property
+    def text(self):
+        """Visible text, roughly what WebElement.text returns."""
+        if not self.visible:
+            return ""
+        return "\n".join(_collapse(line) for line in "".join(self._text(visible_only=True)).split("\n")
+                         if line.strip())
+
+    def _text(self, visible_only):
+        for child in self.children:
+            if isinstance(child, str):
+                yield child
+            elif child.tag == "br":
+                # A line break when rendered; textContent has nothing for it
+                if visible_only and child.visible:
+                    yield "\n"
+            elif child.visible or not visible_only:
+                block = child.display not in _INLINE_DISPLAYS
+                if block:
+                    yield "\n"
+                yield from child._text(visible_only)
+                if block:
+                    yield "\n"
+
+    def __repr__(self):
+        id_part = f"#{self.id}" if self.id else ""
+        class_part = "".join(f".{name}" for name in self.classes)
+        return f"<{self.tag}{id_part}{class_part}>"
+
+
+def _collapse(text):
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class DomSnapshot:
+    def __init__(self, title, url, root):
+        self.title = title
+        self.url = url
+        self.root = root
+        self._by_id = {}
+        self._by_tag = {}
+        self._by_class = {}
+        for node in root.iter():
+            if node.id and node.id not in self._by_id:
+                self._by_id[node.id] = node
+            self._by_tag.setdefault(node.tag, []).append(node)
+            for name in node.classes:
+                self._by_class.setdefault(name, []).append(node)
+        self._etree = None
+
+    @classmethod
+    def from_json(cls, payload):
+        title, url, root = json.loads(payload)
+        return cls(title, url, _build(root, None))
+
+    def by_id(self, element_id):
+        return self._by_id.get(element_id)
+
+    def by_tag(self, tag):
+        return list(self._by_tag.get(tag.lower(), []))
+
+    def by_class(self, name):
+        return list(self._by_class.get(name, []))
+
+    def select(self, selector):
+        """All nodes matching a CSS selector, in document order."""
+        matches = set()
+        for group in selector.split(","):
+            steps = _parse_css(group.strip())
+            matches.update(id(node) for node in self._candidates(steps[-1][1])
+                           if _matches_path(node, steps))
+        return [node for node in self.root.iter() if id(node) in matches]
+
+    def select_one(self, selector):
+        found = self.select(selector)
+        return found[0] if found else None
+
+    def xpath(self, expression):
+        """All nodes matching an (ElementTree-supported) XPath expression."""
+        tree, nodes = self._element_tree()
+        if expression.startswith("/"):
+            expression = "." + expression
+        return [nodes[element] for element in tree.iterfind(expression) if element in nodes]
+
+    def text_of(self, selector):
+        """Visible text of the first match of a CSS selector, '' if nothing matches."""
+        node = self.select_one(selector)
+        return node.text if node else ""
+
+    def _candidates(self, compound):
+        if compound.get("id"):
+            node = self._by_id.get(compound["id"])
+            return [node] if node else []
+        if compound.get("classes"):
+            return self._by_class.get(compound["classes"][0], [])
+        if compound.get("tag"):
+            return self._by_tag.get(compound["tag"], [])
+        return list(self.root.iter())
+
+    def _element_tree(self):
+        if self._etree is None:
+            nodes = {}
+            # A wrapper element makes "./html" and ".//x" behave like "/html" and "//x"
+            document = ElementTree.Element("#document")
+            _to_element(self.root, document, nodes)
+            self._etree = (document, nodes)
+        return self._etree
+
+
+def _build(data, parent):
+    tag, attributes, visible, children, state, display = data
+    node = Node(tag, attributes, visible, state, display, parent)
+    for child in children:
+        node.children.append(child if isinstance(child, str) else _build(child, node))
+    return node
+
+
+def _to_element(node, parent_element, nodes):
+    element = ElementTree.SubElement(parent_element, node.tag, node.attributes)
+    nodes[element] = node
+    previous = None
+    for child in node.children:
+        if isinstance(child, str):
+            if previous is None:
+                element.text = (element.text or "") + child
+            else:
+                previous.tail = (previous.tail or "") + child
+        else:
+            previous = _to_element(child, element, nodes)
+    return element
+
+
+_CSS_TOKEN = re.compile(r"""
+    (?P<tag>^[a-zA-Z][\w-]*|^\*)
+  | \#(?P<id>[\w-]+)
+  | \.(?P<cls>[\w-]+)
+  | \[\s*(?P<attr>[\w-]+)\s*(?:(?P<op>[~^$*]?=)\s*(?P<quote>['"]?)(?P<value>.*?)(?P=quote))?\s*\]
+""", re.VERBOSE)
+
+
+def _parse_css(selector):
+    """Parse 'div.a > p#b' into [(None, {...div.a}), ('>', {...p#b})]."""
+    steps = []
+    combinator = None
+    for part in re.split(r"\s*(>)\s*|\s+", selector):
+        if not part:
+            continue
+        if part == ">":
+            combinator = ">"
+            continue
+        compound = {"tag": None, "id": None, "classes": [], "attributes": []}
+        position = 0
+        while position < len(part):
+            match = _CSS_TOKEN.match(part, position)
+            if not match or match.end() == position:
+                raise ValueError(f"Unsupported CSS selector: {selector!r}")
+            if match.group("tag") and match.group("tag") != "*":
+                compound["tag"] = match.group("tag").lower()
+            elif match.group("id"):
+                compound["id"] = match.group("id")
+            elif match.group("cls"):
+                compound["classes"].append(match.group("cls"))
+            elif match.group("attr"):
+                compound["attributes"].append((match.group("attr"), match.group("op"), match.group("value")))
+            position = match.end()
+        steps.append((combinator, compound))
+        combinator = " "
+    if not steps:
+        raise ValueError(f"Empty CSS selector: {selector!r}")
+    return steps
+
+
+def _matches_compound(node, compound):
+    if compound["tag"] and node.tag != compound["tag"]:
+        return False
+    if compound["id"] and node.id != compound["id"]:
+        return False
+    if any(name not in node.classes for name in compound["classes"]):
+        return False
+    for name, op, expected in compound["attributes"]:
+        actual = node.attributes.get(name)
+        if actual is None:
+            return False
+        if op == "=" and actual != expected:
+            return False
+        if op == "~=" and expected not in actual.split():
+            return False
+        if op == "^=" and not actual.startswith(expected):
+            return False
+        if op == "$=" and not actual.endswith(expected):
+            return False
+        if op == "*=" and expected not in actual:
+            return False
+    return True
+
+
+def _matches_path(node, steps):
+    """Match the last step on `node`, then walk up the ancestors for the earlier steps."""
+    combinator, compound = steps[-1]
+    if not _matches_compound(node, compound):
+        return False
+    if len(steps) == 1:
+        return True
+    if combinator == ">":
+        return node.parent is not None and _matches_path(node.parent, steps[:-1])
+    ancestor = node.parent
+    while ancestor is not None:
+        if _matches_path(ancestor, steps[:-1]):
+            return True
+        ancestor = ancestor.parent
+    return False
+
+
+def snapshot(driver):
+    """Serialize the current page in one WebDriver call and index it locally."""
+    return DomSnapshot.from_json(driver.execute_script(_SERIALIZE_JS))
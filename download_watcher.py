@@ -0,0 +1,250 @@
+"""Resolve downloads the moment the browser moves the finished file into place.
+
+On Linux the watcher listens to inotify events for the download directory; elsewhere,
+or when no inotify instance is available, it falls back to polling the directory. Firefox writes into `<name>.part` (next to an empty
+placeholder `<name>`) and renames the part file when it is done, so partial and
+temporary files are ignored and only the final rename counts.
+"""
+import ctypes
+import ctypes.util
+import hashlib
+import os
+import select
+import struct
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from pathlib import Path
+from typing import NamedTuple
+
+TEMP_SUFFIXES = (".part", ".tmp", ".crdownload", ".download")
+DEFAULT_TIMEOUT = 30
+CHUNK_SIZE = 1024 * 1024
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class DownloadedFile(NamedTuple):
+    path: Path
+    size: int
+    sha256: str
+
+
+def is_temporary(name):
+    """True for partial downloads and hidden/lock files that are not a finished download."""
+    return name.startswith(".") or name.endswith(TEMP_SUFFIXES)
+
+
+def sha256_of(path, chunk_size=CHUNK_SIZE):
+    """Hash a file in fixed-size chunks so large downloads never sit in memory."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PendingDownload:
+    """A download the test is waiting for; resolves to a DownloadedFile."""
+
+    def __init__(self, match, timeout):
+        self.match = match
+        self.timeout = timeout
+        self._future = Future()
+
+    def done(self):
+        return self._future.done()
+
+    def result(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return self._future.result(timeout=timeout)
+        except FutureTimeoutError:
+            raise TimeoutError(f"No download finished within {timeout}s") from None
+
+
+class DownloadWatcher:
+    """Watch a download directory and hand finished files to waiting tests.
+
+    Call `expect()` *before* clicking the download link, then `result()` on what it
+    returns. Several downloads may be expected at the same time. With checksum=False
+    the SHA-256 is skipped (for callers that verify large files themselves).
+    """
+
+    def __init__(self, directory, timeout=DEFAULT_TIMEOUT, poll_interval=0.1, checksum=True):
+        self.directory = Path(directory)
+        self.checksum = checksum
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._pending = []
+        self._unclaimed = []
+        self._reported = {}
+        self._hashers = ThreadPoolExecutor(max_workers=4, thread_name_prefix="download-hash")
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # The watch is set up here rather than in the thread: it is in place before start()
+        # returns, so no early download is missed, and a failure cannot leave it waiting
+        fd = self._open_inotify() if _inotify_available() else None
+        if fd is not None:
+            target, args = self._watch_inotify, (fd,)
+        else:
+            target, args = self._watch_polling, (_sizes(self.directory),)
+        self._thread = threading.Thread(target=target, args=args, daemon=True, name="download-watcher")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._hashers.shutdown(wait=True)
+
+    def expect(self, match=None, timeout=None):
+        """Register interest in the next finished download (optionally: whose name matches)."""
+        pending = PendingDownload(match, self.timeout if timeout is None else timeout)
+        with self._lock:
+            for future in self._unclaimed:
+                if future.done() and _matches(match, future.result().path.name):
+                    self._unclaimed.remove(future)
+                    _chain(future, pending._future)
+                    return pending
+            self._pending.append(pending)
+        return pending
+
+    def _finished(self, path):
+        if is_temporary(path.name):
+            return
+        try:
+            stat = path.stat()
+        except OSError:
+            return
+        signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if self._reported.get(path.name) == signature:
+            return
+        self._reported[path.name] = signature
+        future = self._hashers.submit(self._describe, path)
+        with self._lock:
+            for pending in self._pending:
+                if _matches(pending.match, path.name):
+                    self._pending.remove(pending)
+                    _chain(future, pending._future)
+                    return
+            self._unclaimed.append(future)
+
+    def _describe(self, path):
+        return DownloadedFile(path, path.stat().st_size, sha256_of(path) if self.checksum else None)
+
+    def _open_inotify(self):
+        """An inotify descriptor watching the directory, or None to fall back to polling.
+
+        inotify_init1 fails with EMFILE once the per-user instance limit is reached, which
+        parallel workers with several watchers each can run into.
+        """
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            error = os.strerror(ctypes.get_errno())
+        elif libc.inotify_add_watch(fd, os.fsencode(self.directory), _IN_CLOSE_WRITE | _IN_MOVED_TO) < 0:
+            error = os.strerror(ctypes.get_errno())
+            os.close(fd)
+        else:
+            return fd
+        print(f"Cannot watch {self.directory} with inotify ({error}); polling it instead")
+        return None
+
+    def _watch_inotify(self, fd):
+        try:
+            while not self._stop.is_set():
+                readable, _, _ = select.select([fd], [], [], self.poll_interval)
+                if not readable:
+                    continue
+                try:
+                    buffer = os.read(fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                for mask, name in _parse_events(buffer):
+                    path = self.directory / name
+                    # Firefox closes an empty placeholder under the final name before the
+                    # .part file is renamed over it; only a rename or a non-empty write is final
+                    if mask & _IN_MOVED_TO or (mask & _IN_CLOSE_WRITE and _size(path) > 0
+                                               and not _has_partial(path)):
+                        self._finished(path)
+        finally:
+            os.close(fd)
+
+    def _watch_polling(self, seen):
+        candidates = {}
+        while not self._stop.wait(self.poll_interval):
+            names = _sizes(self.directory)
+            for name, size in names.items():
+                if seen.get(name) == size or is_temporary(name):
+                    continue
+                partial = any(other.startswith(name) and is_temporary(other) for other in names)
+                # Report once the size stayed the same over two polls and no .part is left
+                if not partial and size > 0 and candidates.get(name) == size:
+                    seen[name] = size
+                    candidates.pop(name)
+                    self._finished(self.directory / name)
+                else:
+                    candidates[name] = size
+
+
+def _matches(match, name):
+    return match is None or (match(name) if callable(match) else match == name)
+
+
+def _chain(source, target):
+    def copy(done):
+        if done.exception() is not None:
+            target.set_exception(done.exception())
+        else:
+            target.set_result(done.result())
+    source.add_done_callback(copy)
+
+
+def _has_partial(path):
+    return any(path.with_name(path.name + suffix).exists() for suffix in TEMP_SUFFIXES)
+
+
+def _sizes(directory):
+    return {entry.name: _size(entry) for entry in os.scandir(directory)}
+
+
+def _size(path):
+    try:
+        return path.stat().st_size
+    except OSError:
+        return -1
+
+
+def _parse_events(buffer):
+    offset = 0
+    while offset < len(buffer):
+        _, mask, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+        offset += _EVENT_HEADER.size
+        name = buffer[offset:offset + length].rstrip(b"\0")
+        offset += length
+        if name:
+            yield mask, os.fsdecode(name)
+
+
+def _inotify_available():
+    if not sys.platform.startswith("linux"):
+        return False
+    libc_name = ctypes.util.find_library("c")
+    return libc_name is not None and hasattr(ctypes.CDLL(libc_name), "inotify_init1")
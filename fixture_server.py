@@ -0,0 +1,240 @@
+"""Local stand-in for the tutorialspoint practice pages.
+
+Serves the copies in fixtures/practice under /selenium/practice/ (same paths as the live
+site) plus the sample file behind the download button. Responses are kept in memory
+and sent with Cache-Control/ETag headers, so a browser revalidates with a cheap 304.
+For benchmarks and large-file tests it also streams generated files of any size
+(generated/<bytes>.bin?kind=zero|random&seed=N, see large_files.py) and accepts uploads
+(POST upload), replying with the number of bytes received and their SHA-256.
+
+    python fixture_server.py --port 8000
+    PRACTICE_BASE_URL=http://127.0.0.1:8000/selenium/practice python -m unittest buttons_tests
+
+Setting PRACTICE_BASE_URL=local starts the server inside the test process instead.
+"""
+import argparse
+import hashlib
+import json
+import mimetypes
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import large_files
+
+FIXTURES_DIR = Path(__file__).with_name("fixtures") / "practice"
+URL_PREFIX = "/selenium/practice/"
+DOWNLOAD_PATH = URL_PREFIX + "jpeg/sampleFile.jpeg"
+# Generated files of any size for throughput benchmarks: /selenium/practice/generated/<bytes>.bin
+GENERATED_PREFIX = URL_PREFIX + "generated/"
+UPLOAD_PATH = URL_PREFIX + "upload"
+MAX_AGE = 3600
+READ_CHUNK = 1024 * 1024
+
+# Posts the file selected in a file input to the upload endpoint (execute_async_script)
+UPLOAD_JS = """
+var input = arguments[0], url = arguments[1], done = arguments[arguments.length - 1];
+fetch(url, {method: 'POST', body: input.files[0]})
+  .then(function (response) { return response.json(); })
+  .then(done)
+  .catch(function (error) { done({error: String(error)}); });
+"""
+
+
+def sample_jpeg(size=4096):
+    """Deterministic bytes with a JPEG header, served by the download button."""
+    header = b"\xff\xd8\xff\xe0\x00\x10JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00"
+    body = bytes(i % 251 for i in range(size - len(header) - 2))
+    return header + body + b"\xff\xd9"
+
+
+class _CachedResponse:
+    def __init__(self, body, content_type, headers=()):
+        self.body = body
+        self.content_type = content_type
+        self.etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        self.last_modified = formatdate(usegmt=True)
+        self.headers = list(headers)
+
+
+class ResponseCache:
+    """Loads each fixture once and keeps the bytes and validators in memory."""
+
+    def __init__(self, root=FIXTURES_DIR):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._responses = {}
+
+    def get(self, path):
+        with self._lock:
+            if path not in self._responses:
+                response = self._load(path)
+                if response is None:
+                    return None
+                self._responses[path] = response
+            return self._responses[path]
+
+    def _load(self, path):
+        if path == DOWNLOAD_PATH:
+            return _CachedResponse(sample_jpeg(), "image/jpeg",
+                                   [("Content-Disposition", 'attachment; filename="sampleFile.jpeg"')])
+        if not path.startswith(URL_PREFIX):
+            return None
+        file_path = (self.root / path[len(URL_PREFIX):]).resolve()
+        if self.root.resolve() not in file_path.parents or not file_path.is_file():
+            return None
+        if file_path.suffix == ".php":
+            content_type = "text/html; charset=utf-8"
+        else:
+            content_type = mimetypes.guess_type(file_path.name)[0] or "application/octet-stream"
+        return _CachedResponse(file_path.read_bytes(), content_type)
+
+
+class FixtureRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    cache = None
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path.startswith(GENERATED_PREFIX) and path.endswith(".bin"):
+            self._stream_generated(path)
+        else:
+            self._respond(send_body=True)
+
+    def do_POST(self):
+        if urlsplit(self.path).path != UPLOAD_PATH:
+            self.send_error(404)
+            return
+        # Hash and drop the upload in chunks, so any size fits in memory
+        remaining = int(self.headers.get("Content-Length", 0))
+        received = 0
+        digest = hashlib.sha256()
+        while remaining:
+            chunk = self.rfile.read(min(remaining, READ_CHUNK))
+            if not chunk:
+                break
+            digest.update(chunk)
+            received += len(chunk)
+            remaining -= len(chunk)
+        body = json.dumps({"received": received, "sha256": digest.hexdigest()}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def _respond(self, send_body):
+        # Query strings (e.g. the submitted text-box form) do not change the page
+        response = self.cache.get(urlsplit(self.path).path)
+        if response is None:
+            self.send_error(404)
+            return
+
+        if self.headers.get("If-None-Match") == response.etag:
+            self.send_response(304)
+            self._send_cache_headers(response)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", response.content_type)
+        self.send_header("Content-Length", str(len(response.body)))
+        self._send_cache_headers(response)
+        for name, value in response.headers:
+            self.send_header(name, value)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(response.body)
+
+    def _stream_generated(self, path):
+        query = parse_qs(urlsplit(self.path).query)
+        try:
+            size = int(path[len(GENERATED_PREFIX):-len(".bin")])
+            # Checks kind and size now, before the 200 and Content-Length go out
+            chunks = large_files.iter_chunks(size, query.get("kind", ["zero"])[0],
+                                             int(query.get("seed", ["0"])[0]))
+        except ValueError:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(size))
+        self.send_header("Content-Disposition", f'attachment; filename="generated-{size}.bin"')
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        for chunk in chunks:
+            self.wfile.write(chunk)
+
+    def _send_cache_headers(self, response):
+        self.send_header("Cache-Control", f"public, max-age={MAX_AGE}")
+        self.send_header("ETag", response.etag)
+        self.send_header("Last-Modified", response.last_modified)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """Runs the stand-in server on a background thread."""
+
+    def __init__(self, host="127.0.0.1", port=0, root=FIXTURES_DIR):
+        handler = type("Handler", (FixtureRequestHandler,), {"cache": ResponseCache(root)})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{URL_PREFIX.rstrip('/')}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True,
+                                        name="fixture-server")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def ensure_started():
+    """Start the in-process server once and return its base URL."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = FixtureServer().start()
+        return _server.base_url
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the practice pages locally")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+
+    server = FixtureServer(args.host, args.port)
+    print(f"Serving practice pages at {server.base_url}/")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
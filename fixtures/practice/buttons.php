@@ -0,0 +1,41 @@
+<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Selenium Practice - Buttons</title>
+<link rel="stylesheet" href="practice.css">
+</head>
+<body>
+<div class="container">
+  <div class="row">
+    <div class="col-md-8 col-lg-8 col-xl-8">
+      <h1>Buttons</h1>
+      <form>
+        <div class="mb-3">
+          <button type="button" class="btn btn-primary" onclick="showClick()">Click Me</button>
+          <div id="welcomeDiv" class="answer_list"></div>
+        </div>
+        <div class="mb-3">
+          <button type="button" class="btn btn-primary" oncontextmenu="showRightClick(); return false;">Right Click Me</button>
+        </div>
+        <div class="mb-3">
+          <button type="button" class="btn btn-primary" ondblclick="showDoubleClick()">Double Click Me</button>
+          <div id="doublec" class="answer_list"></div>
+        </div>
+      </form>
+    </div>
+  </div>
+</div>
+<script>
+function showClick() {
+  document.getElementById('welcomeDiv').textContent = 'You have done a dynamic click';
+}
+function showRightClick() {
+  document.getElementById('doublec').textContent = 'You have done a right click';
+}
+function showDoubleClick() {
+  document.getElementById('doublec').textContent = 'You have Double clicked';
+}
+</script>
+</body>
+</html>
@@ -0,0 +1,46 @@
+<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Selenium Practice - Radio Button</title>
+<link rel="stylesheet" href="practice.css">
+</head>
+<body>
+<div class="container">
+  <div class="row">
+    <div class="col-md-8 col-lg-8 col-xl-8">
+      <h1>Radio Button</h1>
+      <form>
+        <div class="form-label">Do you like the site?</div>
+        <div class="form-check">
+          <input class="form-check-input" type="radio" name="tab" value="igottwo" id="yes" onclick="show1()">
+          <label class="form-check-label" for="yes">Yes</label>
+        </div>
+        <div class="form-check">
+          <input class="form-check-input" type="radio" name="tab" value="igotthree" id="impressive" onclick="show2()">
+          <label class="form-check-label" for="impressive">Impressive</label>
+        </div>
+        <div class="form-check">
+          <input class="form-check-input" type="radio" name="tab" value="igotfour" id="no" disabled>
+          <label class="form-check-label" for="no">No</label>
+        </div>
+        <div class="form-check">
+          <div id="check" class="answer_list"></div>
+          <div id="check1" class="answer_list"></div>
+        </div>
+      </form>
+    </div>
+  </div>
+</div>
+<script>
+function show1() {
+  document.getElementById('check1').textContent = '';
+  document.getElementById('check').textContent = 'You have checked Yes';
+}
+function show2() {
+  document.getElementById('check').textContent = '';
+  document.getElementById('check1').textContent = 'You have checked Impressive';
+}
+</script>
+</body>
+</html>
@@ -0,0 +1,36 @@
+<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Selenium Practice - Text Box</title>
+<link rel="stylesheet" href="practice.css">
+</head>
+<body>
+<div class="container">
+  <div class="row">
+    <div class="col-md-8 col-lg-8 col-xl-8">
+      <h1>Text Box</h1>
+      <form id="practiceForm" action="text-box.php" method="get">
+        <div class="form-group">
+          <label for="fullname" class="form-label">Full Name:</label>
+          <input type="text" class="form-control" id="fullname" name="fullname" placeholder="Full Name">
+        </div>
+        <div class="form-group">
+          <label for="email" class="form-label">Email:</label>
+          <input type="email" class="form-control" id="email" name="email" placeholder="name@example.com">
+        </div>
+        <div class="form-group">
+          <label for="address" class="form-label">Address:</label>
+          <textarea class="form-control" id="address" name="address" rows="3"></textarea>
+        </div>
+        <div class="form-group">
+          <label for="password" class="form-label">Password:</label>
+          <input type="password" class="form-control" id="password" name="password">
+        </div>
+        <input type="submit" class="btn btn-primary" value="Submit">
+      </form>
+    </div>
+  </div>
+</div>
+</body>
+</html>
@@ -0,0 +1,34 @@
+<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Selenium Practice - Upload and Download</title>
+<link rel="stylesheet" href="practice.css">
+</head>
+<body>
+<div class="container">
+  <div class="row">
+    <div class="col-md-8 col-lg-8 col-xl-8">
+      <h1>Upload and Download</h1>
+      <div class="mb-3">
+        <a id="downloadButton" class="btn btn-primary" href="jpeg/sampleFile.jpeg" download>Download</a>
+      </div>
+      <form id="uploadForm" enctype="multipart/form-data">
+        <div class="form-file">
+          <input type="file" class="form-file-input" id="uploadFile" name="uploadFile">
+          <label class="form-file-label" for="uploadFile">Select a file</label>
+        </div>
+        <div id="uploadedFilePath"></div>
+      </form>
+    </div>
+  </div>
+</div>
+<script>
+document.getElementById('uploadFile').addEventListener('change', function () {
+  var name = this.files.length ? this.files[0].name : 'Select a file';
+  document.querySelector('label.form-file-label').textContent = name;
+  document.getElementById('uploadedFilePath').textContent = this.files.length ? name : '';
+});
+</script>
+</body>
+</html>
@@ -0,0 +1,163 @@
+"""Data-driven form filling.
+
+Records are streamed lazily from CSV or JSONL files. For each record a single
+execute_script resets the form, sets every field, fires input/change events and reads
+the values and validity back, so one record costs one WebDriver round-trip instead of
+a page reload plus clear()/send_keys() per field. Fields that need real key events can
+still be typed with send_keys. Failing records are collected, not raised, so a run of
+thousands of records finishes and reports all of them.
+"""
+import csv
+import json
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.by import By
+
+import reporting
+from retries import navigate
+
+# Record keys that describe the expectation rather than a form field
+EXPECT_VALID = "expect_valid"
+
+_FILL_JS = """
+var values = arguments[0], typed = arguments[1];
+var ids = Object.keys(values).concat(typed);
+var form = document.getElementById(ids[0]).form;
+if (form) form.reset();
+var result = {};
+ids.forEach(function (id) {
+  var field = document.getElementById(id);
+  if (!field) { result[id] = {missing: true}; return; }
+  if (id in values) {
+    field.value = values[id];
+    field.dispatchEvent(new Event('input', {bubbles: true}));
+    field.dispatchEvent(new Event('change', {bubbles: true}));
+  }
+  result[id] = {value: field.value, valid: field.checkValidity(), message: field.validationMessage};
+});
+return result;
+"""
+
+_READ_JS = """
+var result = {};
+arguments[0].forEach(function (id) {
+  var field = document.getElementById(id);
+  result[id] = field ? {value: field.value, valid: field.checkValidity(), message: field.validationMessage}
+                     : {missing: true};
+});
+return result;
+"""
+
+
+def read_records(path):
+    """Yield records (dicts) from a .csv or .jsonl file one at a time."""
+    path = Path(path)
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.suffix == ".csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class RecordResult(NamedTuple):
+    index: int
+    record: dict
+    problems: list
+    seconds: float
+
+    @property
+    def ok(self):
+        return not self.problems
+
+
+class DataRunReport:
+    def __init__(self):
+        self.total = 0
+        self.failures = []
+        self.elapsed = 0.0
+
+    def add(self, result):
+        self.total += 1
+        if not result.ok:
+            self.failures.append(result)
+
+    @property
+    def records_per_second(self):
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        lines = [f"{self.total} records in {self.elapsed:.2f}s ({self.records_per_second:.1f} records/s), "
+                 f"{len(self.failures)} failed"]
+        for failure in self.failures:
+            lines.append(f"  record {failure.index}: {'; '.join(failure.problems)}")
+        return "\n".join(lines)
+
+
+class FormFiller:
+    """Fills the form containing `fields` (element ids) with one record at a time.
+
+    `typed` lists the fields that need real key events; they are typed with send_keys
+    after the scripted fields are set.
+    """
+
+    def __init__(self, driver, fields, typed=()):
+        self.driver = driver
+        self.fields = list(fields)
+        self.typed = list(typed)
+
+    def fill(self, record):
+        """Fill one record and return the list of problems found (empty when fine)."""
+        values = {field: str(record.get(field, "")) for field in self.fields if field not in self.typed}
+        state = self.driver.execute_script(_FILL_JS, values, self.typed)
+        if self.typed:
+            for field in self.typed:
+                self.driver.find_element(By.ID, field).send_keys(str(record.get(field, "")))
+            state.update(self.driver.execute_script(_READ_JS, self.typed))
+        return self._check(record, state)
+
+    def _check(self, record, state):
+        problems = []
+        expect_valid = str(record.get(EXPECT_VALID, "true")).lower() not in ("false", "0", "no")
+        all_valid = True
+        for field in self.fields:
+            field_state = state[field]
+            if field_state.get("missing"):
+                problems.append(f"{field}: field not found")
+                continue
+            expected = str(record.get(field, ""))
+            if field_state["valid"] and field_state["value"] != expected:
+                problems.append(f"{field}: expected {expected!r}, got {field_state['value']!r}")
+            all_valid = all_valid and field_state["valid"]
+            if expect_valid and not field_state["valid"]:
+                problems.append(f"{field}: invalid ({field_state['message']})")
+        if not expect_valid and all_valid:
+            problems.append("expected the form to be invalid, but every field passed validation")
+        return problems
+
+    def run(self, records, reload_url=None):
+        """Fill every record; a failing record is reported and the run continues.
+
+        If the browser throws (e.g. the page navigated away), the page is reloaded from
+        `reload_url` and the run goes on with the next record.
+        """
+        report = DataRunReport()
+        started = time.perf_counter()
+        for index, record in enumerate(records):
+            record_started = time.perf_counter()
+            try:
+                problems = self.fill(record)
+            except WebDriverException as e:
+                problems = [f"{type(e).__name__}: {e.msg}"]
+                if reload_url:
+                    navigate(self.driver, reload_url)
+            seconds = time.perf_counter() - record_started
+            report.add(RecordResult(index, record, problems, seconds))
+            reporting.reporter.step(f"record {index}", "failed" if problems else "passed", seconds,
+                                    problems=problems)
+        report.elapsed = time.perf_counter() - started
+        return report
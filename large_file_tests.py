@@ -0,0 +1,94 @@
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+
+import config
+import lifecycle
+from browser_factory import start_firefox
+from download_watcher import DownloadWatcher
+from fixture_server import UPLOAD_JS, FixtureServer
+from latency import AdaptiveWait
+from large_files import LargeFile, ThroughputLog, format_size, parse_size, verify
+from pages import UploadDownloadPage
+from reporting import TestRunner, check
+
+
+class TestLargeFileTransfers(unittest.TestCase):
+    """Upload and download files of hundreds of MB to several GB through the local fixture server.
+
+    Neither side holds a file in memory: fixtures are generated lazily with a known digest,
+    the server hashes uploads while reading them and downloads are verified with mmap.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.sizes = [parse_size(size) for size in config.LARGE_FILE_SIZES.split(",")]
+        cls.work_dir = Path(tempfile.mkdtemp(prefix="selenium_large_"))
+        cls.download_dir = cls.work_dir / "downloads"
+
+        # The live site cannot serve files like these, so always use the local server
+        cls.server = FixtureServer().start()
+        cls.driver = start_firefox(download_dir=cls.download_dir, lazy=True)
+        cls.downloads = DownloadWatcher(cls.download_dir, timeout=600, checksum=False)
+        cls.downloads.start()
+        cls.throughput = ThroughputLog()
+
+        cls.driver.set_script_timeout(600)
+        cls.wait = AdaptiveWait(cls.driver)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.downloads.stop()
+        lifecycle.manager.quit(cls.driver)
+        cls.server.stop()
+        shutil.rmtree(cls.work_dir, ignore_errors=True)
+        print("\n" + cls.throughput.report())
+
+    def test_upload_large_files(self):
+        """Upload each size and compare the digest the server computed"""
+        for seed, size in enumerate(self.sizes):
+            with self.subTest(size=format_size(size)):
+                large_file = LargeFile(size, "random", seed, directory=self.work_dir)
+                self.driver.get(f"{self.server.base_url}/upload-download.php")
+                upload_input = self.wait.until(
+                    EC.presence_of_element_located(UploadDownloadPage.upload_input.locator)
+                )
+                upload_input.send_keys(str(large_file.path))
+
+                started = time.perf_counter()
+                reply = self.driver.execute_async_script(UPLOAD_JS, upload_input,
+                                                         f"{self.server.base_url}/upload")
+                self.throughput.add("upload", size, time.perf_counter() - started)
+
+                self.assertEqual(reply.get("received"), size, f"Upload failed: {reply}")
+                self.assertEqual(reply["sha256"], large_file.digest, "Uploaded content differs")
+                check(f"Uploaded {format_size(size)}")
+                large_file.remove()
+
+    def test_download_large_files(self):
+        """Download each size and verify it against the precomputed digest"""
+        self.driver.get(f"{self.server.base_url}/upload-download.php")
+        for seed, size in enumerate(self.sizes):
+            with self.subTest(size=format_size(size)):
+                large_file = LargeFile(size, "random", seed)
+                download = self.downloads.expect()
+
+                started = time.perf_counter()
+                self.driver.execute_script(
+                    "var link = document.createElement('a'); link.href = arguments[0];"
+                    "link.download = ''; document.body.appendChild(link); link.click(); link.remove();",
+                    f"{self.server.base_url}/generated/{size}.bin?kind=random&seed={seed}")
+                downloaded_file = download.result()
+                self.throughput.add("download", size, time.perf_counter() - started)
+
+                verify(downloaded_file.path, large_file)
+                check(f"Downloaded {format_size(size)}")
+                downloaded_file.path.unlink()
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2, testRunner=TestRunner)
@@ -0,0 +1,186 @@
+"""Large upload/download fixtures that never have to fit in memory.
+
+A LargeFile is described by (size, kind, seed). Its content is generated chunk by chunk:
+"zero" files are all zero bytes and are created sparse (no disk blocks), "random" files
+are deterministic pseudo-random data. The SHA-256 is computed by streaming the
+generator, without writing or keeping the data, and cached between runs. Downloaded
+files are verified with a memory-mapped streaming hash.
+"""
+import hashlib
+import json
+import mmap
+import os
+import random
+import re
+import struct
+import tempfile
+import threading
+from pathlib import Path
+
+CHUNK_SIZE = 1024 * 1024
+KINDS = ("zero", "random")
+DIGEST_CACHE = Path(tempfile.gettempdir()) / "selenium_large_file_digests.json"
+
+_digest_lock = threading.Lock()
+_base_blocks = {}
+
+
+def parse_size(text):
+    """'512K', '100M', '4G' or plain bytes -> bytes."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*", text, re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid size: {text!r}")
+    number, unit = match.groups()
+    return int(float(number) * 1024 ** " KMGT".index(unit.upper() or " "))
+
+
+def format_size(size):
+    for unit, factor in (("GB", 1024 ** 3), ("MB", 1024 ** 2), ("KB", 1024)):
+        if size >= factor:
+            return f"{size / factor:g}{unit}"
+    return f"{size}B"
+
+
+def iter_chunks(size, kind="zero", seed=0, chunk_size=CHUNK_SIZE):
+    """Yield the content of the file in chunks of at most `chunk_size` bytes.
+
+    An unknown kind or a negative size raises ValueError here, not on the first chunk,
+    so a server can still answer with an error instead of a truncated body.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown kind {kind!r}; use 'zero' or 'random'")
+    if size < 0:
+        raise ValueError(f"Negative size {size}")
+    return _generate_chunks(size, kind, seed, chunk_size)
+
+
+def _generate_chunks(size, kind, seed, chunk_size):
+    if kind == "zero":
+        zeros = bytes(chunk_size)
+        for offset in range(0, size, chunk_size):
+            yield zeros[:min(chunk_size, size - offset)]
+    else:
+        # One random block per seed; every chunk gets its own index stamped in front so
+        # no two chunks are equal. Much faster than generating fresh random bytes.
+        base = _base_blocks.get((seed, chunk_size))
+        if base is None:
+            base = _base_blocks[(seed, chunk_size)] = random.Random(seed).randbytes(chunk_size)
+        for index, offset in enumerate(range(0, size, chunk_size)):
+            chunk = struct.pack("<QQ", seed, index) + base[16:]
+            yield chunk[:min(chunk_size, size - offset)]
+
+
+class LargeFile:
+    def __init__(self, size, kind="zero", seed=0, directory=None):
+        self.size = size
+        self.kind = kind
+        self.seed = seed
+        self.directory = Path(directory or tempfile.gettempdir())
+        self._path = None
+        self._digest = None
+
+    @property
+    def name(self):
+        return f"large-{self.kind}-{self.seed}-{self.size}.bin"
+
+    @property
+    def digest(self):
+        """SHA-256 of the content, computed from the generator (and cached on disk)."""
+        if self._digest is None:
+            key = f"{self.kind}:{self.seed}:{self.size}"
+            with _digest_lock:
+                cache = _load_digest_cache()
+                if key not in cache:
+                    digest = hashlib.sha256()
+                    for chunk in iter_chunks(self.size, self.kind, self.seed):
+                        digest.update(chunk)
+                    cache[key] = digest.hexdigest()
+                    _save_digest_cache(cache)
+                self._digest = cache[key]
+        return self._digest
+
+    @property
+    def path(self):
+        """The file on disk, created on first access."""
+        if self._path is None:
+            path = self.directory / self.name
+            if not path.exists() or path.stat().st_size != self.size:
+                self._write(path)
+            self._path = path
+        return self._path
+
+    def _write(self, path):
+        partial = path.with_name(path.name + ".tmp")
+        with open(partial, "wb") as f:
+            if self.kind == "zero":
+                # Sparse: the file system stores no blocks for the holes
+                f.truncate(self.size)
+            else:
+                for chunk in iter_chunks(self.size, self.kind, self.seed):
+                    f.write(chunk)
+        os.replace(partial, path)
+
+    def remove(self):
+        if self._path is not None and self._path.exists():
+            self._path.unlink()
+        self._path = None
+
+
+def _load_digest_cache():
+    try:
+        return json.loads(DIGEST_CACHE.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_digest_cache(cache):
+    try:
+        DIGEST_CACHE.write_text(json.dumps(cache, indent=1, sort_keys=True))
+    except OSError:
+        pass
+
+
+def hash_file(path, chunk_size=CHUNK_SIZE):
+    """SHA-256 of a file through a memory map, fed to the hash in `chunk_size` slices."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return digest.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                for offset in range(0, len(mapped), chunk_size):
+                    digest.update(view[offset:offset + chunk_size])
+                    if hasattr(mmap, "MADV_DONTNEED") and offset >= chunk_size:
+                        # Let the kernel drop pages we are done with
+                        mapped.madvise(mmap.MADV_DONTNEED, offset - chunk_size, chunk_size)
+            finally:
+                view.release()
+    return digest.hexdigest()
+
+
+def verify(path, large_file):
+    """Raise AssertionError unless `path` has exactly the content of `large_file`."""
+    size = Path(path).stat().st_size
+    if size != large_file.size:
+        raise AssertionError(f"{path}: expected {large_file.size} bytes, got {size}")
+    actual = hash_file(path)
+    if actual != large_file.digest:
+        raise AssertionError(f"{path}: SHA-256 {actual} does not match expected {large_file.digest}")
+
+
+class ThroughputLog:
+    """Bytes and seconds per (direction, size class); prints MB/s."""
+
+    def __init__(self):
+        self.entries = []
+
+    def add(self, direction, size, seconds):
+        self.entries.append((direction, size, seconds))
+
+    def report(self):
+        lines = []
+        for direction, size, seconds in self.entries:
+            rate = size / 1e6 / seconds if seconds else float("inf")
+            lines.append(f"{direction:8} {format_size(size):>7}: {seconds:7.2f}s  {rate:8.1f} MB/s")
+        return "\n".join(lines)
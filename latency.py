@@ -0,0 +1,150 @@
+"""Wait timeouts derived from how long each step took in earlier runs.
+
+Every wait and navigation records its duration under a key: the kind of step, its
+locator or page, and the site, e.g. "wait_for_result:id=welcomeDiv@local". The site
+is the host of the URL being loaded, or for a wait the host of the page the browser is
+on. It keeps runs against the local fixture server (any server on the loopback
+interface) from shortening the timeouts of runs against the live pages. The last HISTORY_SIZE
+samples per key are kept in .latency_history.json. Once a key has MIN_SAMPLES samples
+its timeout is p99 * SELENIUM_TIMEOUT_MARGIN, clamped to [SELENIUM_TIMEOUT_MIN,
+SELENIUM_TIMEOUT_MAX], and WebDriverWait polls at a fraction of the median. Until then
+the fixed default applies. A timed-out wait is recorded with the timeout it had, so a
+step that got slower raises its own timeout over the next runs instead of failing
+forever.
+"""
+import atexit
+import json
+import os
+import statistics
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+import config
+
+DEFAULT_TIMEOUT = 10
+HISTORY_SIZE = 200
+MIN_SAMPLES = 20
+MIN_POLL = 0.05
+MAX_POLL = 0.5
+_LOOPBACK_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+
+class LatencyHistory:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.samples = _load(self.path)
+        self.new_samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, key, seconds):
+        with self._lock:
+            for samples in (self.samples.setdefault(key, []), self.new_samples.setdefault(key, [])):
+                samples.append(round(seconds, 4))
+                del samples[:-HISTORY_SIZE]
+
+    def percentile(self, key, fraction):
+        with self._lock:
+            samples = sorted(self.samples.get(key, ()))
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+    def timeout_for(self, key, timeout=None, default=DEFAULT_TIMEOUT):
+        """An explicit `timeout` wins; otherwise p99 * margin once there is enough history."""
+        if timeout is not None:
+            return timeout
+        p99 = self.percentile(key, 0.99) if config.ADAPTIVE_TIMEOUTS else None
+        if p99 is None:
+            return default
+        return min(config.TIMEOUT_MAX, max(config.TIMEOUT_MIN, p99 * config.TIMEOUT_MARGIN))
+
+    def poll_interval_for(self, key, default=0.5):
+        median = self.percentile(key, 0.5) if config.ADAPTIVE_TIMEOUTS else None
+        if median is None:
+            return default
+        return min(MAX_POLL, max(MIN_POLL, median / 4))
+
+    def save(self):
+        """Merge this process's samples into the file; parallel workers share it."""
+        if not self.new_samples:
+            return
+        with self._lock:
+            merged = _load(self.path)
+            for key, samples in self.new_samples.items():
+                merged[key] = (merged.get(key, []) + samples)[-HISTORY_SIZE:]
+            self.new_samples = {}
+        partial = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        try:
+            partial.write_text(json.dumps(merged, indent=1, sort_keys=True))
+            os.replace(partial, self.path)
+        except OSError:
+            pass
+
+
+def _load(path):
+    try:
+        return json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+history = LatencyHistory(config.LATENCY_HISTORY)
+atexit.register(history.save)
+
+
+def site_key(key, url):
+    """`key` for the site of `url`, e.g. "navigate:/buttons.php@local"."""
+    if url == "local":
+        return f"{key}@local"
+    parts = urlsplit(url)
+    # The fixture servers get a new port every run; about:blank and data: URLs have no host
+    site = "local" if parts.hostname in _LOOPBACK_HOSTS else parts.netloc or parts.scheme
+    return f"{key}@{site}"
+
+
+def page_key(driver, key):
+    """`key` for the site of the page `driver` is on, so a wait never trains another site."""
+    return site_key(key, driver.current_url)
+
+
+def locator_key(locator):
+    if locator is None:
+        return "document"
+    by, value = locator
+    return f"{by}={value}"
+
+
+def condition_key(method):
+    """Key of an expected condition: its name plus the locator it was built with."""
+    name = getattr(method, "__qualname__", type(method).__name__).split(".<locals>")[0]
+    for cell in getattr(method, "__closure__", None) or ():
+        value = cell.cell_contents
+        if isinstance(value, tuple) and len(value) == 2 and all(isinstance(v, str) for v in value):
+            return f"{name}:{locator_key(value)}"
+    return name
+
+
+class AdaptiveWait(WebDriverWait):
+    """WebDriverWait whose timeout and polling interval come from the latency history."""
+
+    def __init__(self, driver, default_timeout=DEFAULT_TIMEOUT):
+        super().__init__(driver, default_timeout)
+        self.default_timeout = default_timeout
+
+    def until(self, method, message="", key=None):
+        key = page_key(self._driver, key or condition_key(method))
+        self._timeout = history.timeout_for(key, default=self.default_timeout)
+        self._poll = history.poll_interval_for(key)
+        started = time.perf_counter()
+        try:
+            result = super().until(method, message)
+        except TimeoutException:
+            history.record(key, self._timeout)
+            raise
+        history.record(key, time.perf_counter() - started)
+        return result
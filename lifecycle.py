@@ -0,0 +1,313 @@
+"""Owns the browser processes of every session the suite starts.
+
+The browser factory registers each new driver here. A background thread samples the
+process tree of every session (geckodriver, Firefox and its content processes) for RSS
+and CPU time. Test cases report when a test starts and ends on a driver, so each test
+gets its peak memory and CPU time. The pool asks `should_recycle` before reusing a
+browser: after SELENIUM_RECYCLE_AFTER tests or above SELENIUM_MEMORY_LIMIT_MB it is
+replaced by a fresh one. `quit` kills whatever part of the tree outlives
+driver.quit(), and at exit every session still open is quit and every leftover
+process killed. A per-test report goes to lifecycle_report.json.
+
+Uses psutil when it is installed and reads /proc otherwise.
+"""
+import atexit
+import json
+import os
+import signal
+import threading
+import time
+from pathlib import Path
+
+from selenium.common.exceptions import WebDriverException
+
+import config
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+REPORT_FILE = Path(__file__).with_name("lifecycle_report.json")
+QUIT_GRACE = 3.0
+MB = 1024 * 1024
+
+
+class ProcessInfo:
+    __slots__ = ("pid", "ppid", "name", "started", "rss", "cpu")
+
+    def __init__(self, pid, ppid, name, started, rss, cpu):
+        self.pid = pid
+        self.ppid = ppid
+        self.name = name
+        self.started = started
+        self.rss = rss
+        self.cpu = cpu
+
+
+def _psutil_table():
+    table = {}
+    for process in psutil.process_iter(["pid", "ppid", "name", "status", "create_time",
+                                        "memory_info", "cpu_times"]):
+        info = process.info
+        if (info["status"] == psutil.STATUS_ZOMBIE or info["memory_info"] is None
+                or info["cpu_times"] is None):
+            continue
+        table[info["pid"]] = ProcessInfo(info["pid"], info["ppid"], info["name"], info["create_time"],
+                                         info["memory_info"].rss,
+                                         info["cpu_times"].user + info["cpu_times"].system)
+    return table
+
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def _proc_table():
+    table = {}
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry.name}/stat") as f:
+                stat = f.read()
+        except OSError:
+            # Exited while we were looking
+            continue
+        # The command name may contain spaces and parentheses; the fields follow the last ')'
+        name = stat[stat.index("(") + 1:stat.rindex(")")]
+        fields = stat[stat.rindex(")") + 2:].split()
+        if fields[0] == "Z":
+            # Exited, only waiting for its parent to reap it
+            continue
+        table[int(entry.name)] = ProcessInfo(
+            int(entry.name), int(fields[1]), name, int(fields[19]),
+            int(fields[21]) * _PAGE_SIZE, (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS)
+    return table
+
+
+def process_table():
+    """pid -> ProcessInfo for every process we can see."""
+    return _psutil_table() if psutil is not None else _proc_table()
+
+
+def _descendants(table, root_pid):
+    children = {}
+    for info in table.values():
+        children.setdefault(info.ppid, []).append(info.pid)
+    found, pending = [], [root_pid]
+    while pending:
+        pid = pending.pop()
+        if pid in table:
+            found.append(table[pid])
+            pending.extend(children.get(pid, ()))
+    return found
+
+
+class Session:
+    def __init__(self, driver, root_pid):
+        self.driver = driver
+        self.root_pid = root_pid
+        self.processes = {}
+        self.tests = 0
+        self.rss = 0
+        self.peak_rss = 0
+        self.cpu = 0.0
+        self.closed = False
+        self.test_id = None
+        self.test_started = 0.0
+        self.test_cpu_start = 0.0
+        self.test_peak_rss = 0
+
+    def update(self, table):
+        tree = _descendants(table, self.root_pid) if self.root_pid else []
+        for info in tree:
+            self.processes[info.pid] = info.started
+        self.rss = sum(info.rss for info in tree)
+        self.cpu = sum(info.cpu for info in tree)
+        self.peak_rss = max(self.peak_rss, self.rss)
+        if self.test_id is not None:
+            self.test_peak_rss = max(self.test_peak_rss, self.rss)
+
+
+class LifecycleManager:
+    def __init__(self, sample_interval=None):
+        self.sample_interval = sample_interval or config.LIFECYCLE_SAMPLE_INTERVAL
+        self.sessions = {}
+        self.tests = []
+        self.recycled = 0
+        self.killed = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(self, driver):
+        """Track a newly started driver and the process tree under its geckodriver."""
+        process = getattr(getattr(driver, "service", None), "process", None)
+        session = Session(driver, getattr(process, "pid", None))
+        with self._lock:
+            self.sessions[_key(driver)] = session
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._sample_loop, daemon=True,
+                                                name="browser-lifecycle")
+                self._thread.start()
+        self._sample([session])
+        return driver
+
+    def begin_test(self, driver, test_id):
+        session = self._session(driver)
+        if session is None:
+            return
+        self._sample([session])
+        session.test_id = test_id
+        session.test_started = time.perf_counter()
+        session.test_cpu_start = session.cpu
+        session.test_peak_rss = session.rss
+
+    def end_test(self, driver):
+        session = self._session(driver)
+        if session is None or session.test_id is None:
+            return
+        self._sample([session])
+        with self._lock:
+            self.tests.append({
+                "test": session.test_id,
+                "session": session.root_pid,
+                "peak_rss_mb": round(session.test_peak_rss / MB, 1),
+                "cpu_seconds": round(session.cpu - session.test_cpu_start, 3),
+                "seconds": round(time.perf_counter() - session.test_started, 3),
+            })
+        session.test_id = None
+        session.tests += 1
+
+    def should_recycle(self, driver):
+        """Why the browser is due for replacement (it ran its share of tests or grew past
+        the memory limit), or None."""
+        session = self._session(driver)
+        if session is None:
+            return None
+        if config.RECYCLE_AFTER_TESTS and session.tests >= config.RECYCLE_AFTER_TESTS:
+            return f"{session.tests} tests"
+        if config.MEMORY_LIMIT_MB and session.rss > config.MEMORY_LIMIT_MB * MB:
+            return f"{session.rss / MB:.0f} MB RSS"
+        return None
+
+    def recycle(self, driver, reason):
+        """Quit a browser that is due for replacement."""
+        session = self._session(driver)
+        print(f"Recycling browser (pid {getattr(session, 'root_pid', None)}) after {reason}")
+        with self._lock:
+            self.recycled += 1
+        self.quit(driver)
+
+    def quit(self, driver):
+        """driver.quit(), then kill whatever part of its process tree is still running."""
+        session = self._session(driver)
+        if session is not None and not session.closed:
+            # Learn the content processes before the tree falls apart
+            self._sample([session])
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
+        if session is None:
+            return
+        session.closed = True
+        self._reap(session.processes, time.monotonic() + QUIT_GRACE)
+
+    def shutdown(self):
+        """Quit every session still open and kill all leftover processes."""
+        self._stop.set()
+        with self._lock:
+            sessions = list(self.sessions.values())
+        table = process_table()
+        for session in sessions:
+            if session.closed:
+                continue
+            if session.root_pid and session.processes.get(session.root_pid) != getattr(
+                    table.get(session.root_pid), "started", None):
+                # Quit directly with driver.quit(); only stragglers are left to kill
+                session.closed = True
+                continue
+            self.quit(session.driver)
+        leftovers = {}
+        for session in sessions:
+            leftovers.update(session.processes)
+        self._reap(leftovers, time.monotonic())
+        self._write_report()
+
+    def report(self):
+        with self._lock:
+            return {
+                "tests": list(self.tests),
+                "sessions": [{"pid": session.root_pid, "tests": session.tests,
+                              "peak_rss_mb": round(session.peak_rss / MB, 1),
+                              "cpu_seconds": round(session.cpu, 3)}
+                             for session in self.sessions.values()],
+                "recycled": self.recycled,
+                "killed": list(self.killed),
+            }
+
+    def _session(self, driver):
+        with self._lock:
+            return self.sessions.get(_key(driver))
+
+    def _sample(self, sessions=None):
+        try:
+            table = process_table()
+        except OSError:
+            return
+        with self._lock:
+            sessions = sessions or [session for session in self.sessions.values() if not session.closed]
+        for session in sessions:
+            session.update(table)
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.sample_interval):
+            self._sample()
+
+    def _reap(self, processes, deadline):
+        """Wait until `deadline` for the processes to exit, then kill the survivors."""
+        while True:
+            table = process_table()
+            # A pid only counts as ours while its start time matches; pids get reused
+            alive = [table[pid] for pid, started in processes.items()
+                     if pid in table and table[pid].started == started and pid != os.getpid()]
+            if not alive or time.monotonic() >= deadline:
+                break
+            time.sleep(0.1)
+        for info in alive:
+            try:
+                os.kill(info.pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+            except OSError:
+                continue
+            with self._lock:
+                self.killed.append({"pid": info.pid, "name": info.name})
+            print(f"Killed leaked browser process {info.pid} ({info.name})")
+
+    def _write_report(self):
+        report = self.report()
+        if not report["tests"] and not report["killed"]:
+            return
+        path = REPORT_FILE
+        if config.WORKER is not None:
+            # Parallel runner workers each write their own report
+            path = path.with_name(f"{path.stem}-worker-{config.WORKER}{path.suffix}")
+        try:
+            path.write_text(json.dumps(report, indent=2))
+        except OSError:
+            pass
+        if report["tests"]:
+            print(f"\nPeak browser memory per test ({path}):")
+            for test in sorted(report["tests"], key=lambda t: t["peak_rss_mb"], reverse=True):
+                print(f"    {test['peak_rss_mb']:8.1f} MB  {test['cpu_seconds']:7.2f}s CPU  {test['test']}")
+        print(f"Browsers recycled: {report['recycled']}, leaked processes killed: {len(report['killed'])}")
+
+
+def _key(driver):
+    # A LazyDriver and the driver it wraps are the same session
+    return id(getattr(driver, "wrapped", driver))
+
+
+manager = LifecycleManager()
+atexit.register(manager.shutdown)
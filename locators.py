@@ -0,0 +1,190 @@
+"""Rewrite simple XPath locators to ID or CSS selectors that find the same elements.
+
+Firefox answers an ID or CSS lookup from its selector engine; an XPath is evaluated by
+walking the document. `compile_locator` turns XPaths built only from these parts into
+CSS, and leaves every other locator unchanged:
+
+* steps with a tag name or `*`, joined by `//` (descendant) or `/` (child), starting
+  with `//`,
+* predicates `@attr='v'`, `@attr`, `contains(@attr, 'v')`, `starts-with(@attr, 'v')`,
+  combined with `and` or as several `[...]`,
+* a position `[n]` as the first predicate of a step (`:nth-of-type(n)`).
+
+    //input[@id='fullname']        ->  css  input#fullname
+    //*[@id='check']               ->  id   check
+    //div[@class='a b']//div[5]    ->  css  div[class="a b"] div:nth-of-type(5)
+    //button[normalize-space()='Click Me']   (text predicate: stays XPath)
+
+`python locators.py XPATH...` shows what an XPath compiles to.
+"""
+import re
+import sys
+from functools import lru_cache
+
+from selenium.webdriver.common.by import By
+
+_NAME = r"[A-Za-z_][\w-]*"
+_STRING = r"""(?:'([^']*)'|"([^"]*)")"""
+_STEP = re.compile(rf"(\*|{_NAME})((?:\[.*\])?)$")
+_ATTRIBUTE_EQUALS = re.compile(rf"\s*@({_NAME})\s*=\s*{_STRING}\s*")
+_ATTRIBUTE_FUNCTION = re.compile(rf"\s*(contains|starts-with)\(\s*@({_NAME})\s*,\s*{_STRING}\s*\)\s*")
+_ATTRIBUTE_PRESENT = re.compile(rf"\s*@({_NAME})\s*")
+_POSITION = re.compile(r"\s*([1-9]\d*)\s*")
+_AND = re.compile(r"\s*and\s+")
+_ID_SELECTOR = re.compile(r"#(-?[A-Za-z_][\w-]*)$")
+_IDENTIFIER = re.compile(r"-?[A-Za-z_][\w-]*$")
+
+_FUNCTION_OPERATORS = {"contains": "*=", "starts-with": "^="}
+
+
+@lru_cache(maxsize=None)
+def compile_locator(locator):
+    """The fastest equivalent of a (by, value) locator; the locator itself if there is none."""
+    by, value = locator
+    if by != By.XPATH:
+        return locator
+    steps = _split_steps(value.strip())
+    if steps is None:
+        return locator
+    selectors = []
+    for axis, step in steps:
+        selector = _compile_step(step)
+        if selector is None:
+            return locator
+        selectors.append(selector if not selectors else f"{'' if axis == '//' else '> '}{selector}")
+    id_selector = _ID_SELECTOR.match(selectors[0])
+    if len(steps) == 1 and id_selector:
+        # //*[@id='x'] is exactly document.getElementById
+        return By.ID, id_selector.group(1)
+    return By.CSS_SELECTOR, " ".join(selectors)
+
+
+def _split_steps(path):
+    """[(axis, step), ...] for a path starting with //, or None."""
+    if not path.startswith("//"):
+        return None
+    steps, current, axis, depth, quote = [], "", "//", 0, None
+    index = 2
+    while index < len(path):
+        char = path[index]
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char == "[":
+            depth += 1
+        elif char == "]":
+            depth -= 1
+        elif char == "/" and depth == 0:
+            if not current:
+                return None
+            steps.append((axis, current))
+            axis = "//" if path.startswith("//", index) else "/"
+            index += len(axis)
+            current = ""
+            continue
+        current += char
+        index += 1
+    if not current or depth or quote:
+        return None
+    steps.append((axis, current))
+    return steps
+
+
+def _compile_step(step):
+    match = _STEP.match(step)
+    if match is None:
+        return None
+    tag, predicates = match.groups()
+    predicates = _split_predicates(predicates)
+    if predicates is None:
+        return None
+    selector = "" if tag == "*" else tag.lower()
+    for index, predicate in enumerate(predicates):
+        position = _POSITION.fullmatch(predicate)
+        if position:
+            if index:
+                # [@a='x'][2] is the second match, not the second sibling
+                return None
+            pseudo = "nth-child" if tag == "*" else "nth-of-type"
+            selector += f":{pseudo}({position.group(1)})"
+            continue
+        conditions = _compile_conditions(predicate)
+        if conditions is None:
+            return None
+        selector += conditions
+    return selector or "*"
+
+
+def _split_predicates(text):
+    predicates, current, depth, quote = [], "", 0, None
+    for char in text:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char == "[":
+            depth += 1
+            if depth == 1:
+                continue
+        elif char == "]":
+            depth -= 1
+            if depth == 0:
+                predicates.append(current)
+                current = ""
+                continue
+        if depth == 0:
+            return None
+        current += char
+    return predicates if depth == 0 else None
+
+
+def _compile_conditions(predicate):
+    """`@a='x' and contains(@b, 'y')` as `[a="x"][b*="y"]`, or None."""
+    selector, position = "", 0
+    while True:
+        match = _ATTRIBUTE_EQUALS.match(predicate, position)
+        if match:
+            name, value = match.group(1), _string(match, 2)
+            if name == "id" and _IDENTIFIER.match(value):
+                selector += f"#{value}"
+            else:
+                selector += f'[{name}="{_css_string(value)}"]'
+        else:
+            match = _ATTRIBUTE_FUNCTION.match(predicate, position)
+            if match:
+                function, name, value = match.group(1), match.group(2), _string(match, 3)
+                if not value:
+                    # contains(@a, '') matches every element that has @a
+                    selector += f"[{name}]"
+                else:
+                    selector += f'[{name}{_FUNCTION_OPERATORS[function]}"{_css_string(value)}"]'
+            else:
+                match = _ATTRIBUTE_PRESENT.match(predicate, position)
+                if match is None:
+                    return None
+                selector += f"[{match.group(1)}]"
+        position = match.end()
+        if position == len(predicate):
+            return selector
+        separator = _AND.match(predicate, position)
+        if separator is None:
+            return None
+        position = separator.end()
+
+
+def _string(match, group):
+    value = match.group(group)
+    return value if value is not None else match.group(group + 1)
+
+
+def _css_string(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\a ")
+
+
+if __name__ == "__main__":
+    for xpath in sys.argv[1:]:
+        by, value = compile_locator((By.XPATH, xpath))
+        print(f"{xpath}\n    -> {by}: {value}")
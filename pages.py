@@ -0,0 +1,169 @@
+"""Page objects for the practice pages, with element handles cached per page load.
+
+Each page declares its elements once as `Element` locators, compiled to ID or CSS
+where possible (see locators.py). `page.click_me` finds the element on first use and
+then returns the cached handle without another round-trip. The cache belongs to the
+driver and is emptied whenever it navigates (get, back, forward, refresh, window or
+frame switch). A handle that went stale anyway (the page replaced the element or a
+click navigated) is found again and the command retried. The class attribute
+(`ButtonsPage.click_result.locator`) is the compiled locator, for waits and query_all.
+"""
+from selenium.common.exceptions import StaleElementReferenceException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webelement import WebElement
+
+import config
+from locators import compile_locator
+from retries import navigate
+from waits import (CLICK_RESULT, DOUBLE_CLICK_RESULT, RADIO_IMPRESSIVE_RESULT, RADIO_RESULT,
+                   wait_for_page_ready)
+
+# Commands after which no element found before can be used
+NAVIGATION_COMMANDS = {
+    Command.GET, Command.GO_BACK, Command.GO_FORWARD, Command.REFRESH, Command.CLOSE,
+    Command.NEW_WINDOW, Command.SWITCH_TO_WINDOW, Command.SWITCH_TO_FRAME,
+    Command.SWITCH_TO_PARENT_FRAME,
+}
+
+
+def element_cache(driver):
+    """The element cache of a driver; installs the navigation hook that empties it."""
+    driver = getattr(driver, "wrapped", driver)
+    cache = getattr(driver, "_page_elements", None)
+    if cache is None:
+        cache = driver._page_elements = {}
+        execute = driver.execute
+
+        def invalidating_execute(driver_command, params=None):
+            if driver_command in NAVIGATION_COMMANDS:
+                cache.clear()
+            return execute(driver_command, params)
+
+        driver.execute = invalidating_execute
+    return cache
+
+
+class CachedElement(WebElement):
+    """A WebElement that finds itself again when it went stale."""
+
+    def __init__(self, driver, locator):
+        self.locator = locator
+        super().__init__(driver, driver.find_element(*locator).id)
+
+    def _execute(self, command, params=None):
+        try:
+            return super()._execute(command, params)
+        except StaleElementReferenceException:
+            self._id = self._parent.find_element(*self.locator).id
+            return super()._execute(command, params)
+
+
+class Element:
+    """An element of a page object, declared by its (by, value) locator."""
+
+    def __init__(self, by, value):
+        self.source = (by, value)
+        self.locator = compile_locator((by, value))
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, page, owner=None):
+        if page is None:
+            return self
+        cache = element_cache(page.driver)
+        element = cache.get(self.locator)
+        if element is None:
+            element = cache[self.locator] = CachedElement(getattr(page.driver, "wrapped", page.driver),
+                                                          self.locator)
+        return element
+
+    def __repr__(self):
+        return f"Element{self.locator}"
+
+
+class Page:
+    """A practice page; `path` is relative to config.BASE_URL."""
+
+    path = None
+    title = None
+    # Selectors of the elements that change when the user interacts (see scenarios.py)
+    state = []
+
+    def __init__(self, driver):
+        self.driver = driver
+        element_cache(driver)
+
+    @property
+    def url(self):
+        return config.page_url(self.path)
+
+    def open(self):
+        navigate(self.driver, self.url)
+        wait_for_page_ready(self.driver)
+        return self
+
+    @classmethod
+    def elements(cls):
+        return {name: value for klass in reversed(cls.__mro__) for name, value in vars(klass).items()
+                if isinstance(value, Element)}
+
+
+class TextBoxPage(Page):
+    path = "text-box.php"
+    full_name = Element(By.XPATH, "//input[@id='fullname']")
+    email = Element(By.XPATH, "//input[@id='email']")
+    address = Element(By.ID, "address")
+    password = Element(By.ID, "password")
+    submit = Element(By.XPATH, "//input[@value='Submit']")
+
+    def fill(self, full_name, email, address, password):
+        for element, value in ((self.full_name, full_name), (self.email, email),
+                               (self.address, address), (self.password, password)):
+            element.clear()
+            element.send_keys(value)
+
+
+class ButtonsPage(Page):
+    path = "buttons.php"
+    title = "Selenium Practice - Buttons"
+    state = ["#welcomeDiv", "#doublec"]
+    click_me = Element(By.XPATH, "//button[normalize-space()='Click Me']")
+    right_click_me = Element(By.XPATH, "//button[contains(text(), 'Right Click Me')]")
+    double_click_me = Element(By.XPATH, "//button[contains(text(), 'Double Click Me')]")
+    click_result = Element(*CLICK_RESULT)
+    double_click_result = Element(*DOUBLE_CLICK_RESULT)
+
+
+class RadioButtonPage(Page):
+    path = "radio-button.php"
+    state = ["#check", "#check1"]
+    yes = Element(By.XPATH, "//input[@value='igottwo']")
+    impressive = Element(By.XPATH, "//input[@value='igotthree']")
+    no = Element(By.XPATH, "//input[@value='igotfour']")
+    # The container of the No option
+    no_option = Element(By.XPATH, "//div[@class='col-md-8 col-lg-8 col-xl-8']//div[5]")
+    result = Element(*RADIO_RESULT)
+    impressive_result = Element(*RADIO_IMPRESSIVE_RESULT)
+
+
+class UploadDownloadPage(Page):
+    path = "upload-download.php"
+    state = ["#uploadedFilePath", "label.form-file-label"]
+    download_button = Element(By.ID, "downloadButton")
+    upload_input = Element(By.ID, "uploadFile")
+    upload_label = Element(By.CSS_SELECTOR, "label.form-file-label")
+    uploaded_file_path = Element(By.ID, "uploadedFilePath")
+
+
+PAGES = {page.path: page for page in (TextBoxPage, ButtonsPage, RadioButtonPage, UploadDownloadPage)}
+
+
+if __name__ == "__main__":
+    for page in PAGES.values():
+        print(page.path)
+        for name, element in page.elements().items():
+            by, value = element.locator
+            note = "" if element.locator == element.source else f"   (from {element.source[1]})"
+            print(f"    {name:20} {by}: {value}{note}")
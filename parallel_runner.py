@@ -0,0 +1,263 @@
+"""Run the test modules sharded across a pool of worker processes.
+
+Every worker gets its own headless Firefox and its own download directory. Shards are
+balanced with the test durations recorded by previous runs (longest tests first, each
+one to the currently lightest shard), and the results are merged into one report.
+Tests with a cached pass (see result_cache.py) are not run; --force runs them anyway.
+
+    python parallel_runner.py -n 4
+    python parallel_runner.py -n 2 buttons_tests radio_buttons_tests
+"""
+import argparse
+import atexit
+import io
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+import traceback
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+TEST_MODULES = ["buttons_tests", "textbox_tests", "radio_buttons_tests", "upload_and_download_tests", "bidi_tests"]
+DURATIONS_FILE = Path(__file__).with_name(".test_durations.json")
+REPORT_FILE = Path(__file__).with_name("parallel_report.json")
+# Used for tests that have never run before
+DEFAULT_DURATION = 10.0
+
+
+def discover(modules):
+    """Return the ids of all test cases in the given modules, in definition order."""
+    suite = unittest.defaultTestLoader.loadTestsFromNames(modules)
+    return [test.id() for test in _flatten(suite)]
+
+
+def _flatten(suite):
+    for item in suite:
+        if isinstance(item, unittest.TestSuite):
+            yield from _flatten(item)
+        else:
+            yield item
+
+
+def split_cached(modules):
+    """(ids of the tests to run, records of the tests whose cached pass is reused)."""
+    import result_cache
+    to_run, cached = [], []
+    for test in _flatten(unittest.defaultTestLoader.loadTestsFromNames(modules)):
+        _, entry = result_cache.lookup(test)
+        if entry is None:
+            to_run.append(test.id())
+        else:
+            cached.append({"id": test.id(), "outcome": "cached", "duration": 0.0,
+                           "saved": entry["duration"], "output": "", "details": "", "worker": "-"})
+    return to_run, cached
+
+
+def load_durations(path=DURATIONS_FILE):
+    try:
+        return json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def save_durations(durations, path=DURATIONS_FILE):
+    Path(path).write_text(json.dumps(durations, indent=2, sort_keys=True))
+
+
+def make_shards(test_ids, workers, durations):
+    """Split the tests into `workers` shards of roughly equal expected duration."""
+    known = [durations[test_id] for test_id in test_ids if test_id in durations]
+    fallback = statistics.median(known) if known else DEFAULT_DURATION
+    expected = {test_id: durations.get(test_id, fallback) for test_id in test_ids}
+
+    shards = [[] for _ in range(min(workers, len(test_ids)) or 1)]
+    loads = [0.0] * len(shards)
+    for test_id in sorted(test_ids, key=expected.get, reverse=True):
+        lightest = loads.index(min(loads))
+        shards[lightest].append(test_id)
+        loads[lightest] += expected[test_id]
+
+    # Keep tests of one class next to each other so setUpClass runs once per shard
+    order = {test_id: index for index, test_id in enumerate(test_ids)}
+    return [sorted(shard, key=order.get) for shard in shards]
+
+
+class _RecordingResult(unittest.TextTestResult):
+    """Collects a picklable record (outcome, duration, output) for every test."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.records = {}
+        self._started = {}
+
+    def startTest(self, test):
+        self._started[test.id()] = time.perf_counter()
+        self.records[test.id()] = {"id": test.id(), "outcome": "passed", "details": ""}
+        super().startTest(test)
+
+    def stopTest(self, test):
+        # Read the captured output before the base class throws it away
+        output = ""
+        if self.buffer:
+            output = sys.stdout.getvalue() + sys.stderr.getvalue()
+        super().stopTest(test)
+        record = self.records[test.id()]
+        record["duration"] = time.perf_counter() - self._started.pop(test.id())
+        record["output"] = output
+
+    def _record(self, test, outcome, details=""):
+        # A skip inside a subTest block arrives with the _SubTest, not the test
+        test = getattr(test, "test_case", test)
+        if test.id() not in self.records:
+            # Errors in setUpClass/tearDownClass are reported against a placeholder "test"
+            self.records[test.id()] = {"id": test.id(), "duration": 0.0, "output": ""}
+        self.records[test.id()].update(outcome=outcome, details=details)
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        self._record(test, "error", self._exc_info_to_string(err, test))
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self._record(test, "failed", self._exc_info_to_string(err, test))
+
+    def addSubTest(self, test, subtest, err):
+        super().addSubTest(test, subtest, err)
+        # The first failing subtest decides the outcome; the test itself may still pass
+        if err is not None and self.records[test.id()]["outcome"] == "passed":
+            outcome = "failed" if issubclass(err[0], test.failureException) else "error"
+            self._record(test, outcome, f"{subtest}\n{self._exc_info_to_string(err, test)}")
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self._record(test, "skipped", reason)
+
+    def addExpectedFailure(self, test, err):
+        super().addExpectedFailure(test, err)
+        self._record(test, "expected failure")
+
+    def addUnexpectedSuccess(self, test):
+        super().addUnexpectedSuccess(test)
+        self._record(test, "unexpected success")
+
+
+def run_shard(index, test_ids, download_root):
+    """Worker entry point: run one shard with its own browser and download directory."""
+    # Set up the environment before the test modules (and config) are imported here
+    os.environ["SELENIUM_HEADLESS"] = "1"
+    os.environ["SELENIUM_WORKER_INDEX"] = str(index)
+    os.environ["SELENIUM_DOWNLOAD_DIR"] = str(Path(download_root) / f"worker-{index}")
+
+    stream = io.StringIO()
+    try:
+        # Imported only now: reporting reads config, which must see the environment above
+        from reporting import ReportingTestResult
+        resultclass = type("_ShardResult", (_RecordingResult, ReportingTestResult), {})
+        suite = unittest.defaultTestLoader.loadTestsFromNames(test_ids)
+        runner = unittest.TextTestRunner(stream=stream, buffer=True, resultclass=resultclass)
+        result = runner.run(suite)
+        records = list(result.records.values())
+    except Exception:
+        records = [{"id": test_id, "outcome": "error", "duration": 0.0, "output": "",
+                    "details": traceback.format_exc()} for test_id in test_ids]
+    finally:
+        # Pool workers leave through os._exit(), which skips atexit handlers
+        # (browser pool shutdown, trace export): run them now
+        atexit._run_exitfuncs()
+    for record in records:
+        record["worker"] = index
+    return records
+
+
+def run_parallel(modules, workers, durations_file=DURATIONS_FILE, report_file=REPORT_FILE):
+    test_ids = discover(modules)
+    to_run, records = split_cached(modules)
+    durations = load_durations(durations_file)
+    shards = make_shards(to_run, workers, durations) if to_run else []
+    print(f"Running {len(to_run)} tests in {len(shards)} shards ({len(records)} cached)")
+
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="selenium_downloads_") as download_root:
+        # spawn: workers must not inherit browsers or imported config from this process.
+        # One shard per process: run_shard shuts the process's browsers, reporter and
+        # artifact writer down, and config keeps the worker index it was imported with
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=max(1, len(shards)), mp_context=context,
+                                 max_tasks_per_child=1) as executor:
+            futures = [executor.submit(run_shard, index, shard, download_root)
+                       for index, shard in enumerate(shards)]
+            for future in futures:
+                records.extend(future.result())
+    wall_time = time.perf_counter() - started
+
+    order = {test_id: index for index, test_id in enumerate(test_ids)}
+    records.sort(key=lambda record: order.get(record["id"], len(order)))
+    for record in records:
+        if record["outcome"] in ("passed", "failed"):
+            durations[record["id"]] = round(record["duration"], 3)
+    save_durations(durations, durations_file)
+
+    report = {
+        "wall_time": round(wall_time, 3),
+        "test_time": round(sum(record["duration"] for record in records), 3),
+        "time_saved": round(sum(record.get("saved", 0.0) for record in records), 3),
+        "workers": len(shards),
+        "counts": _count(records),
+        "tests": records,
+    }
+    Path(report_file).write_text(json.dumps(report, indent=2))
+    _print_summary(report)
+    return report
+
+
+def _count(records):
+    counts = {}
+    for record in records:
+        counts[record["outcome"]] = counts.get(record["outcome"], 0) + 1
+    return counts
+
+
+def _print_summary(report):
+    for record in report["tests"]:
+        print(f"[worker {record['worker']}] {record['id']} ... {record['outcome']} "
+              f"({record['duration']:.1f}s)")
+    for record in report["tests"]:
+        if record["outcome"] in ("failed", "error"):
+            print("\n" + "=" * 70)
+            print(f"{record['outcome'].upper()}: {record['id']}")
+            print("-" * 70)
+            print(record["details"])
+            if record["output"]:
+                print(record["output"])
+    counts = ", ".join(f"{count} {outcome}" for outcome, count in sorted(report["counts"].items()))
+    print(f"\nRan {len(report['tests'])} tests in {report['wall_time']:.1f}s "
+          f"(sum of test times {report['test_time']:.1f}s): {counts}")
+    if report["time_saved"]:
+        print(f"Cached passes saved {report['time_saved']:.1f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=TEST_MODULES, help="test modules to run")
+    parser.add_argument("-n", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--durations", type=Path, default=DURATIONS_FILE,
+                        help="JSON file with test durations from previous runs")
+    parser.add_argument("--report", type=Path, default=REPORT_FILE, help="merged JSON report")
+    parser.add_argument("--force", action="store_true", help="run every test, ignoring cached passes")
+    args = parser.parse_args(argv)
+    if args.force:
+        # Read by config in this process and in the spawned workers
+        os.environ["SELENIUM_FORCE_RUN"] = "1"
+
+    report = run_parallel(args.modules, args.workers, args.durations, args.report)
+    failed = report["counts"].get("failed", 0) + report["counts"].get("error", 0)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
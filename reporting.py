@@ -0,0 +1,308 @@
+"""Streaming test reports: a JSONL event stream and an incrementally written JUnit XML.
+
+Events are written and flushed the moment they happen, one JSON object per line:
+
+    {"event": "test_start", "test": ..., "time": ...}
+    {"event": "step", "test": ..., "name": ..., "status": ..., "duration": ..., "commands": ...}
+    {"event": "artifact", "test": ..., "path": ...}
+    {"event": "test_end", "test": ..., "outcome": ..., "duration": ..., "commands": ..., "steps": ...}
+
+"commands" is the number of WebDriver commands sent during the step or test. Each
+finished test is added to the JUnit file right away as a <testcase>, with its steps and
+artifacts in <system-out>. The file is rewritten through a temporary file and a rename,
+so a reader always sees a complete document. Only the running test is kept in memory,
+so memory use does not grow with the number of tests. Files go to
+SELENIUM_REPORT_DIR (default reports/), one pair per parallel worker.
+
+Tests report steps with `check("Title correct")` (an assertion that just passed) or
+`with step("Fill form"):`; steps may nest. Run a module with `unittest.main(testRunner=TestRunner)`;
+the parallel runner reports through the same result class.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+import unittest
+from contextlib import contextmanager
+from xml.sax.saxutils import escape, quoteattr
+
+import config
+import result_cache
+
+# Steps listed per test in the JUnit output; the event stream always has all of them
+MAX_JUNIT_STEPS = 200
+_JUNIT_END = b"</testsuite>\n"
+
+
+class _CommandCounter:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def increment(self):
+        with self._lock:
+            self.value += 1
+
+
+_commands = _CommandCounter()
+
+
+def count_commands(driver):
+    """Count every WebDriver command `driver` (and its elements) sends."""
+    execute = driver.execute
+
+    def counted_execute(driver_command, params=None):
+        _commands.increment()
+        return execute(driver_command, params)
+
+    driver.execute = counted_execute
+    return driver
+
+
+class _RunningTest:
+    def __init__(self, test_id):
+        self.id = test_id
+        self.started = self.last_step = time.perf_counter()
+        self.commands = self.last_step_commands = _commands.value
+        self.steps = 0
+        self.step_lines = []
+        self.artifacts = []
+
+
+class Reporter:
+    def __init__(self, directory, suffix=""):
+        self.events_path = directory / f"events{suffix}.jsonl"
+        self.junit_path = directory / f"junit{suffix}.xml"
+        self._events = None
+        self._junit_started = False
+        self._test = None
+        self.cached = 0
+        self.saved_seconds = 0.0
+        self._lock = threading.RLock()
+
+    def start_test(self, test_id):
+        with self._lock:
+            self._test = _RunningTest(test_id)
+            self._emit({"event": "test_start", "test": test_id})
+
+    def running(self, test_id):
+        with self._lock:
+            return self._test is not None and self._test.id == test_id
+
+    def mark(self):
+        """Start timing the next step from now."""
+        with self._lock:
+            if self._test:
+                self._test.last_step, self._test.last_step_commands = time.perf_counter(), _commands.value
+
+    def step(self, name, status="passed", duration=None, since=None, **details):
+        """Record a step of the running test; by default it lasted since the previous step.
+
+        `since` is the (time.perf_counter(), command count) the step began at instead.
+        """
+        with self._lock:
+            test = self._test
+            now = time.perf_counter()
+            if since is None:
+                since = (test.last_step, test.last_step_commands) if test else (now, _commands.value)
+            if duration is None:
+                duration = now - since[0]
+            commands = _commands.value - since[1]
+            event = {"event": "step", "test": test.id if test else None, "name": name,
+                     "status": status, "duration": round(duration, 4), "commands": commands}
+            event.update(details)
+            self._emit(event)
+            if test:
+                test.last_step, test.last_step_commands = now, _commands.value
+                test.steps += 1
+                if len(test.step_lines) < MAX_JUNIT_STEPS:
+                    test.step_lines.append(f"[{status}] {name} ({duration:.3f}s, {commands} commands)")
+
+    def artifact(self, test_id, path):
+        """An artifact was written; called from the artifact writer thread."""
+        with self._lock:
+            self._emit({"event": "artifact", "test": test_id, "path": str(path)})
+            if self._test and self._test.id == test_id:
+                self._test.artifacts.append(str(path))
+
+    def end_test(self, test_id, outcome, details="", **extra):
+        with self._lock:
+            test = self._test if self._test and self._test.id == test_id else None
+            if test is None:
+                # Errors in setUpClass and friends arrive without a test_start
+                self.start_test(test_id)
+                test = self._test
+            duration = time.perf_counter() - test.started
+            commands = _commands.value - test.commands
+            self._emit({"event": "test_end", "test": test_id, "outcome": outcome,
+                        "duration": round(duration, 4), "commands": commands,
+                        "steps": test.steps, "artifacts": test.artifacts, "details": details, **extra})
+            if outcome == "cached":
+                self.cached += 1
+                self.saved_seconds += extra.get("saved_seconds", 0.0)
+            self._write_testcase(test, outcome, details, duration, commands)
+            self._test = None
+
+    def close(self):
+        with self._lock:
+            if self._events is not None:
+                self._events.close()
+                self._events = None
+            if self.cached:
+                print(f"{self.cached} tests reused a cached pass, saving {self.saved_seconds:.1f}s")
+
+    def _emit(self, event):
+        if self._events is None:
+            self.events_path.parent.mkdir(parents=True, exist_ok=True)
+            self._events = open(self.events_path, "w", buffering=1, encoding="utf-8")
+        event["time"] = time.time()
+        event["pid"] = os.getpid()
+        if config.WORKER is not None:
+            event["worker"] = int(config.WORKER)
+        self._events.write(json.dumps(event, default=str) + "\n")
+
+    def _write_testcase(self, test, outcome, details, duration, commands):
+        if test.id.endswith(")") and " (" in test.id:
+            # Placeholder of a fixture error, e.g. "setUpClass (module.Class)"
+            name, _, class_name = test.id[:-1].partition(" (")
+        else:
+            class_name, _, name = test.id.rpartition(".")
+        lines = [f"  <testcase classname={quoteattr(class_name)} name={quoteattr(name)} "
+                 f'time="{duration:.3f}">',
+                 f'    <properties><property name="commands" value="{commands}"/>'
+                 f'<property name="steps" value="{test.steps}"/></properties>']
+        if outcome in ("failed", "error"):
+            tag = "failure" if outcome == "failed" else "error"
+            message = details.strip().splitlines()[-1] if details.strip() else outcome
+            lines.append(f"    <{tag} message={quoteattr(message)}>{escape(details)}</{tag}>")
+        elif outcome in ("skipped", "cached"):
+            lines.append(f"    <skipped message={quoteattr(details)}/>")
+        output = test.step_lines + [f"[[ATTACHMENT|{path}]]" for path in test.artifacts]
+        if test.steps > len(test.step_lines):
+            output.append(f"... {test.steps - len(test.step_lines)} more steps in {self.events_path.name}")
+        if output:
+            lines.append(f"    <system-out>{escape(chr(10).join(output))}</system-out>")
+        lines.append("  </testcase>\n")
+        self._append_to_junit("\n".join(lines).encode("utf-8"))
+
+    def _append_to_junit(self, testcase):
+        """Copy the file without its closing tag, add `testcase` and the tag, and swap it in."""
+        partial = self.junit_path.with_name(f"{self.junit_path.name}.{os.getpid()}.tmp")
+        with open(partial, "wb") as out:
+            if self._junit_started:
+                with open(self.junit_path, "rb") as previous:
+                    remaining = os.fstat(previous.fileno()).st_size - len(_JUNIT_END)
+                    while remaining > 0:
+                        chunk = previous.read(min(remaining, 1 << 20))
+                        out.write(chunk)
+                        remaining -= len(chunk)
+            else:
+                self.junit_path.parent.mkdir(parents=True, exist_ok=True)
+                timestamp = quoteattr(time.strftime("%Y-%m-%dT%H:%M:%S"))
+                out.write(f'<?xml version="1.0" encoding="UTF-8"?>\n'
+                          f'<testsuite name="selenium" timestamp={timestamp}>\n'.encode("utf-8"))
+            out.write(testcase)
+            out.write(_JUNIT_END)
+        os.replace(partial, self.junit_path)
+        self._junit_started = True
+
+
+def _reporter():
+    suffix = f"-worker-{config.WORKER}" if config.WORKER is not None else ""
+    return Reporter(config.REPORT_DIR, suffix)
+
+
+reporter = _reporter()
+atexit.register(reporter.close)
+
+
+def check(message):
+    """Record a passed check of the running test; SELENIUM_REPORT_ECHO=1 also prints it."""
+    reporter.step(message)
+    if config.REPORT_ECHO:
+        print(f"✓ {message}")
+
+
+@contextmanager
+def step(name):
+    """Time a block as one step; it is recorded as failed if the block raises.
+
+    The steps and checks inside the block are recorded as well; the block's own step
+    covers all of it.
+    """
+    since = (time.perf_counter(), _commands.value)
+    reporter.mark()
+    try:
+        yield
+    except BaseException:
+        reporter.step(name, "failed", since=since)
+        raise
+    reporter.step(name, since=since)
+
+
+class ReportingTestResult(unittest.TextTestResult):
+    """Streams test start/end events to the reporter."""
+
+    def startTest(self, test):
+        reporter.start_test(test.id())
+        self._report_outcome = ("passed", "", {})
+        self._report_started = time.perf_counter()
+        self._report_problems = len(self.failures) + len(self.errors)
+        super().startTest(test)
+
+    def stopTest(self, test):
+        super().stopTest(test)
+        outcome, details, extra = self._report_outcome
+        # Only a test without any failure, error or failing subtest is cached
+        if outcome == "passed" and len(self.failures) + len(self.errors) == self._report_problems:
+            result_cache.record_pass(test, time.perf_counter() - self._report_started)
+        reporter.end_test(test.id(), outcome, details, **extra)
+
+    def _report(self, test, outcome, details="", **extra):
+        # A skip inside a subTest block arrives with the _SubTest, not the test
+        test = getattr(test, "test_case", test)
+        if not reporter.running(test.id()):
+            # setUpClass/tearDownClass errors are reported against a placeholder "test"
+            reporter.end_test(test.id(), outcome, details, **extra)
+        else:
+            self._report_outcome = (outcome, details, extra)
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        self._report(test, "error", self._exc_info_to_string(err, test))
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self._report(test, "failed", self._exc_info_to_string(err, test))
+
+    def addSubTest(self, test, subtest, err):
+        super().addSubTest(test, subtest, err)
+        # The first failing subtest decides the outcome; the test itself may still pass
+        if err is not None and self._report_outcome[0] == "passed":
+            outcome = "failed" if issubclass(err[0], test.failureException) else "error"
+            self._report(test, outcome, f"{subtest}\n{self._exc_info_to_string(err, test)}")
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        if isinstance(test, result_cache.CachedTest):
+            self._report(test, "cached", reason, saved_seconds=test.saved_seconds)
+        else:
+            self._report(test, "skipped", reason)
+
+    def addExpectedFailure(self, test, err):
+        super().addExpectedFailure(test, err)
+        self._report(test, "expected failure")
+
+    def addUnexpectedSuccess(self, test):
+        super().addUnexpectedSuccess(test)
+        self._report(test, "unexpected success")
+
+
+class TestRunner(unittest.TextTestRunner):
+    """Runs only the tests without a cached pass (see result_cache.py) and reports them."""
+
+    resultclass = ReportingTestResult
+
+    def run(self, test):
+        return super().run(result_cache.filter_suite(test))
@@ -0,0 +1,259 @@
+"""Skip tests whose code, pages and browser have not changed since they last passed.
+
+A test's key is a hash of:
+
+* the source of the test method, the helper methods it calls through `self.` and the
+  fixtures of its class (setUp/setUpClass/tearDown/tearDownClass),
+* the content of the practice pages it navigates to (its @scenario page, every
+  `page_url("...")` literal in that source and every page object it names, see
+  pages.py): the fixture files with PRACTICE_BASE_URL=local, the live pages otherwise,
+  plus the source of those page objects,
+* the Firefox version: the one this process's sessions report, before the first
+  session `firefox --version` of the binary on PATH (the one geckodriver starts).
+  While neither is known a test has no key: it runs and its pass is not stored.
+
+Passing tests are stored in .result_cache.json under their key. A test whose key is
+stored is not run; it is reported as "cached" together with the time the cached run
+took. A test whose pages cannot be fetched is always run. SELENIUM_FORCE_RUN=1 (or
+`parallel_runner.py --force`) runs everything and refreshes the cache.
+"""
+import atexit
+import hashlib
+import inspect
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+import unittest
+import urllib.request
+from pathlib import Path
+
+import config
+
+_PAGE_LITERAL = re.compile(r"""page_url\(\s*["']([^"']+)["']""")
+_SELF_CALL = re.compile(r"self\.(\w+)\(")
+_PAGE_OBJECT = re.compile(r"\b(\w+Page)\b")
+_FIXTURES = ("setUpClass", "setUp", "tearDown", "tearDownClass")
+# "Mozilla Firefox 128.0.3esr" and a session's "128.0.3esr" are the same version
+_VERSION = re.compile(r"\d+(?:\.\d+)+\S*")
+
+
+class ResultCache:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = _load(self.path)
+        self.new_entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self.entries.get(key)
+
+    def put(self, key, test_id, seconds):
+        entry = {"test": test_id, "duration": round(seconds, 3), "passed_at": time.time()}
+        with self._lock:
+            self.entries[key] = self.new_entries[key] = entry
+
+    def save(self):
+        """Merge this process's entries into the file; parallel workers share it."""
+        if not self.new_entries:
+            return
+        with self._lock:
+            merged = _load(self.path)
+            merged.update(self.new_entries)
+            self.new_entries = {}
+        partial = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        try:
+            partial.write_text(json.dumps(merged, indent=1, sort_keys=True))
+            os.replace(partial, self.path)
+        except OSError:
+            pass
+
+
+def _load(path):
+    try:
+        return json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+cache = ResultCache(config.RESULT_CACHE)
+atexit.register(cache.save)
+
+_page_hashes = {}
+# "" once `firefox --version` found nothing
+_installed_version = None
+_session_version = None
+
+
+def note_browser_version(version):
+    """Called with the browserVersion of every session this process starts."""
+    global _session_version
+    _session_version = _version_number(version) or _session_version
+
+
+def browser_version():
+    """The Firefox version the sessions use, or None while it is unknown."""
+    global _installed_version
+    if _session_version:
+        return _session_version
+    if _installed_version is None:
+        binary = shutil.which("firefox")
+        try:
+            output = subprocess.run([binary, "--version"], capture_output=True, text=True,
+                                    timeout=30).stdout if binary else ""
+        except (OSError, subprocess.SubprocessError):
+            output = ""
+        _installed_version = _version_number(output) or ""
+    return _installed_version or None
+
+
+def _version_number(text):
+    match = _VERSION.search(text or "")
+    return match.group() if match else None
+
+
+def page_hash(page):
+    """SHA-256 of a practice page, or None if it cannot be read."""
+    if page not in _page_hashes:
+        try:
+            if config.BASE_URL == "local":
+                import fixture_server
+                content = (fixture_server.FIXTURES_DIR / page).read_bytes()
+            else:
+                with urllib.request.urlopen(config.page_url(page), timeout=30) as response:
+                    content = response.read()
+            _page_hashes[page] = hashlib.sha256(content).hexdigest()
+        except OSError:
+            _page_hashes[page] = None
+    return _page_hashes[page]
+
+
+def _method_sources(cls, name, seen):
+    """Source of `name` and of every method it calls through self., recursively."""
+    if name in seen:
+        return []
+    seen.add(name)
+    method = getattr(cls, name, None)
+    if method is None or not callable(method):
+        return []
+    try:
+        source = inspect.getsource(method)
+    except (OSError, TypeError):
+        return []
+    sources = [source]
+    for called in _SELF_CALL.findall(source):
+        sources.extend(_method_sources(cls, called, seen))
+    return sources
+
+
+def test_key(test):
+    """Cache key of a test case, or None if it must always run."""
+    cls = type(test)
+    method_name = getattr(test, "_testMethodName", None)
+    if method_name is None or not hasattr(cls, method_name):
+        return None
+    seen = set()
+    sources = _method_sources(cls, method_name, seen)
+    for fixture in _FIXTURES:
+        # unittest's own (empty) fixtures do not matter
+        if any(fixture in vars(klass) for klass in cls.__mro__ if klass not in (unittest.TestCase, object)):
+            sources.extend(_method_sources(cls, fixture, seen))
+    if not sources:
+        return None
+
+    import pages as page_objects
+    text = "\n".join(sources)
+    pages = set(_PAGE_LITERAL.findall(text))
+    scenario_page = getattr(getattr(cls, method_name), "scenario_page", None)
+    if scenario_page:
+        pages.add(scenario_page)
+    by_name = {page.__name__: page for page in page_objects.PAGES.values()}
+    used = {by_name[name] for name in _PAGE_OBJECT.findall(text) if name in by_name}
+    if scenario_page in page_objects.PAGES:
+        used.add(page_objects.PAGES[scenario_page])
+    for page in sorted(used, key=lambda page: page.__name__):
+        # Changed locators change the test
+        sources.append(inspect.getsource(page))
+        pages.add(page.path)
+    digest = hashlib.sha256()
+    # Not test.id(): the module is "__main__" when a test file is run directly
+    digest.update(f"{cls.__qualname__}.{method_name}".encode())
+    for source in sources:
+        digest.update(source.encode())
+    for page in sorted(pages):
+        content_hash = page_hash(page)
+        if content_hash is None:
+            return None
+        digest.update(f"{page}:{content_hash}".encode())
+    version = browser_version()
+    if version is None:
+        # A pass keyed without the version would survive a browser upgrade
+        return None
+    digest.update(version.encode())
+    return digest.hexdigest()
+
+
+def lookup(test):
+    """(key, cached entry or None) for a test; nothing is cached when forcing a full run."""
+    key = test_key(test)
+    if key is None or config.FORCE_RUN:
+        return key, None
+    return key, cache.get(key)
+
+
+def record_pass(test, seconds):
+    key = getattr(test, "result_cache_key", None) or test_key(test)
+    if key is not None:
+        cache.put(key, test.id(), seconds)
+
+
+class CachedTest(unittest.TestCase):
+    """Stands in for a test whose pass is reused; reports it as skipped without running it."""
+
+    def __init__(self, test, entry):
+        super().__init__("run_cached")
+        self._original_id = test.id()
+        self.saved_seconds = entry["duration"]
+        self.passed_at = entry["passed_at"]
+
+    def id(self):
+        return self._original_id
+
+    def __str__(self):
+        return f"{self._original_id} (cached)"
+
+    def run_cached(self):
+        passed_at = time.strftime("%Y-%m-%d %H:%M", time.localtime(self.passed_at))
+        self.skipTest(f"cached pass from {passed_at}, saves {self.saved_seconds:.1f}s")
+
+
+def filter_suite(suite):
+    """Replace tests with a cached pass by CachedTest; remember the keys of the others.
+
+    The CachedTests go into a suite of their own after all real tests: between the tests
+    of a class they would make unittest run its tearDownClass and setUpClass again.
+    """
+    cached = unittest.TestSuite()
+    filtered = _filter_suite(suite, cached)
+    if cached.countTestCases():
+        filtered.addTest(cached)
+    return filtered
+
+
+def _filter_suite(suite, cached):
+    filtered = unittest.TestSuite()
+    for item in suite:
+        if isinstance(item, unittest.TestSuite):
+            filtered.addTest(_filter_suite(item, cached))
+            continue
+        key, entry = lookup(item)
+        if entry is not None:
+            cached.addTest(CachedTest(item, entry))
+        else:
+            item.result_cache_key = key
+            filtered.addTest(item)
+    return filtered
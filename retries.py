@@ -0,0 +1,99 @@
+"""Retry policy for steps that fail for reasons outside the test's control.
+
+Only errors classified as transient are retried: a stale or covered element for any
+step, and a page-load timeout or network error page for navigation. Everything else,
+including a wait that timed out on an element that never appeared, fails on the first
+attempt. Every retry is printed, appended to retries.jsonl (with the running test) and,
+when tracing is on, recorded in the trace.
+"""
+import json
+import os
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from selenium.common.exceptions import (ElementClickInterceptedException,
+                                        StaleElementReferenceException, TimeoutException,
+                                        WebDriverException)
+
+import artifacts
+import tracing
+import latency
+from latency import site_key
+from tracing import tracer
+
+RETRY_LOG = Path(__file__).with_name("retries.jsonl")
+
+TRANSIENT_ERRORS = (StaleElementReferenceException, ElementClickInterceptedException)
+# Firefox error pages for connections that failed or were reset
+NETWORK_ERRORS = ("Reached error page", "NS_ERROR_NET", "NS_ERROR_CONNECTION_REFUSED",
+                  "NS_ERROR_UNKNOWN_HOST")
+NAVIGATION_TIMEOUT = 30
+
+
+def is_transient(error, kind="step"):
+    if isinstance(error, TRANSIENT_ERRORS):
+        return True
+    if kind == "navigation":
+        return isinstance(error, TimeoutException) or any(
+            marker in (error.msg or "") for marker in NETWORK_ERRORS)
+    return False
+
+
+def retry_step(step, name, kind="step", attempts=3, backoff=0.25):
+    """Run `step()`; retry it up to `attempts` times while it fails transiently."""
+    for attempt in range(1, attempts + 1):
+        try:
+            return step()
+        except WebDriverException as e:
+            if attempt == attempts or not is_transient(e, kind):
+                raise
+            _record_retry(name, kind, attempt, e)
+            time.sleep(backoff * attempt)
+
+
+def navigate(driver, url, attempts=3):
+    """driver.get(url) with an adaptive page-load timeout and retries for transient errors.
+
+    Installs the console hook on the loaded page, for the console log of a failure.
+    """
+    key = site_key(f"navigate:{urlsplit(url).path}", url)
+    timeout = latency.history.timeout_for(key, default=NAVIGATION_TIMEOUT)
+    if getattr(driver, "_adaptive_page_load_timeout", None) != timeout:
+        driver.set_page_load_timeout(timeout)
+        driver._adaptive_page_load_timeout = timeout
+
+    def load():
+        started = time.perf_counter()
+        try:
+            driver.get(url)
+        except TimeoutException:
+            latency.history.record(key, timeout)
+            raise
+        latency.history.record(key, time.perf_counter() - started)
+
+    retry_step(load, key, "navigation", attempts)
+    artifacts.install_console_hook(driver)
+
+
+def _record_retry(name, kind, attempt, error):
+    text = (error.msg or str(error)).strip()
+    message = text.splitlines()[0] if text else ""
+    record = {
+        "test": tracer.current_test,
+        "step": name,
+        "kind": kind,
+        "attempt": attempt,
+        "error": type(error).__name__,
+        "message": message,
+        "pid": os.getpid(),
+        "timestamp": time.time(),
+    }
+    print(f"Retrying {name} after {record['error']} (attempt {attempt}): {message}")
+    if tracing.enabled():
+        tracer.record("retry", name, time.perf_counter(), 0.0, payload=attempt)
+    try:
+        with open(RETRY_LOG, "a") as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError:
+        pass
@@ -0,0 +1,157 @@
+"""Scenario model: tests declare the page they need, the scheduler shares page loads.
+
+A ScenarioTestCase keeps one pooled browser for the whole class. Test methods declare
+their page with @scenario("buttons.php"); the module's `load_tests` (set it to
+`scenario_load_tests`) orders the tests so that all tests of a page run back to back.
+The page is loaded once per group; between the tests of a group only its state is reset
+(forms reset, result elements restored to how they looked after the page load).
+Use @scenario(page, fresh=True) for a test that needs a real reload. `self.page` is the
+page object of the test's page (see pages.py); its element handles survive the resets.
+"""
+import unittest
+
+from selenium.common.exceptions import WebDriverException
+
+import artifacts
+import config
+import lifecycle
+from browser_pool import get_pool, test_failed
+from latency import AdaptiveWait
+from pages import PAGES
+from retries import navigate
+from tracing import tracer
+from waits import wait_for_page_ready
+
+# Elements whose content and visibility change when the user interacts with the page
+PAGE_STATE = {path: page.state for path, page in PAGES.items()}
+
+_SAVE_STATE_JS = """
+var saved = {};
+arguments[0].forEach(function (selector) {
+  var el = document.querySelector(selector);
+  if (el) saved[selector] = {html: el.innerHTML, style: el.getAttribute('style'),
+                             className: el.className, hidden: el.hidden};
+});
+window.__scenarioInitialState = saved;
+"""
+
+_RESET_STATE_JS = """
+var saved = window.__scenarioInitialState;
+if (!saved) return false;
+Array.prototype.forEach.call(document.forms, function (form) { form.reset(); });
+Object.keys(saved).forEach(function (selector) {
+  var el = document.querySelector(selector), state = saved[selector];
+  if (!el) return;
+  el.innerHTML = state.html;
+  if (state.style === null) el.removeAttribute('style'); else el.setAttribute('style', state.style);
+  el.className = state.className;
+  el.hidden = state.hidden;
+});
+return true;
+"""
+
+
+def scenario(page, fresh=False):
+    """Declare the practice page a test runs on (and whether it needs a fresh load)."""
+    def decorate(test_method):
+        test_method.scenario_page = page
+        test_method.scenario_fresh = fresh
+        return test_method
+    return decorate
+
+
+class ScenarioTestCase(unittest.TestCase):
+    """Shares one browser and one page load per page across the tests of a class."""
+
+    driver = None
+    current_page = None
+    page_loads = 0
+
+    @classmethod
+    def setUpClass(cls):
+        cls.driver = get_pool().acquire()
+        cls.wait = AdaptiveWait(cls.driver)
+        cls.current_page = None
+        cls.page_loads = 0
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.driver is not None:
+            get_pool().release(cls.driver)
+            cls.driver = None
+
+    def setUp(self):
+        tracer.begin_test(self.id())
+        cls = type(self)
+        # No page after a failure: the browser may have crashed with it, so check it then
+        crashed = cls.current_page is None and not _responds(cls.driver)
+        if crashed or lifecycle.manager.should_recycle(cls.driver):
+            # The pool replaces the browser; the new one has no page loaded yet
+            get_pool().release(cls.driver, broken=crashed)
+            cls.driver = get_pool().acquire()
+            cls.wait = AdaptiveWait(cls.driver)
+            cls.current_page = None
+        lifecycle.manager.begin_test(cls.driver, self.id())
+        test_method = getattr(self, self._testMethodName)
+        page = getattr(test_method, "scenario_page", None)
+        self.page = PAGES[page](cls.driver) if page in PAGES else None
+        if page is not None:
+            self.open_page(page, fresh=getattr(test_method, "scenario_fresh", False))
+
+    def tearDown(self):
+        if test_failed(self):
+            artifacts.capture_failure(self.driver, self.id())
+            # Unknown page state after a failure: the next test loads its page again
+            type(self).current_page = None
+        lifecycle.manager.end_test(self.driver)
+        tracer.end_test()
+
+    def open_page(self, page, fresh=False):
+        """Make `page` current with its initial state, reloading only when necessary."""
+        cls = type(self)
+        if cls.current_page == page and not fresh:
+            try:
+                if self.driver.execute_script(_RESET_STATE_JS):
+                    return
+            except WebDriverException:
+                pass
+        # Until the load succeeds the page is unknown, and setUp checks the browser
+        cls.current_page = None
+        navigate(self.driver, config.page_url(page))
+        wait_for_page_ready(self.driver)
+        self.driver.execute_script(_SAVE_STATE_JS, PAGE_STATE.get(page, []))
+        cls.current_page = page
+        cls.page_loads += 1
+
+
+def _responds(driver):
+    try:
+        driver.title
+        return True
+    except WebDriverException:
+        return False
+
+
+def _page_of(test):
+    test_method = getattr(test, getattr(test, "_testMethodName", ""), None)
+    return getattr(test_method, "scenario_page", "")
+
+
+def schedule(tests):
+    """Order tests so the ones on the same page run together (stable within a page)."""
+    tests = list(tests)
+    first_seen = {}
+    for index, test in enumerate(tests):
+        first_seen.setdefault((type(test), _page_of(test)), index)
+    return sorted(tests, key=lambda test: (first_seen[(type(test), _page_of(test))]))
+
+
+def scenario_load_tests(loader, standard_tests, pattern):
+    """unittest load_tests hook: group the module's tests by class and page."""
+    suite = unittest.TestSuite()
+    for class_suite in standard_tests:
+        if isinstance(class_suite, unittest.TestSuite):
+            suite.addTests(schedule(class_suite))
+        else:
+            suite.addTest(class_suite)
+    return suite
@@ -0,0 +1,67 @@
+"""ArtifactWriter: deduplication, budget, and surviving bad items."""
+import base64
+import gzip
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import artifacts
+import reporting
+
+PNG = base64.b64encode(b"\x89PNG\r\n\x1a\n fake image").decode("ascii")
+
+
+class ArtifactWriterTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = Path(directory.name)
+        patch = mock.patch.object(reporting, "reporter", reporting.Reporter(self.root / "reports"))
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def writer(self, budget_bytes=1024 * 1024):
+        writer = artifacts.ArtifactWriter(self.root / "run", budget_bytes)
+        self.addCleanup(writer.close)
+        return writer
+
+    def flush(self, writer):
+        thread = threading.Thread(target=writer.flush, daemon=True)
+        thread.start()
+        thread.join(timeout=5)
+        self.assertFalse(thread.is_alive(), "flush() did not return")
+
+    def test_writes_and_skips_duplicates(self):
+        writer = self.writer()
+        writer.submit("m.C.test", "shot", "png", PNG)
+        writer.submit("m.C.test", "shot", "png", PNG)
+        writer.submit("m.C.test", "dom", "html", "<p>x</p>")
+        self.flush(writer)
+        self.assertEqual([path.name for path in writer.written], ["001-shot.png", "002-dom.html.gz"])
+        self.assertEqual(writer.skipped_duplicates, 1)
+        self.assertEqual(gzip.decompress(writer.written[1].read_bytes()), b"<p>x</p>")
+
+    def test_stops_at_the_budget(self):
+        writer = self.writer(budget_bytes=10)
+        writer.submit("m.C.test", "shot", "png", PNG)
+        self.flush(writer)
+        self.assertEqual(writer.written, [])
+        self.assertEqual(writer.dropped, [("m.C.test", "shot", "over budget")])
+
+    def test_bad_items_do_not_stop_the_writer(self):
+        writer = self.writer()
+        writer.submit("m.C.test", "broken", "png", "abc")
+        with mock.patch.object(reporting.reporter, "artifact", side_effect=RuntimeError("report")):
+            writer.submit("m.C.test", "unreported", "html", "<p>1</p>")
+            self.flush(writer)
+        writer.submit("m.C.test", "after", "html", "<p>2</p>")
+        self.flush(writer)
+        self.assertEqual([name for _, name, _ in writer.dropped], ["broken", "unreported"])
+        self.assertIn("Error", writer.dropped[0][2])
+        self.assertEqual(writer.written[-1].name, "002-after.html.gz")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+"""BiDi value conversion, and a BiDiSession talking to a scripted WebSocket server."""
+import asyncio
+import json
+import math
+import unittest
+
+from selenium.common.exceptions import WebDriverException
+
+import bidi
+from bidi import BiDiError, BiDiSession, deserialize, serialize
+
+
+class ValueTestCase(unittest.TestCase):
+    def test_serialize(self):
+        self.assertEqual(serialize(None), {"type": "null"})
+        self.assertEqual(serialize(True), {"type": "boolean", "value": True})
+        self.assertEqual(serialize([1, "a"]), {"type": "array", "value": [{"type": "number", "value": 1},
+                                                                         {"type": "string", "value": "a"}]})
+        self.assertEqual(serialize({"k": 2.5}), {"type": "object", "value": [["k", {"type": "number", "value": 2.5}]]})
+        # Element references from find() are passed through as references
+        self.assertEqual(serialize({"type": "node", "sharedId": "f.1.d.2"}), {"sharedId": "f.1.d.2"})
+        with self.assertRaises(TypeError):
+            serialize(object())
+
+    def test_deserialize(self):
+        self.assertIsNone(deserialize({"type": "undefined"}))
+        self.assertEqual(deserialize({"type": "object", "value": [
+            ["items", {"type": "array", "value": [{"type": "string", "value": "x"}, {"type": "null"}]}],
+            ["count", {"type": "number", "value": "-0"}],
+        ]}), {"items": ["x", None], "count": 0.0})
+        self.assertTrue(math.isnan(deserialize({"type": "number", "value": "NaN"})))
+        node = {"type": "node", "sharedId": "f.1.d.2"}
+        self.assertEqual(deserialize(node), node)
+
+
+class _Driver:
+    def __init__(self, url):
+        self.capabilities = {"webSocketUrl": url}
+
+
+@unittest.skipIf(bidi.websockets is None, "needs the websockets package")
+class SessionTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.received = []
+        self.replies = []
+        self.answered = []
+        self.server = await bidi.websockets.serve(self.handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        self.session = await BiDiSession.connect(_Driver(f"ws://127.0.0.1:{port}/session"))
+
+    async def asyncTearDown(self):
+        await self.session.close()
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, socket):
+        async for raw in socket:
+            message = json.loads(raw)
+            self.received.append(message)
+            method, params = message["method"], message["params"]
+            if method == "script.evaluate":
+                # Answered concurrently, so a quicker command overtakes a slower one
+                self.replies.append(asyncio.create_task(self.reply_later(socket, message)))
+            elif method == "browsingContext.create":
+                await socket.send(json.dumps({"type": "success", "id": message["id"], "result": {"context": "ctx-1"}}))
+            elif method == "emit.log":
+                await socket.send(json.dumps({"type": "event", "method": "log.entryAdded", "params": {
+                    "level": "info", "text": params["text"], "source": {"context": params["context"]}}}))
+                await socket.send(json.dumps({"type": "success", "id": message["id"], "result": {}}))
+            elif method == "broken":
+                await socket.send(json.dumps({"type": "error", "id": message["id"], "error": "unknown command",
+                                              "message": "broken is not a command"}))
+            elif method == "hang.up":
+                await socket.close()
+            else:
+                await socket.send(json.dumps({"type": "success", "id": message["id"], "result": {}}))
+
+    async def reply_later(self, socket, message):
+        await asyncio.sleep(message["params"]["delay"])
+        self.answered.append(message["params"]["expression"])
+        await socket.send(json.dumps({"type": "success", "id": message["id"],
+                                      "result": {"echo": message["params"]["expression"]}}))
+
+    async def test_connect_subscribes(self):
+        subscribe = self.received[0]
+        self.assertEqual(subscribe["method"], "session.subscribe")
+        self.assertIn("log.entryAdded", subscribe["params"]["events"])
+
+    async def test_responses_are_matched_by_id(self):
+        slow = self.session.command("script.evaluate", {"expression": "slow", "delay": 0.2})
+        fast = self.session.command("script.evaluate", {"expression": "fast", "delay": 0.0})
+        self.assertEqual(await asyncio.gather(slow, fast), [{"echo": "slow"}, {"echo": "fast"}])
+        self.assertEqual(self.answered, ["fast", "slow"])
+
+    async def test_errors_raise(self):
+        with self.assertRaises(BiDiError):
+            await self.session.command("broken")
+
+    async def test_events_reach_their_context(self):
+        context = await self.session.new_context()
+        logged = self.session.expect("log.entryAdded", lambda params: params["text"] == "hello")
+        await self.session.command("emit.log", {"text": "hello", "context": context.id})
+        await self.session.command("emit.log", {"text": "elsewhere", "context": "ctx-2"})
+        await self.session.wait_for_event("log.entryAdded", expected=logged, timeout=5)
+        self.assertEqual([entry["text"] for entry in context.log_entries], ["hello"])
+        self.assertEqual([entry["text"] for entry in self.session.log_entries], ["hello", "elsewhere"])
+
+    async def test_pending_commands_fail_when_the_connection_closes(self):
+        with self.assertRaises(WebDriverException):
+            await self.session.command("hang.up", timeout=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
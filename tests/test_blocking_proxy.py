@@ -0,0 +1,110 @@
+"""Host policy, asset cache and the proxy itself against a local upstream server."""
+import functools
+import http.client
+import tempfile
+import threading
+import time
+import unittest
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+import blocking_proxy
+from blocking_proxy import AssetCache, BlockingProxy, HostPolicy
+
+
+class HostPolicyTestCase(unittest.TestCase):
+    def test_deny_list(self):
+        policy = HostPolicy(first_party=["www.tutorialspoint.com"])
+        self.assertTrue(policy.blocks("stats.g.doubleclick.net"))
+        # "*.doubleclick.net" covers the bare domain as well
+        self.assertTrue(policy.blocks("doubleclick.net"))
+        self.assertTrue(policy.blocks("fonts.gstatic.com"))
+        self.assertFalse(policy.blocks("cdn.jsdelivr.net"))
+        self.assertFalse(policy.blocks("www.tutorialspoint.com"))
+
+    def test_allow_list_blocks_every_other_third_party(self):
+        policy = HostPolicy(first_party=["www.tutorialspoint.com"], allow=["*.jsdelivr.net"])
+        self.assertFalse(policy.blocks("cdn.jsdelivr.net"))
+        self.assertFalse(policy.blocks("www.tutorialspoint.com"))
+        self.assertFalse(policy.blocks("127.0.0.1"))
+        self.assertTrue(policy.blocks("code.jquery.com"))
+
+    def test_first_party_is_never_blocked(self):
+        policy = HostPolicy(first_party=["ads.example.com"], deny=["*.example.com"])
+        self.assertFalse(policy.blocks("ads.example.com"))
+        self.assertTrue(policy.blocks("www.example.com"))
+
+
+class AssetCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def test_round_trip(self):
+        cache = AssetCache(self.directory, ttl=60)
+        self.assertIsNone(cache.get("http://127.0.0.1/app.css"))
+        cache.put("http://127.0.0.1/app.css", 200, [["Content-Type", "text/css"]], b"body{}")
+        self.assertEqual(cache.get("http://127.0.0.1/app.css"), (200, [["Content-Type", "text/css"]], b"body{}"))
+
+    def test_expired_entries_are_ignored(self):
+        cache = AssetCache(self.directory, ttl=60)
+        cache.put("http://127.0.0.1/app.css", 200, [], b"body{}")
+        with mock.patch.object(blocking_proxy.time, "time", return_value=time.time() + 61):
+            self.assertIsNone(cache.get("http://127.0.0.1/app.css"))
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class BlockingProxyTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        root = Path(directory.name) / "site"
+        root.mkdir()
+        (root / "app.css").write_text("body { color: red; }")
+        (root / "page.html").write_text("<html></html>")
+        upstream = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_QuietHandler, directory=str(root)))
+        threading.Thread(target=upstream.serve_forever, daemon=True).start()
+        self.addCleanup(upstream.server_close)
+        self.addCleanup(upstream.shutdown)
+        self.upstream = f"http://127.0.0.1:{upstream.server_address[1]}"
+
+        self.proxy = BlockingProxy(policy=HostPolicy(deny=["*.ads.test"]), cache_dir=Path(directory.name) / "cache",
+                                   cache_ttl=60).start()
+        self.addCleanup(self.proxy.stop)
+
+    def _request(self, method, target):
+        connection = http.client.HTTPConnection(*self.proxy.address, timeout=10)
+        try:
+            connection.request(method, target)
+            response = connection.getresponse()
+            return response.status, response.read()
+        finally:
+            connection.close()
+
+    def test_denied_hosts_get_an_empty_response(self):
+        self.assertEqual(self._request("GET", "http://tracker.ads.test/pixel.gif"), (204, b""))
+        self.assertEqual(self._request("CONNECT", "tracker.ads.test:443"), (403, b""))
+        self.assertEqual(self.proxy.stats.report()["(no page)"]["blocked"], 2)
+
+    def test_static_assets_are_served_from_the_cache(self):
+        self.proxy.set_page("buttons.php")
+        for _ in range(2):
+            self.assertEqual(self._request("GET", f"{self.upstream}/app.css"), (200, b"body { color: red; }"))
+        self.assertEqual(self._request("GET", f"{self.upstream}/page.html"), (200, b"<html></html>"))
+        self.assertEqual(self._request("GET", f"{self.upstream}/page.html"), (200, b"<html></html>"))
+        counts = self.proxy.stats.report()["buttons.php"]
+        self.assertEqual(counts["requests"], 4)
+        self.assertEqual(counts["cache_hits"], 1)
+        self.assertEqual(counts["bytes_from_cache"], len(b"body { color: red; }"))
+        # Counted before the response is sent: complete as soon as the client has it
+        self.assertEqual(counts["bytes_upstream"], len(b"body { color: red; }") + 2 * len(b"<html></html>"))
+
+
+if __name__ == "__main__":
+    unittest.main()
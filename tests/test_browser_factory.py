@@ -0,0 +1,83 @@
+"""Profile templates and after_start hooks with a fake Firefox instead of a browser."""
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.firefox.options import Options
+
+import browser_factory
+
+
+class _FakeFirefox:
+    """Writes what Firefox writes into the profile it was started with."""
+
+    launches = 0
+
+    def __init__(self, service=None, options=None):
+        _FakeFirefox.launches += 1
+        self.capabilities = {"browserVersion": "128.0"}
+        arguments = options.arguments
+        if "-profile" in arguments:
+            profile = Path(arguments[arguments.index("-profile") + 1])
+            (profile / "prefs.js").write_text("// written by Firefox")
+            (profile / "parent.lock").write_text("")
+
+    def quit(self):
+        pass
+
+
+class ProfileTemplateTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        _FakeFirefox.launches = 0
+        for patch in (mock.patch.object(browser_factory.tempfile, "gettempdir", return_value=directory.name),
+                      mock.patch.object(browser_factory.webdriver, "Firefox", _FakeFirefox)):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_template_is_populated_once(self):
+        prefs = browser_factory.profile_prefs(self.directory / "downloads")
+        template = browser_factory.profile_template(prefs)
+        self.assertEqual(browser_factory.profile_template(prefs), template)
+        self.assertEqual(_FakeFirefox.launches, 1)
+        self.assertEqual(sorted(path.name for path in template.iterdir()),
+                         [".template-ready", "prefs.js", "user.js"])
+
+        clone = Path(browser_factory.clone_profile(template))
+        self.assertEqual(sorted(path.name for path in clone.iterdir()), ["prefs.js", "user.js"])
+
+    def test_a_failed_build_is_retried(self):
+        prefs = browser_factory.profile_prefs(self.directory / "downloads")
+        with mock.patch.object(browser_factory.webdriver, "Firefox", side_effect=WebDriverException("no firefox")), \
+                mock.patch("sys.stdout"):
+            staging = browser_factory.profile_template(prefs)
+        self.assertEqual([path.name for path in staging.iterdir()], ["user.js"])
+        self.assertTrue((browser_factory.profile_template(prefs) / "prefs.js").exists())
+
+
+class AfterStartTestCase(unittest.TestCase):
+    def test_hooks_see_every_new_session(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        calls = []
+        for patch in (mock.patch.object(browser_factory, "_after_start_hooks", []),
+                      mock.patch.object(browser_factory, "firefox_options", return_value=Options()),
+                      mock.patch.object(browser_factory.webdriver, "Firefox", _FakeFirefox),
+                      mock.patch.object(browser_factory, "STARTUP_TIMES_FILE", Path(directory.name) / "times")):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        @browser_factory.after_start
+        def hook(driver, started, seconds):
+            calls.append((driver, seconds >= 0))
+
+        driver = browser_factory.start_firefox()
+        self.assertEqual(calls, [(driver, True)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""BrowserPool and PooledBrowserTestCase with fake drivers instead of Firefox."""
+import unittest
+from unittest import mock
+
+from selenium.common.exceptions import WebDriverException
+
+import artifacts
+import browser_pool
+
+
+class _FakeDriver:
+    def __init__(self):
+        self.alive = True
+        self.quit_called = False
+
+    def quit(self):
+        self.quit_called = True
+
+    @property
+    def current_window_handle(self):
+        if not self.alive:
+            raise WebDriverException("browser crashed")
+        return "window-1"
+
+
+def _sample_suite():
+    class Sample(browser_pool.PooledBrowserTestCase):
+        def test_passes(self):
+            pass
+
+        def test_fails(self):
+            self.fail("wrong text")
+
+        def test_errors(self):
+            raise RuntimeError("boom")
+
+        def test_subtest_fails(self):
+            with self.subTest(record=1):
+                self.fail("bad record")
+
+    return unittest.defaultTestLoader.loadTestsFromTestCase(Sample)
+
+
+class BrowserPoolTestCase(unittest.TestCase):
+    def test_acquire_replaces_a_crashed_idle_driver(self):
+        pool = browser_pool.BrowserPool(factory=_FakeDriver)
+        first = pool.acquire()
+        with mock.patch.object(pool, "_reset", return_value=True):
+            pool.release(first)
+        first.alive = False
+        second = pool.acquire()
+        self.assertIsNot(second, first)
+        self.assertTrue(first.quit_called)
+
+    def test_broken_driver_is_not_reused(self):
+        pool = browser_pool.BrowserPool(factory=_FakeDriver)
+        first = pool.acquire()
+        pool.release(first, broken=True)
+        self.assertTrue(first.quit_called)
+        self.assertIsNot(pool.acquire(), first)
+
+
+class PooledBrowserTestCaseTestCase(unittest.TestCase):
+    def test_artifacts_are_captured_for_failed_tests_only(self):
+        pool = browser_pool.BrowserPool(factory=_FakeDriver)
+        with mock.patch.object(browser_pool, "get_pool", return_value=pool), \
+                mock.patch.object(pool, "_reset", return_value=True), \
+                mock.patch.object(artifacts, "capture_failure") as capture:
+            _sample_suite().run(unittest.TestResult())
+        captured = sorted(call.args[1].rsplit(".", 1)[-1] for call in capture.call_args_list)
+        self.assertEqual(captured, ["test_errors", "test_fails", "test_subtest_fails"])
+
+
+if __name__ == "__main__":
+    unittest.main()
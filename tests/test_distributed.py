@@ -0,0 +1,221 @@
+"""The coordinator/worker protocol of distributed.py, without browsers."""
+import io
+import json
+import os
+import socket
+import sys
+import tempfile
+import textwrap
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import distributed
+import reporting
+import result_cache
+
+SAMPLE_MODULE = "distributed_sample_tests"
+
+
+class _Client:
+    """The coordinator's side of a raw worker connection."""
+
+    def __init__(self, address, host="test"):
+        self.sock = socket.create_connection(address, timeout=10)
+        self.lines = self.sock.makefile("r", encoding="utf-8")
+        self.send({"type": "hello", "host": host, "pid": id(self)})
+        self.welcome = self.receive()
+        assert self.welcome["type"] == "welcome"
+
+    def send(self, message):
+        self.sock.sendall((json.dumps(message) + "\n").encode("utf-8"))
+
+    def receive(self):
+        return json.loads(self.lines.readline())
+
+    def request(self):
+        self.send({"type": "request"})
+        return self.receive()
+
+    def result(self, unit, test_id, outcome="passed"):
+        self.send({"type": "result", "unit": unit,
+                   "record": {"id": test_id, "outcome": outcome, "duration": 0.1, "output": "", "details": ""}})
+
+    def close(self):
+        self.lines.close()
+        self.sock.close()
+
+
+class MakeUnitsTestCase(unittest.TestCase):
+    def test_units_hold_one_class_and_run_longest_first(self):
+        tests = ["m.A.t1", "m.A.t2", "m.A.t3", "m.B.t1"]
+        units = distributed.make_units(tests, {"m.A.t1": 1.0, "m.A.t2": 1.0, "m.A.t3": 1.0, "m.B.t1": 5.0},
+                                       unit_size=2)
+        self.assertEqual(units, [["m.B.t1"], ["m.A.t1", "m.A.t2"], ["m.A.t3"]])
+
+
+class CoordinatorTestCase(unittest.TestCase):
+    def start(self, units, **options):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        coordinator = distributed.Coordinator(units, port=0, artifacts_root=self.directory / "artifacts",
+                                              **options)
+        coordinator.start()
+        self.addCleanup(coordinator.stop)
+        client = _Client(coordinator.address)
+        self.addCleanup(client.close)
+        return coordinator, client
+
+    def test_tests_without_result_are_requeued(self):
+        coordinator, client = self.start([["m.A.t1", "m.A.t2"]])
+        unit = client.request()
+        client.result(unit["unit"], "m.A.t1")
+        client.send({"type": "unit_done", "unit": unit["unit"]})
+
+        retry = client.request()
+        self.assertEqual((retry["tests"], retry["attempt"]), (["m.A.t2"], 2))
+        client.result(retry["unit"], "m.A.t2")
+        client.send({"type": "unit_done", "unit": retry["unit"]})
+        self.assertTrue(coordinator.wait(timeout=10))
+        self.assertEqual({test_id: record["outcome"] for test_id, record in coordinator.records.items()},
+                         {"m.A.t1": "passed", "m.A.t2": "passed"})
+
+    def test_a_test_that_never_reports_becomes_an_error(self):
+        coordinator, client = self.start([["m.A.t1"]])
+        for _ in range(distributed.MAX_ATTEMPTS):
+            unit = client.request()
+            client.send({"type": "unit_done", "unit": unit["unit"]})
+        self.assertTrue(coordinator.wait(timeout=10))
+        self.assertEqual(coordinator.records["m.A.t1"]["outcome"], "error")
+        self.assertEqual(client.request()["type"], "done")
+
+    def test_stolen_tests_are_not_requeued_when_the_owner_finishes(self):
+        coordinator, owner = self.start([["m.A.t1", "m.A.t2", "m.A.t3", "m.A.t4"]])
+        thief = _Client(coordinator.address)
+        self.addCleanup(thief.close)
+        unit = owner.request()
+        stolen = thief.request()
+        self.assertEqual(stolen["tests"], ["m.A.t3", "m.A.t4"])
+        self.assertEqual(owner.receive(), {"type": "revoke", "unit": unit["unit"], "tests": ["m.A.t3", "m.A.t4"]})
+
+        for test_id in ("m.A.t1", "m.A.t2"):
+            owner.result(unit["unit"], test_id)
+        owner.send({"type": "unit_done", "unit": unit["unit"]})
+        # Nothing was requeued: the owner's next unit is stolen back from the thief
+        self.assertEqual(owner.request()["tests"], ["m.A.t4"])
+        self.assertEqual(coordinator.stats["requeued"], 0)
+
+    def test_a_worker_that_makes_no_progress_is_dropped(self):
+        with mock.patch.object(distributed, "HEARTBEAT_INTERVAL", 0.05):
+            coordinator, hung = self.start([["m.A.t1", "m.A.t2"]], test_timeout=0.3)
+            unit = hung.request()
+            hung.send({"type": "start", "unit": unit["unit"], "test": "m.A.t1"})
+            # Heartbeats alone do not keep it: its browser is stuck in m.A.t1
+            while not coordinator.lost_workers:
+                try:
+                    hung.send({"type": "heartbeat"})
+                except OSError:
+                    break
+                threading.Event().wait(0.05)
+        self.assertEqual(hung.lines.readline(), "")
+        self.assertEqual(coordinator.lost_workers, [hung.welcome["name"]])
+
+        other = _Client(coordinator.address)
+        self.addCleanup(other.close)
+        # The suspect goes to the back, behind the test that never started
+        self.assertEqual([other.request()["tests"] for _ in range(2)], [["m.A.t2"], ["m.A.t1"]])
+
+    def test_artifacts_stay_inside_the_artifacts_directory(self):
+        coordinator, _ = self.start([["m.A.t1"]])
+        intruder = _Client(coordinator.address, host="../../outside")
+        self.addCleanup(intruder.close)
+        self.assertNotIn("/", intruder.welcome["name"])
+        for path in ("../../../escaped.txt", "/tmp/escaped.txt", "run/m.A.t1/001-failure.png"):
+            intruder.send({"type": "artifact", "path": path, "offset": 0, "data": "eA==", "last": True})
+        intruder.send({"type": "heartbeat"})
+        # Nothing answers a heartbeat; a request shows the artifacts were handled
+        self.assertEqual(intruder.request()["type"], "unit")
+        root = (self.directory / "artifacts").resolve()
+        written = sorted(path.relative_to(root).as_posix() for path in root.rglob("*") if path.is_file())
+        name = intruder.welcome["name"]
+        self.assertEqual(written, [f"{name}/_/_/_/escaped.txt", f"{name}/run/m.A.t1/001-failure.png",
+                                   f"{name}/tmp/escaped.txt"])
+        self.assertEqual([path for path in self.directory.rglob("escaped.txt") if root not in path.parents], [])
+
+
+class WorkerConfigurationTestCase(unittest.TestCase):
+    def test_every_worker_gets_its_own_download_directory(self):
+        directories = []
+        for index in (0, 1):
+            # What a local worker process inherits from the shell that started `local`
+            with mock.patch.dict(os.environ, {"SELENIUM_DOWNLOAD_DIR": "/shared/downloads"}):
+                distributed.Worker("127.0.0.1", 0)._configure(index)
+                directories.append(os.environ["SELENIUM_DOWNLOAD_DIR"])
+        self.assertEqual(directories, ["/shared/downloads/worker-0", "/shared/downloads/worker-1"])
+
+
+class WorkerRevocationTestCase(unittest.TestCase):
+    """A test revoked from one unit still runs when it comes back in another."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        Path(directory.name, f"{SAMPLE_MODULE}.py").write_text(textwrap.dedent("""
+            import unittest
+
+            class Sample(unittest.TestCase):
+                def test_one(self):
+                    pass
+
+                def test_two(self):
+                    pass
+        """))
+        sys.path.insert(0, directory.name)
+        self.addCleanup(sys.path.remove, directory.name)
+        self.addCleanup(sys.modules.pop, SAMPLE_MODULE, None)
+        for patch in (mock.patch.object(reporting, "reporter", reporting.Reporter(Path(directory.name))),
+                      mock.patch.object(result_cache, "cache",
+                                        result_cache.ResultCache(Path(directory.name) / "cache.json"))):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        self.worker = distributed.Worker("127.0.0.1", 0)
+        self.worker._sock, self.coordinator_end = socket.socketpair()
+        self.addCleanup(self.worker._sock.close)
+        self.addCleanup(self.coordinator_end.close)
+        self.messages = self.coordinator_end.makefile("r", encoding="utf-8")
+        threading.Thread(target=self.worker._read, daemon=True).start()
+        self.resultclass = type("_WorkerResult", (distributed._StreamingResult, reporting.ReportingTestResult), {})
+
+    def send(self, message):
+        self.coordinator_end.sendall((json.dumps(message) + "\n").encode("utf-8"))
+
+    def run_unit(self, unit_id, test_ids):
+        with mock.patch("sys.stderr", io.StringIO()):
+            self.worker._run_unit(unit_id, test_ids, self.resultclass)
+        results = []
+        while True:
+            message = json.loads(self.messages.readline())
+            if message["type"] == "unit_done":
+                return results
+            if message["type"] == "result":
+                results.append(message["record"]["id"].rpartition(".")[2])
+
+    def test_revocation_is_scoped_to_its_unit(self):
+        one, two = f"{SAMPLE_MODULE}.Sample.test_one", f"{SAMPLE_MODULE}.Sample.test_two"
+        self.send({"type": "unit", "unit": 1, "tests": [one, two], "attempt": 1})
+        self.send({"type": "revoke", "unit": 1, "tests": [two]})
+        self.assertEqual(self.worker._reply()["unit"], 1)
+        self.assertEqual(self.run_unit(1, [one, two]), ["test_one"])
+        self.assertEqual(self.worker.revoked, {})
+
+        # The thief died and test_two comes back to this worker
+        self.send({"type": "unit", "unit": 7, "tests": [two], "attempt": 2})
+        self.assertEqual(self.worker._reply()["unit"], 7)
+        self.assertEqual(self.run_unit(7, [two]), ["test_two"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""DomSnapshot queries and text on payloads shaped like the output of _SERIALIZE_JS."""
+import json
+import unittest
+
+from dom_snapshot import DomSnapshot
+
+
+def _element(tag, children=(), display="block", visible=True, state=None, **attributes):
+    return [tag, {name.rstrip("_"): value for name, value in attributes.items()}, visible,
+            list(children), state, display]
+
+
+def _span(*children, **attributes):
+    return _element("span", children, display="inline", **attributes)
+
+
+def _snapshot(*body):
+    root = _element("html", [_element("head"), " ", _element("body", body)])
+    return DomSnapshot.from_json(json.dumps(["Practice", "http://127.0.0.1/buttons.php", root]))
+
+
+class TextTestCase(unittest.TestCase):
+    def test_whitespace_between_inline_elements_separates_words(self):
+        # <p><span>a</span> <span>b</span></p>: the serializer keeps the space as " "
+        page = _snapshot(_element("p", [_span("a"), " ", _span("b")], id="result"))
+        self.assertEqual(page.text_of("#result"), "a b")
+        self.assertEqual(page.by_id("result").text_content, "a b")
+
+    def test_br_breaks_the_line(self):
+        page = _snapshot(_element("p", ["first", _element("br", display="inline"), "second"], id="result"))
+        self.assertEqual(page.text_of("#result"), "first\nsecond")
+        self.assertEqual(page.by_id("result").text_content, "firstsecond")
+
+    def test_block_elements_are_separate_lines(self):
+        page = _snapshot(_element("div", [_element("div", ["one"]), " ", _element("div", ["two"])], id="list"))
+        self.assertEqual(page.text_of("#list"), "one\ntwo")
+
+    def test_hidden_elements_have_no_visible_text(self):
+        page = _snapshot(_element("p", ["shown ", _span("hidden", visible=False)], id="result"))
+        self.assertEqual(page.text_of("#result"), "shown")
+        self.assertEqual(page.by_id("result").text_content, "shown hidden")
+
+    def test_text_of_without_match_is_empty(self):
+        self.assertEqual(_snapshot().text_of("#missing"), "")
+
+
+class SelectorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.page = _snapshot(
+            _element("form", [
+                _element("input", display="inline-block", id="fullname", type="text", state=["Jane", False, False]),
+                _element("input", display="inline-block", id="yes", name="like", type="radio",
+                         state=["Yes", True, False]),
+                _element("input", display="inline-block", id="no", name="like", type="radio",
+                         state=["No", False, True]),
+            ], id="form"),
+            _element("div", [_element("p", ["Clicked"], class_="result text-success")], class_="box"),
+        )
+
+    def _ids(self, nodes):
+        return [node.id or node.tag for node in nodes]
+
+    def test_css_compounds_and_combinators(self):
+        self.assertEqual(self._ids(self.page.select("form > input[type=radio]")), ["yes", "no"])
+        self.assertEqual(self._ids(self.page.select("body input#fullname")), ["fullname"])
+        self.assertEqual(self._ids(self.page.select("div.box p.result")), ["p"])
+        self.assertEqual(self._ids(self.page.select("body > input")), [])
+
+    def test_comma_groups_keep_document_order(self):
+        self.assertEqual(self._ids(self.page.select("p, #fullname")), ["fullname", "p"])
+
+    def test_attribute_operators(self):
+        self.assertEqual(self._ids(self.page.select("[id^=full]")), ["fullname"])
+        self.assertEqual(self._ids(self.page.select("[class~=text-success]")), ["p"])
+        self.assertEqual(self._ids(self.page.select("[name]")), ["yes", "no"])
+
+    def test_unsupported_selector_raises(self):
+        with self.assertRaises(ValueError):
+            self.page.select("input:checked")
+
+    def test_xpath(self):
+        self.assertEqual(self._ids(self.page.xpath("//input[@name='like']")), ["yes", "no"])
+        self.assertEqual(self._ids(self.page.xpath("/html/body/form/input[1]")), ["fullname"])
+
+    def test_form_state(self):
+        self.assertEqual(self.page.by_id("fullname").value, "Jane")
+        self.assertTrue(self.page.by_id("yes").selected)
+        self.assertFalse(self.page.by_id("no").enabled)
+        self.assertEqual(self._ids(self.page.by_class("result")), ["p"])
+
+
+if __name__ == "__main__":
+    unittest.main()
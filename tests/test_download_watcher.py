@@ -0,0 +1,104 @@
+"""DownloadWatcher on a plain directory: finished files, partial files, startup failures."""
+import ctypes
+import errno
+import io
+import os
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import download_watcher
+from download_watcher import DownloadWatcher, sha256_of
+
+
+class _FailingLibc:
+    """libc whose inotify_init1 or inotify_add_watch fails like at the instance limit."""
+
+    def __init__(self, fail_add_watch=False):
+        self.fail_add_watch = fail_add_watch
+        self.opened = []
+
+    def inotify_init1(self, flags):
+        if not self.fail_add_watch:
+            ctypes.set_errno(errno.EMFILE)
+            return -1
+        self.opened.append(os.open(os.devnull, os.O_RDONLY))
+        return self.opened[-1]
+
+    def inotify_add_watch(self, fd, path, mask):
+        ctypes.set_errno(errno.ENOSPC)
+        return -1
+
+
+class DownloadWatcherTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def start(self, watcher):
+        # start() must return even when the watch cannot be set up
+        thread = threading.Thread(target=watcher.start, daemon=True)
+        with mock.patch("sys.stdout", io.StringIO()):
+            thread.start()
+            thread.join(timeout=5)
+        self.assertFalse(thread.is_alive(), "DownloadWatcher.start() did not return")
+        self.addCleanup(watcher.stop)
+        return watcher
+
+    def download(self, name, data):
+        """Write like Firefox: into name.part, then rename it over the final name."""
+        partial = self.directory / f"{name}.part"
+        partial.write_bytes(data)
+        os.replace(partial, self.directory / name)
+        return self.directory / name
+
+    def assert_reports_downloads(self, watcher):
+        pending = watcher.expect("sample.txt")
+        path = self.download("sample.txt", b"hello download")
+        result = pending.result(timeout=5)
+        self.assertEqual(result.path, path)
+        self.assertEqual(result.size, len(b"hello download"))
+        self.assertEqual(result.sha256, sha256_of(path))
+
+    def test_reports_a_finished_download(self):
+        self.assert_reports_downloads(self.start(DownloadWatcher(self.directory, poll_interval=0.05)))
+
+    def test_polls_when_inotify_cannot_be_initialised(self):
+        libc = _FailingLibc()
+        with mock.patch.object(download_watcher, "_inotify_available", return_value=True), \
+                mock.patch.object(download_watcher.ctypes, "CDLL", return_value=libc):
+            watcher = self.start(DownloadWatcher(self.directory, poll_interval=0.05))
+        self.assertEqual(watcher._thread._target, watcher._watch_polling)
+        self.assert_reports_downloads(watcher)
+
+    def test_polls_when_the_directory_cannot_be_watched(self):
+        libc = _FailingLibc(fail_add_watch=True)
+        with mock.patch.object(download_watcher, "_inotify_available", return_value=True), \
+                mock.patch.object(download_watcher.ctypes, "CDLL", return_value=libc):
+            watcher = self.start(DownloadWatcher(self.directory, poll_interval=0.05))
+        self.assertEqual(watcher._thread._target, watcher._watch_polling)
+        # The descriptor of the failed watch is not leaked
+        self.assertRaises(OSError, os.fstat, libc.opened[0])
+        self.assert_reports_downloads(watcher)
+
+    def test_ignores_partial_and_existing_files(self):
+        (self.directory / "old.txt").write_bytes(b"from an earlier run")
+        watcher = self.start(DownloadWatcher(self.directory, poll_interval=0.05))
+        (self.directory / "pending.txt.part").write_bytes(b"not finished")
+        pending = watcher.expect()
+        self.assertRaises(TimeoutError, pending.result, timeout=0.3)
+
+    def test_download_before_expect_is_kept(self):
+        watcher = self.start(DownloadWatcher(self.directory, poll_interval=0.05))
+        first = watcher.expect("first.txt")
+        self.download("second.txt", b"2")
+        self.download("first.txt", b"1")
+        self.assertEqual(first.result(timeout=5).path.name, "first.txt")
+        self.assertEqual(watcher.expect("second.txt").result(timeout=5).path.name, "second.txt")
+
+
+if __name__ == "__main__":
+    unittest.main()
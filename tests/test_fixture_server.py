@@ -0,0 +1,71 @@
+"""The local fixture server: cached pages, generated downloads and uploads."""
+import hashlib
+import http.client
+import json
+import unittest
+from urllib.parse import urlsplit
+
+import large_files
+from fixture_server import DOWNLOAD_PATH, FixtureServer
+
+
+class FixtureServerTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = FixtureServer().start()
+        cls.prefix = urlsplit(cls.server.base_url).path
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def request(self, method, path, body=None, headers=None):
+        host, port = self.server.httpd.server_address[:2]
+        connection = http.client.HTTPConnection(host, port, timeout=10)
+        self.addCleanup(connection.close)
+        connection.request(method, path, body=body, headers=headers or {})
+        response = connection.getresponse()
+        return response, response.read()
+
+    def test_pages_revalidate_with_304(self):
+        response, body = self.request("GET", f"{self.prefix}/buttons.php")
+        self.assertEqual(response.status, 200)
+        self.assertIn(b"Click Me", body)
+        etag = response.getheader("ETag")
+        response, body = self.request("GET", f"{self.prefix}/buttons.php", headers={"If-None-Match": etag})
+        self.assertEqual((response.status, body), (304, b""))
+
+    def test_unknown_pages_are_404(self):
+        self.assertEqual(self.request("GET", f"{self.prefix}/../README.md")[0].status, 404)
+        self.assertEqual(self.request("GET", f"{self.prefix}/missing.php")[0].status, 404)
+
+    def test_download_button_file(self):
+        response, body = self.request("GET", DOWNLOAD_PATH)
+        self.assertEqual(response.getheader("Content-Type"), "image/jpeg")
+        self.assertTrue(body.startswith(b"\xff\xd8"))
+
+    def test_generated_files_match_their_digest(self):
+        size = large_files.CHUNK_SIZE * 2 + 123
+        response, body = self.request("GET", f"{self.prefix}/generated/{size}.bin?kind=random&seed=3")
+        self.assertEqual(int(response.getheader("Content-Length")), size)
+        expected = hashlib.sha256()
+        for chunk in large_files.iter_chunks(size, "random", 3):
+            expected.update(chunk)
+        self.assertEqual(hashlib.sha256(body).hexdigest(), expected.hexdigest())
+
+    def test_invalid_generated_files_are_rejected_before_the_headers(self):
+        for path in ("generated/1024.bin?kind=bogus", "generated/-5.bin", "generated/abc.bin"):
+            with self.subTest(path=path):
+                response, _ = self.request("GET", f"{self.prefix}/{path}")
+                self.assertEqual(response.status, 404)
+        # The server is still answering
+        self.assertEqual(self.request("GET", f"{self.prefix}/generated/10.bin")[1], bytes(10))
+
+    def test_upload_reports_size_and_digest(self):
+        data = b"upload me" * 1000
+        response, body = self.request("POST", f"{self.prefix}/upload", body=data)
+        self.assertEqual(json.loads(body), {"received": len(data), "sha256": hashlib.sha256(data).hexdigest()})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+"""Generated large files: sizes, chunks and streaming digests."""
+import hashlib
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import large_files
+from large_files import LargeFile, format_size, iter_chunks, parse_size
+
+
+class LargeFilesTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        patch = mock.patch.object(large_files, "DIGEST_CACHE", self.directory / "digests.json")
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_sizes(self):
+        self.assertEqual(parse_size("512K"), 512 * 1024)
+        self.assertEqual(parse_size("1.5G"), int(1.5 * 1024 ** 3))
+        self.assertEqual(parse_size("100"), 100)
+        self.assertRaises(ValueError, parse_size, "lots")
+        self.assertEqual(format_size(256 * 1024 ** 2), "256MB")
+
+    def test_invalid_arguments_fail_before_the_first_chunk(self):
+        self.assertRaises(ValueError, iter_chunks, 10, "bogus")
+        self.assertRaises(ValueError, iter_chunks, -1)
+
+    def test_chunks_add_up_and_random_chunks_differ(self):
+        chunks = list(iter_chunks(10, "random", seed=1, chunk_size=4))
+        self.assertEqual([len(chunk) for chunk in chunks], [4, 4, 2])
+        self.assertEqual(b"".join(chunks), b"".join(iter_chunks(10, "random", seed=1, chunk_size=4)))
+        big = list(iter_chunks(64, "random", seed=1, chunk_size=32))
+        self.assertNotEqual(big[0], big[1])
+
+    def test_written_file_matches_the_streamed_digest(self):
+        for kind in large_files.KINDS:
+            with self.subTest(kind=kind):
+                large_file = LargeFile(large_files.CHUNK_SIZE + 7, kind, seed=2, directory=self.directory)
+                self.addCleanup(large_file.remove)
+                self.assertEqual(hashlib.sha256(large_file.path.read_bytes()).hexdigest(), large_file.digest)
+                self.assertEqual(large_files.hash_file(large_file.path), large_file.digest)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+"""Latency history: percentiles, adaptive timeouts, per-site keys and the waits using them."""
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+
+import config
+import latency
+import waits
+from latency import LatencyHistory, site_key
+
+
+class LatencyHistoryTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "history.json"
+        self.history = LatencyHistory(self.path)
+        for name, value in (("ADAPTIVE_TIMEOUTS", True), ("TIMEOUT_MARGIN", 3.0),
+                            ("TIMEOUT_MIN", 1.0), ("TIMEOUT_MAX", 30.0)):
+            patch = mock.patch.object(config, name, value)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def record(self, key, samples):
+        for seconds in samples:
+            self.history.record(key, seconds)
+
+    def test_percentiles(self):
+        # 1..100 ms in shuffled order
+        self.record("step", [((index * 37) % 100 + 1) / 1000 for index in range(100)])
+        self.assertEqual(self.history.percentile("step", 0.5), 0.051)
+        self.assertEqual(self.history.percentile("step", 0.99), 0.1)
+        self.assertEqual(self.history.percentile("step", 1.0), 0.1)
+        self.assertEqual(self.history.percentile("step", 0.0), 0.001)
+        self.assertIsNone(self.history.percentile("other", 0.5))
+
+    def test_default_until_enough_samples(self):
+        self.record("step", [0.5] * (latency.MIN_SAMPLES - 1))
+        self.assertEqual(self.history.timeout_for("step", default=7), 7)
+        self.assertIsNone(self.history.percentile("step", 0.99))
+
+    def test_timeout_is_p99_times_margin_clamped(self):
+        self.record("step", [0.5] * 99 + [2.0])
+        self.assertEqual(self.history.percentile("step", 0.99), 2.0)
+        self.assertEqual(self.history.timeout_for("step"), 6.0)
+        self.record("fast", [0.01] * 100)
+        self.assertEqual(self.history.timeout_for("fast"), 1.0)
+        self.record("slow", [20.0] * 100)
+        self.assertEqual(self.history.timeout_for("slow"), 30.0)
+
+    def test_explicit_timeout_wins(self):
+        self.record("step", [0.5] * 100)
+        self.assertEqual(self.history.timeout_for("step", 12), 12)
+
+    def test_poll_interval_follows_the_median(self):
+        self.record("step", [0.4] * 100)
+        self.assertAlmostEqual(self.history.poll_interval_for("step"), 0.1)
+
+    def test_keeps_the_last_samples_and_merges_on_save(self):
+        self.record("step", range(latency.HISTORY_SIZE + 10))
+        self.assertEqual(len(self.history.samples["step"]), latency.HISTORY_SIZE)
+        self.history.save()
+        other = LatencyHistory(self.path)
+        other.record("step", 1.0)
+        other.save()
+        self.assertEqual(LatencyHistory(self.path).samples["step"][-1], 1.0)
+
+
+class SiteKeyTestCase(unittest.TestCase):
+    def test_loopback_servers_share_one_site(self):
+        for url in ("http://127.0.0.1:41234/selenium/practice/buttons.php",
+                    "http://localhost:8000/selenium/practice", "local"):
+            self.assertEqual(site_key("navigate:/x", url), "navigate:/x@local")
+
+    def test_live_pages_are_their_own_site(self):
+        self.assertEqual(site_key("navigate:/x", "https://www.tutorialspoint.com/selenium/practice/x"),
+                         "navigate:/x@www.tutorialspoint.com")
+
+    def test_waits_use_the_site_of_the_current_page(self):
+        driver = mock.Mock(current_url="http://example.com:8080/form")
+        with mock.patch.object(config, "BASE_URL", "https://www.tutorialspoint.com/selenium/practice"):
+            self.assertEqual(latency.page_key(driver, "wait_for_result:id=check"),
+                             "wait_for_result:id=check@example.com:8080")
+        driver.current_url = "about:blank"
+        self.assertEqual(latency.page_key(driver, "wait_for_page_ready:interactive"),
+                         "wait_for_page_ready:interactive@about")
+
+    def test_local_runs_do_not_shorten_live_timeouts(self):
+        history = LatencyHistory(Path(tempfile.gettempdir()) / "unused-latency-history.json")
+        path = "/selenium/practice/buttons.php"
+        for _ in range(100):
+            history.record(site_key(f"navigate:{path}", f"http://127.0.0.1:8000{path}"), 0.01)
+        live = site_key(f"navigate:{path}", f"https://www.tutorialspoint.com{path}")
+        self.assertEqual(history.timeout_for(live, default=30), 30)
+
+
+class _Document:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def is_enabled(self):
+        self.driver.poll()
+        if self.driver.document is not self:
+            raise StaleElementReferenceException("replaced")
+        return True
+
+
+class _NavigatingDriver:
+    """Replaces its document a few polls after a click, like a slow form submission."""
+
+    def __init__(self, polls):
+        self.current_url = "http://127.0.0.1:8000/text-box.php"
+        self.document = self.old_document = _Document(self)
+        self.polls_left = None
+        self.polls = polls
+        self.events = []
+
+    def find_element(self, by, value):
+        return self.document
+
+    def click(self):
+        self.events.append("click")
+        self.polls_left = self.polls
+
+    def poll(self):
+        if self.polls_left is not None:
+            self.polls_left -= 1
+            if self.polls_left <= 0:
+                self.document = _Document(self)
+
+    def set_script_timeout(self, seconds):
+        pass
+
+    def execute_async_script(self, script, *args):
+        self.events.append("ready" if self.document is not self.old_document else "ready on the old page")
+        return {"state": "interactive"}
+
+
+class WaitForNavigationTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patch = mock.patch.object(latency, "history", LatencyHistory(Path(directory.name) / "history.json"))
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_waits_for_the_old_page_to_go_before_checking_readiness(self):
+        driver = _NavigatingDriver(polls=3)
+        self.assertEqual(waits.wait_for_navigation(driver, driver.click, timeout=5), "interactive")
+        self.assertEqual(driver.events, ["click", "ready"])
+
+    def test_a_click_that_does_not_navigate_times_out(self):
+        driver = _NavigatingDriver(polls=3)
+        with self.assertRaises(TimeoutException):
+            waits.wait_for_navigation(driver, lambda: None, timeout=0.3)
+        self.assertEqual(driver.events, [])
+
+if __name__ == "__main__":
+    unittest.main()
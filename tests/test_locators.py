@@ -0,0 +1,62 @@
+"""compile_locator: which XPaths become ID/CSS lookups and which stay XPath."""
+import unittest
+
+from selenium.webdriver.common.by import By
+
+from locators import compile_locator
+from pages import PAGES
+
+
+class CompileLocatorTestCase(unittest.TestCase):
+    def assertCompiles(self, xpath, expected):
+        self.assertEqual(compile_locator((By.XPATH, xpath)), expected)
+
+    def assertStaysXPath(self, xpath):
+        self.assertEqual(compile_locator((By.XPATH, xpath)), (By.XPATH, xpath))
+
+    def test_id_predicate(self):
+        self.assertCompiles("//*[@id='check']", (By.ID, "check"))
+        self.assertCompiles("//input[@id='fullname']", (By.CSS_SELECTOR, "input#fullname"))
+        # Not a CSS identifier: an attribute selector instead of #1st
+        self.assertCompiles("//*[@id='1st']", (By.CSS_SELECTOR, '[id="1st"]'))
+
+    def test_steps_and_positions(self):
+        self.assertCompiles("//div[@class='a b']//div[5]", (By.CSS_SELECTOR, 'div[class="a b"] div:nth-of-type(5)'))
+        self.assertCompiles("//form/div/input", (By.CSS_SELECTOR, "form > div > input"))
+        self.assertCompiles("//ul/*[2]", (By.CSS_SELECTOR, "ul > :nth-child(2)"))
+
+    def test_attribute_functions_and_and(self):
+        self.assertCompiles("//a[contains(@href, 'download') and @download]",
+                            (By.CSS_SELECTOR, 'a[href*="download"][download]'))
+        self.assertCompiles("//input[starts-with(@name, \"like\")][@type='radio']",
+                            (By.CSS_SELECTOR, 'input[name^="like"][type="radio"]'))
+        self.assertCompiles("//a[contains(@href, '')]", (By.CSS_SELECTOR, "a[href]"))
+
+    def test_quotes_are_escaped(self):
+        self.assertCompiles("//input[@value='say \"hi\"']", (By.CSS_SELECTOR, 'input[value="say \\"hi\\""]'))
+
+    def test_unsupported_xpaths_stay(self):
+        for xpath in ("//button[normalize-space()='Click Me']",
+                      "//label[text()='Yes']",
+                      "//input[@type='radio'][2]",
+                      "//div/..",
+                      "/html/body",
+                      "//input[@a='x' or @b='y']",
+                      "//div[@id='unclosed'"):
+            with self.subTest(xpath=xpath):
+                self.assertStaysXPath(xpath)
+
+    def test_other_locators_are_untouched(self):
+        self.assertEqual(compile_locator((By.ID, "x")), (By.ID, "x"))
+        self.assertEqual(compile_locator((By.CSS_SELECTOR, "#x")), (By.CSS_SELECTOR, "#x"))
+
+    def test_page_objects_use_the_compiled_locator(self):
+        self.assertEqual(PAGES["text-box.php"].full_name.locator, (By.CSS_SELECTOR, "input#fullname"))
+        self.assertEqual(PAGES["radio-button.php"].no_option.locator,
+                         (By.CSS_SELECTOR, 'div[class="col-md-8 col-lg-8 col-xl-8"] div:nth-of-type(5)'))
+        click_me = PAGES["buttons.php"].click_me
+        self.assertEqual(click_me.locator, click_me.source)
+
+
+if __name__ == "__main__":
+    unittest.main()
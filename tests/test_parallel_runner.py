@@ -0,0 +1,87 @@
+"""Shard balancing and a small parallel run of browser-free sample tests."""
+import os
+import sys
+import tempfile
+import textwrap
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import parallel_runner
+import result_cache
+from parallel_runner import make_shards
+
+SAMPLE_MODULE = "parallel_sample_tests"
+
+
+class MakeShardsTestCase(unittest.TestCase):
+    def test_balances_expected_durations(self):
+        tests = ["m.A.t1", "m.A.t2", "m.B.t1", "m.B.t2"]
+        shards = make_shards(tests, 2, {"m.A.t1": 8.0, "m.A.t2": 1.0, "m.B.t1": 4.0, "m.B.t2": 4.0})
+        self.assertEqual(shards, [["m.A.t1", "m.A.t2"], ["m.B.t1", "m.B.t2"]])
+
+    def test_unknown_tests_count_as_the_median(self):
+        shards = make_shards(["m.A.t1", "m.A.t2", "m.A.t3"], 2, {"m.A.t1": 2.0, "m.A.t2": 2.0})
+        self.assertEqual(sorted(len(shard) for shard in shards), [1, 2])
+
+    def test_keeps_definition_order_within_a_shard(self):
+        tests = [f"m.A.t{index}" for index in range(6)]
+        (shard,) = make_shards(tests, 1, {})
+        self.assertEqual(shard, tests)
+
+    def test_never_more_shards_than_tests(self):
+        self.assertEqual(len(make_shards(["m.A.t1"], 4, {})), 1)
+
+
+class RunParallelTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        (self.directory / f"{SAMPLE_MODULE}.py").write_text(textwrap.dedent("""
+            import os
+            import unittest
+
+            class Sample(unittest.TestCase):
+                def test_worker(self):
+                    print(os.getpid(), os.environ["SELENIUM_WORKER_INDEX"])
+
+                def test_subtest_fails(self):
+                    with self.subTest("always"):
+                        self.fail("sample failure")
+        """) + "".join(f"\n    def test_{index}(self):\n        print(os.getpid(), os.environ['SELENIUM_WORKER_INDEX'])\n"
+                       for index in range(6)))
+        sys.path.insert(0, str(self.directory))
+        self.addCleanup(sys.path.remove, str(self.directory))
+        self.addCleanup(sys.modules.pop, SAMPLE_MODULE, None)
+        environment = {"SELENIUM_REPORT_DIR": str(self.directory / "reports"),
+                       "SELENIUM_RESULT_CACHE": str(self.directory / "cache.json"),
+                       "SELENIUM_ARTIFACTS_DIR": str(self.directory / "artifacts"),
+                       "SELENIUM_LATENCY_HISTORY": str(self.directory / "latency.json"),
+                       "SELENIUM_REPORT_ECHO": "0",
+                       "PYTHONPATH": os.pathsep.join([str(self.directory)] + sys.path)}
+        for patch in (mock.patch.dict(os.environ, environment),
+                      mock.patch.object(result_cache, "cache",
+                                        result_cache.ResultCache(self.directory / "cache.json")),
+                      mock.patch("builtins.print")):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_every_shard_runs_in_a_fresh_process(self):
+        report = parallel_runner.run_parallel([SAMPLE_MODULE], 4, self.directory / "durations.json",
+                                              self.directory / "report.json")
+        self.assertEqual(report["counts"], {"passed": 7, "failed": 1})
+        by_worker = {}
+        for record in report["tests"]:
+            if record["outcome"] == "passed":
+                pid, index = record["output"].split()
+                self.assertEqual(int(index), record["worker"])
+                by_worker.setdefault(record["worker"], set()).add(pid)
+        pids = [pid for pids in by_worker.values() for pid in pids]
+        # A process that ran two shards would show up under two worker indexes
+        self.assertEqual(len(pids), len(set(pids)))
+        self.assertTrue(all(len(pids) == 1 for pids in by_worker.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+"""Outcomes in the event stream, the JUnit file and the parallel runner's records."""
+import io
+import json
+import tempfile
+import unittest
+import xml.etree.ElementTree as ElementTree
+from pathlib import Path
+from unittest import mock
+
+import reporting
+import result_cache
+from parallel_runner import _RecordingResult
+
+
+def _sample_suite():
+    # Defined here so that test runners do not collect the failing samples themselves
+    class Sample(unittest.TestCase):
+        def test_passes(self):
+            pass
+
+        def test_subtest_fails(self):
+            for value in (1, 2, 3):
+                with self.subTest(value=value):
+                    self.assertNotEqual(value, 2)
+
+        def test_subtest_errors(self):
+            with self.subTest("broken"):
+                raise KeyError("missing")
+
+    return unittest.defaultTestLoader.loadTestsFromTestCase(Sample)
+
+
+class ReportingTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.reporter = reporting.Reporter(self.directory)
+        self.cache = result_cache.ResultCache(self.directory / "cache.json")
+        for patch in (mock.patch.object(reporting, "reporter", self.reporter),
+                      mock.patch.object(result_cache, "cache", self.cache)):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def run_sample(self, resultclass):
+        result = unittest.TextTestRunner(stream=io.StringIO(), resultclass=resultclass).run(_sample_suite())
+        self.reporter.close()
+        return result
+
+    def outcomes(self):
+        events = [json.loads(line) for line in (self.directory / "events.jsonl").read_text().splitlines()]
+        return {event["test"].rpartition(".")[2]: event for event in events if event["event"] == "test_end"}
+
+    def test_failing_subtests_are_reported(self):
+        result = self.run_sample(reporting.ReportingTestResult)
+        self.assertFalse(result.wasSuccessful())
+        outcomes = self.outcomes()
+        self.assertEqual(outcomes["test_passes"]["outcome"], "passed")
+        self.assertEqual(outcomes["test_subtest_fails"]["outcome"], "failed")
+        self.assertIn("(value=2)", outcomes["test_subtest_fails"]["details"])
+        self.assertEqual(outcomes["test_subtest_errors"]["outcome"], "error")
+        junit = (self.directory / "junit.xml").read_text()
+        self.assertEqual(junit.count("<failure "), 1)
+        self.assertEqual(junit.count("<error "), 1)
+
+    def test_recording_result_records_failing_subtests(self):
+        resultclass = type("_ShardResult", (_RecordingResult, reporting.ReportingTestResult), {})
+        records = self.run_sample(resultclass).records
+        outcomes = {test_id.rpartition(".")[2]: record["outcome"] for test_id, record in records.items()}
+        self.assertEqual(outcomes, {"test_passes": "passed", "test_subtest_fails": "failed",
+                                    "test_subtest_errors": "error"})
+        failed = next(record for test_id, record in records.items() if test_id.endswith("test_subtest_fails"))
+        self.assertIn("AssertionError", failed["details"])
+
+
+class _FakeDriver:
+    def execute(self, driver_command, params=None):
+        return {"value": None}
+
+
+class ReporterTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.reporter = reporting.Reporter(self.directory, "-worker-1")
+
+    def events(self):
+        return [json.loads(line) for line in (self.directory / "events-worker-1.jsonl").read_text().splitlines()]
+
+    def test_events_are_written_as_they_happen(self):
+        driver = reporting.count_commands(_FakeDriver())
+        self.reporter.start_test("m.C.test_a")
+        driver.execute("get")
+        driver.execute("findElement")
+        self.reporter.step("Page open")
+        self.reporter.artifact("m.C.test_a", self.directory / "001-failure.png")
+        # Nothing is closed yet: the stream is readable while the run goes on
+        self.assertEqual([event["event"] for event in self.events()], ["test_start", "step", "artifact"])
+        self.reporter.end_test("m.C.test_a", "passed")
+        step, end = self.events()[1], self.events()[3]
+        self.assertEqual((step["name"], step["commands"]), ("Page open", 2))
+        self.assertEqual((end["outcome"], end["commands"], end["steps"]), ("passed", 2, 1))
+        self.assertEqual(end["artifacts"], [str(self.directory / "001-failure.png")])
+
+    def test_nested_steps_cover_their_whole_block(self):
+        self.reporter.start_test("m.C.test_a")
+        with mock.patch.object(reporting, "reporter", self.reporter), \
+                mock.patch.object(reporting.time, "perf_counter", side_effect=[10.0, 10.0, 11.0, 11.0, 13.0, 17.0]):
+            with reporting.step("Sequence"):
+                with reporting.step("Click"):
+                    pass
+        inner, outer = [event for event in self.events() if event["event"] == "step"]
+        self.assertEqual((inner["name"], inner["duration"]), ("Click", 2.0))
+        self.assertEqual((outer["name"], outer["duration"]), ("Sequence", 7.0))
+
+    def test_junit_file(self):
+        self.reporter.start_test("m.C.test_a")
+        for index in range(reporting.MAX_JUNIT_STEPS + 5):
+            self.reporter.step(f"record {index}")
+        self.reporter.end_test("m.C.test_a", "failed", "Traceback ...\nAssertionError: 1 != 2")
+        # A complete document after every test, not only after close()
+        suite = ElementTree.parse(self.directory / "junit-worker-1.xml").getroot()
+        self.assertEqual([case.get("name") for case in suite.iter("testcase")], ["test_a"])
+        self.reporter.end_test("setUpClass (m.D)", "error", "RuntimeError: no browser")
+        self.reporter.start_test("m.C.test_b")
+        self.reporter.end_test("m.C.test_b", "cached", "cached pass", saved_seconds=2.5)
+        with mock.patch("builtins.print"):
+            self.reporter.close()
+
+        suite = ElementTree.parse(self.directory / "junit-worker-1.xml").getroot()
+        cases = {(case.get("classname"), case.get("name")): case for case in suite.iter("testcase")}
+        self.assertEqual(list(cases), [("m.C", "test_a"), ("m.D", "setUpClass"), ("m.C", "test_b")])
+        failed = cases["m.C", "test_a"]
+        self.assertEqual(failed.find("failure").get("message"), "AssertionError: 1 != 2")
+        output = failed.find("system-out").text.splitlines()
+        self.assertEqual(len(output), reporting.MAX_JUNIT_STEPS + 1)
+        self.assertEqual(output[-1], "... 5 more steps in events-worker-1.jsonl")
+        self.assertIsNotNone(cases["m.D", "setUpClass"].find("error"))
+        self.assertEqual(cases["m.C", "test_b"].find("skipped").get("message"), "cached pass")
+        self.assertEqual((self.reporter.cached, self.reporter.saved_seconds), (1, 2.5))
+
+
+if __name__ == "__main__":
+    unittest.main()
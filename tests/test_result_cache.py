@@ -0,0 +1,213 @@
+"""Which tests the result cache stores and how it rewrites a suite."""
+import importlib.util
+import io
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import config
+import reporting
+import result_cache
+
+
+def _sample_classes():
+    # Defined here so that test runners do not collect the samples themselves
+    class First(unittest.TestCase):
+        def test_passes(self):
+            pass
+
+        def test_subtest_fails(self):
+            for value in (1, 2):
+                with self.subTest(value=value):
+                    self.assertEqual(value, 1)
+
+        def test_fails(self):
+            self.fail("always")
+
+    class Second(unittest.TestCase):
+        set_up_classes = 0
+
+        @classmethod
+        def setUpClass(cls):
+            Second.set_up_classes += 1
+
+        def test_a(self):
+            pass
+
+        def test_b(self):
+            pass
+
+        def test_c(self):
+            pass
+
+    return First, Second
+
+
+_KEYED_MODULE = """
+import unittest
+
+from config import page_url
+
+
+class Keyed(unittest.TestCase):
+    def setUp(self):
+        self.marker = {set_up!r}
+
+    def test_open(self):
+        self.helper(page_url("buttons.php"))
+
+    def test_other(self):
+        pass
+
+    def helper(self, url):
+        return {helper!r}
+"""
+
+
+class ResultCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.cache = result_cache.ResultCache(self.directory / "cache.json")
+        for patch in (mock.patch.object(reporting, "reporter", reporting.Reporter(self.directory)),
+                      mock.patch.object(result_cache, "cache", self.cache),
+                      mock.patch.object(result_cache, "browser_version", return_value="128.0"),
+                      mock.patch.object(config, "FORCE_RUN", False)):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def run_suite(self, suite):
+        return unittest.TextTestRunner(stream=io.StringIO(),
+                                       resultclass=reporting.ReportingTestResult).run(suite)
+
+    def test_only_clean_passes_are_cached(self):
+        First, _ = _sample_classes()
+        self.run_suite(unittest.defaultTestLoader.loadTestsFromTestCase(First))
+        cached = sorted(entry["test"].rpartition(".")[2] for entry in self.cache.entries.values())
+        self.assertEqual(cached, ["test_passes"])
+
+        # The second run still runs (and fails) the test with the failing subtest
+        suite = result_cache.filter_suite(unittest.defaultTestLoader.loadTestsFromTestCase(First))
+        result = self.run_suite(suite)
+        self.assertEqual(len(result.skipped), 1)
+        self.assertEqual(len(result.failures), 2)
+
+    def test_cached_tests_run_after_the_real_ones(self):
+        _, Second = _sample_classes()
+        self.run_suite(unittest.TestSuite([Second("test_b")]))
+        Second.set_up_classes = 0
+
+        suite = result_cache.filter_suite(unittest.defaultTestLoader.loadTestsFromTestCase(Second))
+        order = [(type(test).__name__, test.id().rpartition(".")[2]) for test in _flatten(suite)]
+        self.assertEqual(order, [("Second", "test_a"), ("Second", "test_c"), ("CachedTest", "test_b")])
+        result = self.run_suite(suite)
+        self.assertEqual((result.testsRun, len(result.skipped)), (3, 1))
+        # A cached test between test_a and test_c would have set the class up twice
+        self.assertEqual(Second.set_up_classes, 1)
+
+
+class TestKeyTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.page_hashes = {"buttons.php": "v1"}
+        for patch in (mock.patch.object(result_cache, "page_hash", side_effect=self.page_hashes.get),
+                      mock.patch.object(result_cache, "browser_version", return_value="128.0"),
+                      mock.patch.object(result_cache, "cache", result_cache.ResultCache(self.directory / "cache.json"))):
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.modules = 0
+
+    def load(self, set_up="a", helper="a", method="test_open"):
+        """A test of a freshly written module, so that inspect sees the given source."""
+        self.modules += 1
+        name = f"keyed_{self.modules}"
+        path = self.directory / f"{name}.py"
+        path.write_text(_KEYED_MODULE.format(set_up=set_up, helper=helper))
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module.Keyed(method)
+
+    def test_key_is_stable(self):
+        self.assertEqual(result_cache.test_key(self.load()), result_cache.test_key(self.load()))
+        self.assertNotEqual(result_cache.test_key(self.load()), result_cache.test_key(self.load(method="test_other")))
+
+    def test_helpers_and_fixtures_are_part_of_the_key(self):
+        key = result_cache.test_key(self.load())
+        self.assertNotEqual(result_cache.test_key(self.load(helper="b")), key)
+        self.assertNotEqual(result_cache.test_key(self.load(set_up="b")), key)
+
+    def test_pages_and_browser_are_part_of_the_key(self):
+        key = result_cache.test_key(self.load())
+        self.page_hashes["buttons.php"] = "v2"
+        changed_page = result_cache.test_key(self.load())
+        self.assertNotEqual(changed_page, key)
+        with mock.patch.object(result_cache, "browser_version", return_value="129.0"):
+            self.assertNotIn(result_cache.test_key(self.load()), (key, changed_page))
+        # The page it does not open does not matter for test_other
+        other = result_cache.test_key(self.load(method="test_other"))
+        self.page_hashes["buttons.php"] = "v3"
+        self.assertEqual(result_cache.test_key(self.load(method="test_other")), other)
+
+    def test_unreadable_page_means_no_key(self):
+        del self.page_hashes["buttons.php"]
+        self.assertIsNone(result_cache.test_key(self.load()))
+
+    def test_unknown_browser_version_means_no_key(self):
+        with mock.patch.object(result_cache, "browser_version", return_value=None):
+            self.assertIsNone(result_cache.test_key(self.load()))
+
+    def test_force_run_ignores_cached_passes(self):
+        test = self.load()
+        result_cache.cache.put(result_cache.test_key(test), test.id(), 1.5)
+        self.assertIsNotNone(result_cache.lookup(test)[1])
+        with mock.patch.object(config, "FORCE_RUN", True):
+            key, entry = result_cache.lookup(test)
+        self.assertEqual((key, entry), (result_cache.test_key(test), None))
+
+
+class BrowserVersionTestCase(unittest.TestCase):
+    def setUp(self):
+        for name in ("_installed_version", "_session_version"):
+            patch = mock.patch.object(result_cache, name, None)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def run_firefox(self, output):
+        return mock.patch.multiple(result_cache, shutil=mock.Mock(**{"which.return_value": "/usr/bin/firefox"}),
+                                   subprocess=mock.Mock(**{"run.return_value.stdout": output}))
+
+    def test_installed_and_session_versions_agree(self):
+        with self.run_firefox("Mozilla Firefox 128.0.3esr\n"):
+            self.assertEqual(result_cache.browser_version(), "128.0.3esr")
+        result_cache.note_browser_version("128.0.3esr")
+        self.assertEqual(result_cache.browser_version(), "128.0.3esr")
+
+    def test_the_session_wins_over_the_binary_on_path(self):
+        with self.run_firefox("Mozilla Firefox 128.0\n"):
+            self.assertEqual(result_cache.browser_version(), "128.0")
+        result_cache.note_browser_version("129.0")
+        self.assertEqual(result_cache.browser_version(), "129.0")
+
+    def test_unknown_until_a_session_reports_it(self):
+        with mock.patch.object(result_cache.shutil, "which", return_value=None):
+            self.assertIsNone(result_cache.browser_version())
+        # Not remembered in the cache file: the next run could use an upgraded browser
+        result_cache.note_browser_version("130.0")
+        self.assertEqual(result_cache.browser_version(), "130.0")
+
+
+def _flatten(suite):
+    for item in suite:
+        if isinstance(item, unittest.TestSuite):
+            yield from _flatten(item)
+        else:
+            yield item
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""retries.navigate and retry_step against a fake driver."""
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from selenium.common.exceptions import (NoSuchElementException, StaleElementReferenceException,
+                                        TimeoutException)
+
+import artifacts
+import config
+import latency
+import retries
+from latency import LatencyHistory
+
+
+class _FakeDriver:
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.loaded = []
+        self.scripts = []
+        self.page_load_timeouts = []
+
+    def set_page_load_timeout(self, timeout):
+        self.page_load_timeouts.append(timeout)
+
+    def get(self, url):
+        if self.failures:
+            raise self.failures.pop(0)
+        self.loaded.append(url)
+
+    def execute_script(self, script, *args):
+        self.scripts.append(script)
+
+
+class RetriesTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.history = LatencyHistory(Path(directory.name) / "history.json")
+        for patch in (mock.patch.object(latency, "history", self.history),
+                      mock.patch.object(retries, "RETRY_LOG", Path(directory.name) / "retries.jsonl"),
+                      mock.patch.object(retries.time, "sleep"),
+                      mock.patch("builtins.print")):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_navigate_installs_the_console_hook(self):
+        driver = _FakeDriver()
+        with mock.patch.object(config, "ARTIFACTS_CONSOLE_ON_FAILURE", True):
+            retries.navigate(driver, "http://127.0.0.1:8000/selenium/practice/buttons.php")
+        self.assertEqual(driver.scripts, [artifacts._CONSOLE_HOOK_JS])
+
+    def test_navigate_without_console_artifact_installs_nothing(self):
+        driver = _FakeDriver()
+        with mock.patch.object(config, "ARTIFACTS_CONSOLE_ON_FAILURE", False):
+            retries.navigate(driver, "http://127.0.0.1:8000/selenium/practice/buttons.php")
+        self.assertEqual(driver.scripts, [])
+
+    def test_navigate_retries_a_page_load_timeout(self):
+        driver = _FakeDriver([TimeoutException("slow")])
+        retries.navigate(driver, "http://127.0.0.1:8000/selenium/practice/buttons.php")
+        self.assertEqual(len(driver.loaded), 1)
+
+    def test_only_transient_errors_are_retried(self):
+        calls = []
+
+        def step():
+            calls.append(1)
+            raise StaleElementReferenceException("stale") if len(calls) < 3 else NoSuchElementException("gone")
+
+        self.assertRaises(NoSuchElementException, retries.retry_step, step, "click", attempts=5)
+        self.assertEqual(len(calls), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
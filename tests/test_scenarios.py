@@ -0,0 +1,197 @@
+"""ScenarioTestCase with a pool of fake drivers: shared page loads and crash recovery."""
+import io
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from selenium.common.exceptions import NoAlertPresentException, WebDriverException
+
+import latency
+import reporting
+import result_cache
+import scenarios
+from browser_pool import BrowserPool
+from latency import LatencyHistory
+from scenarios import ScenarioTestCase, scenario
+
+
+class _SwitchTo:
+    @property
+    def alert(self):
+        raise NoAlertPresentException()
+
+    def window(self, handle):
+        pass
+
+
+class _FakeDriver:
+    """Answers every command, until `crash()`; then every command fails."""
+
+    started = []
+
+    def __init__(self):
+        self.crashed = False
+        self.loads = []
+        self.switch_to = _SwitchTo()
+        self.window_handles = ["main"]
+        _FakeDriver.started.append(self)
+
+    def crash(self):
+        self.crashed = True
+
+    def _command(self, result=None):
+        if self.crashed:
+            raise WebDriverException("Failed to decode response from marionette")
+        return result
+
+    def execute(self, driver_command, params=None):
+        return self._command({})
+
+    @property
+    def title(self):
+        return self._command("Selenium Practice")
+
+    @property
+    def current_window_handle(self):
+        return self._command("main")
+
+    @property
+    def current_url(self):
+        return self._command(self.loads[-1] if self.loads else "about:blank")
+
+    def get(self, url):
+        self.loads.append(self._command(url))
+
+    def set_page_load_timeout(self, timeout):
+        self._command()
+
+    def set_script_timeout(self, timeout):
+        self._command()
+
+    def execute_script(self, script, *args):
+        return self._command(True)
+
+    def execute_async_script(self, script, *args):
+        return self._command({"state": "complete"})
+
+    def get_screenshot_as_base64(self):
+        return self._command("")
+
+    @property
+    def page_source(self):
+        return self._command("<html></html>")
+
+    def delete_all_cookies(self):
+        self._command()
+
+    def quit(self):
+        pass
+
+
+def _sample_suite():
+    # Defined here so that test runners do not collect the samples themselves
+    class Sample(ScenarioTestCase):
+        @scenario("buttons.php")
+        def test_1_first(self):
+            pass
+
+        @scenario("buttons.php")
+        def test_2_shares_the_page_load(self):
+            pass
+
+        @scenario("buttons.php")
+        def test_3_browser_crashes(self):
+            self.driver.crash()
+            self.driver.title
+
+        @scenario("buttons.php")
+        def test_4_gets_a_new_browser(self):
+            self.assertFalse(self.driver.crashed)
+
+        @scenario("radio-button.php")
+        def test_5_other_page(self):
+            pass
+
+    return Sample, unittest.defaultTestLoader.loadTestsFromTestCase(Sample)
+
+
+def _interleaved_suite():
+    class Interleaved(ScenarioTestCase):
+        @scenario("buttons.php")
+        def test_a(self):
+            pass
+
+        @scenario("radio-button.php")
+        def test_b(self):
+            pass
+
+        @scenario("buttons.php", fresh=True)
+        def test_c(self):
+            pass
+
+        @scenario("radio-button.php")
+        def test_d(self):
+            pass
+
+        @scenario("buttons.php")
+        def test_e(self):
+            pass
+
+    return Interleaved, unittest.defaultTestLoader.loadTestsFromTestCase(Interleaved)
+
+
+class ScenarioTestCaseTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        directory = Path(directory.name)
+        _FakeDriver.started = []
+        self.pool = BrowserPool(factory=_FakeDriver)
+        # The waits record too, into the history of the site the driver is on
+        self.history = LatencyHistory(directory / "latency.json")
+        for patch in (mock.patch.object(scenarios, "get_pool", return_value=self.pool),
+                      mock.patch.object(scenarios.artifacts, "capture_failure"),
+                      mock.patch.object(latency, "history", self.history),
+                      mock.patch.object(reporting, "reporter", reporting.Reporter(directory)),
+                      mock.patch.object(result_cache, "cache", result_cache.ResultCache(directory / "cache.json"))):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_a_crashed_browser_is_replaced(self):
+        Sample, suite = _sample_suite()
+        result = unittest.TextTestRunner(stream=io.StringIO()).run(suite)
+        self.assertEqual([test.id().rpartition(".")[2] for test, _ in result.errors], ["test_3_browser_crashes"])
+        self.assertEqual(result.failures, [])
+        self.assertEqual(len(_FakeDriver.started), 2)
+        first, second = _FakeDriver.started
+        # buttons.php is loaded once for tests 1-3, then again on the new browser
+        self.assertEqual([url.rpartition("/")[2] for url in first.loads], ["buttons.php"])
+        # about:blank: the pool resets the browser it gets back after the class
+        self.assertEqual([url.rpartition("/")[2] for url in second.loads],
+                         ["buttons.php", "radio-button.php", "about:blank"])
+        self.assertEqual(Sample.page_loads, 3)
+
+    def test_tests_of_a_page_run_together(self):
+        _, suite = _interleaved_suite()
+        scheduled = scenarios.scenario_load_tests(unittest.defaultTestLoader, unittest.TestSuite([suite]), None)
+        self.assertEqual([test._testMethodName for test in scheduled],
+                         ["test_a", "test_c", "test_e", "test_b", "test_d"])
+
+    def test_page_is_loaded_once_per_group_unless_fresh(self):
+        Interleaved, suite = _interleaved_suite()
+        suite = unittest.TestSuite(scenarios.schedule(suite))
+        result = unittest.TextTestRunner(stream=io.StringIO()).run(suite)
+        self.assertTrue(result.wasSuccessful())
+        driver, = _FakeDriver.started
+        # test_c asks for a fresh load; test_e reuses it
+        self.assertEqual([url.rpartition("/")[2] for url in driver.loads],
+                         ["buttons.php", "buttons.php", "radio-button.php", "about:blank"])
+        self.assertEqual(Interleaved.page_loads, 3)
+        # Recorded for the site of the loaded page, and only into the patched history
+        ready_key = latency.site_key("wait_for_page_ready:interactive", driver.loads[0])
+        self.assertEqual(len(self.history.samples[ready_key]), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+"""Per-command WebDriver latency tracing.
+
+With SELENIUM_TRACE=<prefix> every driver created by the browser factory records each
+WebDriver command (name, locator, wall time, request/response size) tagged with the
+running test, and time.sleep() is recorded as idle time. At exit the records are
+written to <prefix>.jsonl and <prefix>.trace.json (load it in chrome://tracing or
+Perfetto) and a per-test summary of the slowest commands is printed.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+import config
+
+NO_TEST = "<outside test>"
+
+
+class Tracer:
+    def __init__(self):
+        self.records = []
+        self.current_test = NO_TEST
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._real_sleep = None
+
+    def begin_test(self, test_id):
+        self.current_test = test_id
+
+    def end_test(self):
+        self.current_test = NO_TEST
+
+    def record(self, kind, name, started, duration, locator=None, payload=0):
+        with self._lock:
+            self.records.append({
+                "test": self.current_test,
+                "kind": kind,
+                "name": name,
+                "locator": locator,
+                "start": started - self._origin,
+                "duration": duration,
+                "payload": payload,
+                "thread": threading.get_ident(),
+            })
+
+    def trace_driver(self, driver):
+        """Route every command of `driver` (and its elements) through the tracer."""
+        execute = driver.execute
+
+        def traced_execute(driver_command, params=None):
+            started = time.perf_counter()
+            response = execute(driver_command, params)
+            duration = time.perf_counter() - started
+            self.record("command", driver_command, started, duration,
+                        _locator(params), _size(params) + _size(response))
+            return response
+
+        # WebElement commands go through the parent driver's execute() as well
+        driver.execute = traced_execute
+        return driver
+
+    def trace_sleep(self):
+        """Replace time.sleep so fixed sleeps show up as idle time."""
+        if self._real_sleep is not None:
+            return
+        real_sleep = self._real_sleep = time.sleep
+
+        def traced_sleep(seconds):
+            started = time.perf_counter()
+            real_sleep(seconds)
+            self.record("sleep", "sleep", started, time.perf_counter() - started)
+
+        time.sleep = traced_sleep
+
+    def export_jsonl(self, path):
+        with open(path, "w") as f:
+            for record in self.records:
+                f.write(json.dumps(record) + "\n")
+
+    def export_chrome_trace(self, path):
+        pid = os.getpid()
+        events = [{
+            "name": record["name"],
+            "cat": record["kind"],
+            "ph": "X",
+            "ts": record["start"] * 1e6,
+            "dur": record["duration"] * 1e6,
+            "pid": pid,
+            "tid": record["thread"],
+            "args": {"test": record["test"], "locator": record["locator"], "payload": record["payload"]},
+        } for record in self.records]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def summary(self, slowest=5):
+        """Per test: command count and time, idle (sleep) time and the slowest commands."""
+        tests = defaultdict(lambda: {"commands": 0, "command_time": 0.0, "sleep_time": 0.0, "slowest": []})
+        for record in self.records:
+            test = tests[record["test"]]
+            if record["kind"] == "sleep":
+                test["sleep_time"] += record["duration"]
+            else:
+                test["commands"] += 1
+                test["command_time"] += record["duration"]
+                test["slowest"].append(record)
+        for test in tests.values():
+            test["slowest"] = sorted(test["slowest"], key=lambda r: r["duration"], reverse=True)[:slowest]
+        return dict(tests)
+
+    def print_summary(self, slowest=5):
+        for test_id, test in self.summary(slowest).items():
+            print(f"\n{test_id}: {test['commands']} commands in {test['command_time']:.2f}s, "
+                  f"{test['sleep_time']:.2f}s sleeping")
+            for record in test["slowest"]:
+                locator = f" {record['locator']}" if record["locator"] else ""
+                print(f"    {record['duration'] * 1000:8.1f} ms  {record['name']}{locator}")
+
+
+def _locator(params):
+    if params and "using" in params and "value" in params:
+        return f"{params['using']}={params['value']}"
+    if params and "url" in params:
+        return params["url"]
+    return None
+
+
+def _size(payload):
+    if not payload:
+        return 0
+    return len(json.dumps(payload, default=str))
+
+
+tracer = Tracer()
+
+
+def enabled():
+    return bool(config.TRACE)
+
+
+def _export_at_exit():
+    if not tracer.records:
+        return
+    prefix = config.TRACE
+    if config.WORKER is not None:
+        # Parallel runner workers each write their own files
+        prefix = f"{prefix}-worker-{config.WORKER}"
+    tracer.export_jsonl(f"{prefix}.jsonl")
+    tracer.export_chrome_trace(f"{prefix}.trace.json")
+    tracer.print_summary()
+
+
+if enabled():
+    tracer.trace_sleep()
+    atexit.register(_export_at_exit)
@@ -0,0 +1,263 @@
+"""Event-driven waits.
+
+Instead of polling with WebDriverWait, each wait installs a listener in the page
+(MutationObserver, load events, fetch/XHR hooks) through execute_async_script and the
+page calls us back the moment the condition holds.
+
+The one exception is wait_for_navigation: leaving a document cannot be reported by a
+script running in it, so it polls for the old <html> element to go stale.
+
+Without an explicit timeout, each wait takes its timeout from the latency history of
+its kind and locator (see latency.py) and records how long it took.
+"""
+import time
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+import latency
+from latency import locator_key, page_key
+
+
+# Result messages of the practice pages
+CLICK_RESULT = (By.ID, "welcomeDiv")
+DOUBLE_CLICK_RESULT = (By.ID, "doublec")
+RADIO_RESULT = (By.ID, "check")
+RADIO_IMPRESSIVE_RESULT = (By.ID, "check1")
+
+# Used until a wait has enough latency history
+DEFAULT_TIMEOUT = 10
+
+
+_LOCATE_JS = """
+function locate(by, value) {
+  if (by === null) return document.documentElement;
+  switch (by) {
+    case 'id': return document.getElementById(value);
+    case 'xpath':
+      return document.evaluate(value, document, null,
+                               XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    case 'name': return document.querySelector('[name="' + CSS.escape(value) + '"]');
+    case 'class name': return document.querySelector('.' + CSS.escape(value));
+    default: return document.querySelector(value);  // css selector, tag name
+  }
+}
+function textOf(el) {
+  // Like WebElement.text: an element that is not rendered (e.g. display: none) has no text
+  if (!el || el.getClientRects().length === 0) return '';
+  return (el.innerText || '').trim();
+}
+"""
+
+_DOM_WAIT_JS = _LOCATE_JS + """
+var by = arguments[0], value = arguments[1], mode = arguments[2], arg = arguments[3],
+    timeoutMs = arguments[4], done = arguments[arguments.length - 1];
+var finished = false, observer = null, timer = null, quietTimer = null;
+
+function check() {
+  var text = textOf(locate(by, value));
+  if (mode === 'contains' && text.indexOf(arg) !== -1) return {text: text};
+  if (mode === 'changed' && text !== arg) return {text: text};
+  return null;
+}
+function finish(result) {
+  if (finished) return;
+  finished = true;
+  if (observer) observer.disconnect();
+  clearTimeout(timer);
+  clearTimeout(quietTimer);
+  done(result);
+}
+function settleLater() {
+  clearTimeout(quietTimer);
+  quietTimer = setTimeout(function () { finish({text: textOf(locate(by, value))}); }, arg);
+}
+
+timer = setTimeout(function () {
+  finish({timedOut: true, text: textOf(locate(by, value))});
+}, timeoutMs);
+
+var initial = check();
+if (initial) {
+  finish(initial);
+} else {
+  observer = new MutationObserver(function () {
+    if (mode === 'mutation') finish({text: textOf(locate(by, value))});
+    else if (mode === 'quiet') settleLater();
+    else { var result = check(); if (result) finish(result); }
+  });
+  observer.observe(document.documentElement,
+                   {childList: true, subtree: true, characterData: true, attributes: true});
+  if (mode === 'quiet') settleLater();
+}
+"""
+
+_PAGE_READY_JS = """
+var state = arguments[0], timeoutMs = arguments[1], done = arguments[arguments.length - 1];
+var wanted = state === 'complete' ? ['complete'] : ['interactive', 'complete'];
+if (wanted.indexOf(document.readyState) !== -1) {
+  done({state: document.readyState});
+} else {
+  var timer = setTimeout(function () { done({timedOut: true, state: document.readyState}); }, timeoutMs);
+  document.addEventListener('readystatechange', function listener() {
+    if (wanted.indexOf(document.readyState) === -1) return;
+    document.removeEventListener('readystatechange', listener);
+    clearTimeout(timer);
+    done({state: document.readyState});
+  });
+}
+"""
+
+_NETWORK_IDLE_JS = """
+var idleMs = arguments[0], timeoutMs = arguments[1], done = arguments[arguments.length - 1];
+var tracker = window.__seleniumNetTracker;
+if (!tracker) {
+  // Count in-flight fetch/XHR requests and notify listeners on every change
+  tracker = window.__seleniumNetTracker = {pending: 0, listeners: []};
+  var notify = function (delta) {
+    tracker.pending = Math.max(0, tracker.pending + delta);
+    tracker.listeners.slice().forEach(function (listener) { listener(); });
+  };
+  if (window.fetch) {
+    var originalFetch = window.fetch;
+    window.fetch = function () {
+      notify(1);
+      return originalFetch.apply(this, arguments).finally(function () { notify(-1); });
+    };
+  }
+  var originalSend = XMLHttpRequest.prototype.send;
+  XMLHttpRequest.prototype.send = function () {
+    notify(1);
+    this.addEventListener('loadend', function () { notify(-1); });
+    return originalSend.apply(this, arguments);
+  };
+  if (window.PerformanceObserver) {
+    // Scripts, images and iframes do not go through fetch/XHR; reset the idle timer for them too
+    new PerformanceObserver(function () { notify(0); }).observe({entryTypes: ['resource']});
+  }
+  window.addEventListener('load', function () { notify(0); });
+}
+
+var idleTimer = null, finished = false;
+function finish(result) {
+  if (finished) return;
+  finished = true;
+  clearTimeout(idleTimer);
+  clearTimeout(timer);
+  tracker.listeners.splice(tracker.listeners.indexOf(onChange), 1);
+  done(result);
+}
+function onChange() {
+  clearTimeout(idleTimer);
+  if (tracker.pending === 0 && document.readyState === 'complete') {
+    idleTimer = setTimeout(function () { finish({pending: 0}); }, idleMs);
+  }
+}
+var timer = setTimeout(function () { finish({timedOut: true, pending: tracker.pending}); }, timeoutMs);
+tracker.listeners.push(onChange);
+onChange();
+"""
+
+
+def _run_async(driver, script, timeout, *args):
+    # The page-side timer fires first; the session script timeout is only a safety net
+    if getattr(driver, "_event_wait_script_timeout", 0) < timeout + 1:
+        driver.set_script_timeout(timeout + 1)
+        driver._event_wait_script_timeout = timeout + 1
+    return driver.execute_async_script(script, *(args + (int(timeout * 1000),)))
+
+
+def _timed(key, timeout, wait):
+    """Run wait() and record its duration; a timed-out wait counts as the full timeout."""
+    started = time.perf_counter()
+    result = wait()
+    latency.history.record(key, timeout if result.get("timedOut") else time.perf_counter() - started)
+    return result
+
+
+def _dom_wait(driver, key, locator, mode, arg, timeout, message):
+    by, value = locator if locator is not None else (None, None)
+    result = _timed(key, timeout,
+                    lambda: _run_async(driver, _DOM_WAIT_JS, timeout, by, value, mode, arg))
+    if result.get("timedOut"):
+        raise TimeoutException(f"{message} (last text: {result.get('text')!r})")
+    return result["text"]
+
+
+def wait_for_text(driver, locator, text, timeout=None):
+    """Wait until the element's visible text contains `text` and return the full text."""
+    key = page_key(driver, f"wait_for_text:{locator_key(locator)}")
+    timeout = latency.history.timeout_for(key, timeout, DEFAULT_TIMEOUT)
+    return _dom_wait(driver, key, locator, "contains", text, timeout,
+                     f"Text {text!r} did not appear in {locator} within {timeout}s")
+
+
+def wait_for_result(driver, locator, previous="", timeout=None):
+    """Wait until a result message differs from `previous` and return the new text.
+
+    The result divs of the practice pages are empty until the user interacts, so the
+    default just waits for a message to show up.
+    """
+    key = page_key(driver, f"wait_for_result:{locator_key(locator)}")
+    timeout = latency.history.timeout_for(key, timeout, DEFAULT_TIMEOUT)
+    return _dom_wait(driver, key, locator, "changed", previous, timeout,
+                     f"Result in {locator} did not change from {previous!r} within {timeout}s")
+
+
+def wait_for_mutation(driver, locator=None, timeout=None):
+    """Wait for the next DOM mutation anywhere in the page; return the element's text."""
+    key = page_key(driver, f"wait_for_mutation:{locator_key(locator)}")
+    timeout = latency.history.timeout_for(key, timeout, DEFAULT_TIMEOUT)
+    return _dom_wait(driver, key, locator, "mutation", None, timeout,
+                     f"No DOM mutation within {timeout}s")
+
+
+def wait_for_dom_quiet(driver, quiet_ms=200, timeout=None):
+    """Wait until the DOM has not changed for `quiet_ms` milliseconds."""
+    key = page_key(driver, f"wait_for_dom_quiet:{quiet_ms}")
+    timeout = latency.history.timeout_for(key, timeout, DEFAULT_TIMEOUT)
+    _dom_wait(driver, key, None, "quiet", quiet_ms, timeout,
+              f"DOM did not settle for {quiet_ms}ms within {timeout}s")
+
+
+def wait_for_page_ready(driver, state="interactive", timeout=None):
+    """Wait for DOMContentLoaded ('interactive') or the load event ('complete')."""
+    key = page_key(driver, f"wait_for_page_ready:{state}")
+    timeout = latency.history.timeout_for(key, timeout, DEFAULT_TIMEOUT)
+    result = _timed(key, timeout, lambda: _run_async(driver, _PAGE_READY_JS, timeout, state))
+    if result.get("timedOut"):
+        raise TimeoutException(f"Page did not reach readyState {state!r} within {timeout}s "
+                               f"(still {result.get('state')!r})")
+    return result["state"]
+
+
+def wait_for_navigation(driver, action, state="interactive", timeout=None):
+    """Run `action` (e.g. a click that submits a form) and wait for the page it loads.
+
+    wait_for_page_ready right after the click can return for the old document, which is
+    still ready until the browser replaces it; so first wait for the old one to go away.
+    """
+    key = page_key(driver, "wait_for_navigation")
+    timeout = latency.history.timeout_for(key, timeout, DEFAULT_TIMEOUT)
+    old = driver.find_element(By.TAG_NAME, "html")
+    action()
+    started = time.perf_counter()
+    try:
+        WebDriverWait(driver, timeout, latency.history.poll_interval_for(key, 0.1)).until(EC.staleness_of(old))
+    except TimeoutException:
+        latency.history.record(key, timeout)
+        raise TimeoutException(f"The browser did not leave {driver.current_url} within {timeout}s")
+    latency.history.record(key, time.perf_counter() - started)
+    return wait_for_page_ready(driver, state)
+
+
+def wait_for_network_idle(driver, idle_ms=500, timeout=None):
+    """Wait until the page is loaded and no fetch/XHR/resource request happened for `idle_ms`."""
+    key = page_key(driver, f"wait_for_network_idle:{idle_ms}")
+    timeout = latency.history.timeout_for(key, timeout, DEFAULT_TIMEOUT)
+    result = _timed(key, timeout, lambda: _run_async(driver, _NETWORK_IDLE_JS, timeout, idle_ms))
+    if result.get("timedOut"):
+        raise TimeoutException(f"Network not idle within {timeout}s "
+                               f"({result.get('pending')} requests in flight)")